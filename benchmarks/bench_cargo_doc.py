@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from fuzzomatic.tools.cargo_doc import (
+    load_cargo_doc_index,
+    load_cargo_doc_index_full,
+    parse_cargo_doc_index,
+)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="bench-cargo-doc",
+        description="Compare peak RSS and parse time of the rustdoc JSON loaders",
+    )
+    parser.add_argument(
+        "json_paths",
+        nargs="*",
+        help="Paths to rustdoc JSON files. "
+        "A synthetic file is generated if none is given.",
+    )
+    parser.add_argument(
+        "--items",
+        dest="items",
+        type=int,
+        default=200000,
+        help="Number of items in the synthetic rustdoc JSON file",
+    )
+    parser.add_argument(
+        "--fanout",
+        dest="fanout",
+        type=int,
+        default=0,
+        help="Generate a synthetic crate with this many modules that all "
+        "glob re-export each other (heavy `pub use` fan-out) instead",
+    )
+    parser.add_argument("--run", dest="run", default=None, help=argparse.SUPPRESS)
+    return parser
+
+
+def generate_rustdoc_json(path, item_count):
+    # one root module containing public functions and structs with docs and spans,
+    # similar in shape to what rustdoc outputs for large crates
+    docs = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+    str_arg = ["input", {"borrowed_ref": {"type": {"primitive": "str"}}}]
+    root_items = [f"0:{i}" for i in range(1, item_count)]
+
+    with open(path, "w") as fout:
+        fout.write('{"root": "0:0", "crate_version": "1.0.0", "index": {')
+        root = {
+            "name": "bigcrate",
+            "visibility": "public",
+            "docs": docs,
+            "inner": {"module": {"items": root_items}},
+        }
+        fout.write(f'"0:0": {json.dumps(root)}')
+        for i in range(1, item_count):
+            item = {
+                "name": f"function_{i}",
+                "visibility": "public",
+                "docs": docs,
+                "attrs": ["#[inline]"],
+                "links": {},
+                "span": {"filename": f"src/m{i}.rs", "begin": [i, 0], "end": [i, 9]},
+                "inner": {"function": {"decl": {"inputs": [str_arg], "output": None}}},
+            }
+            fout.write(f', "0:{i}": {json.dumps(item)}')
+        fout.write('}, "paths": {}, "format_version": 26}')
+
+
+def generate_fanout_rustdoc_json(path, module_count, functions_per_module=20):
+    # every module defines a few functions and glob re-exports all the
+    # other modules, so that each function is reachable through many paths
+    str_arg = ["input", {"borrowed_ref": {"type": {"primitive": "str"}}}]
+    index = {}
+    root_items = []
+    next_id = 1
+
+    def new_id():
+        nonlocal next_id
+        item_id = f"0:{next_id}"
+        next_id += 1
+        return item_id
+
+    module_ids = [new_id() for _ in range(module_count)]
+    for m, module_id in enumerate(module_ids):
+        items = []
+        for f in range(functions_per_module):
+            function_id = new_id()
+            index[function_id] = {
+                "name": f"parse_{m}_{f}",
+                "visibility": "public",
+                "inner": {"function": {"decl": {"inputs": [str_arg]}}},
+            }
+            items.append(function_id)
+        for other_id in module_ids:
+            if other_id != module_id:
+                import_id = new_id()
+                index[import_id] = {
+                    "name": None,
+                    "visibility": "public",
+                    "inner": {"import": {"id": other_id, "glob": True}},
+                }
+                items.append(import_id)
+        index[module_id] = {
+            "name": f"module_{m}",
+            "visibility": "public",
+            "inner": {"module": {"items": items}},
+        }
+        root_items.append(module_id)
+
+    index["0:0"] = {
+        "name": "fanoutcrate",
+        "visibility": "public",
+        "inner": {"module": {"items": root_items}},
+    }
+    with open(path, "w") as fout:
+        fout.write(json.dumps({"root": "0:0", "index": index}))
+
+
+def run_loader(mode, json_path):
+    start = time.monotonic()
+    if mode == "streaming":
+        root, index = load_cargo_doc_index(json_path)
+    else:
+        root, index = load_cargo_doc_index_full(json_path)
+    load_duration = time.monotonic() - start
+
+    start = time.monotonic()
+    functions = parse_cargo_doc_index(root, index)
+    traversal_duration = time.monotonic() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps([len(functions), load_duration, traversal_duration, peak_rss_mb]))
+
+
+def bench(json_path):
+    size_mb = os.path.getsize(json_path) / (1024 * 1024)
+    print(f"{json_path} ({size_mb:.1f} MB)")
+    titles = ["Loader", "Functions", "Load (s)", "Traversal (s)", "Peak RSS (MB)"]
+    print("".join(f"{title:<15}" for title in titles))
+    for mode in ["full", "streaming"]:
+        # run each loader in a fresh process to measure its own peak RSS
+        cmd = [sys.executable, __file__, "--run", mode, json_path]
+        output = subprocess.check_output(cmd)
+        functions, load, traversal, peak_rss_mb = json.loads(output.decode("utf-8"))
+        row = [mode, functions, f"{load:.2f}", f"{traversal:.2f}", f"{peak_rss_mb:.1f}"]
+        print("".join(f"{col:<15}" for col in row))
+    print()
+
+
+def main():
+    parser = get_parser()
+    args = parser.parse_args()
+
+    if args.run is not None:
+        run_loader(args.run, args.json_paths[0])
+        return
+
+    if len(args.json_paths) > 0:
+        for json_path in args.json_paths:
+            bench(json_path)
+        return
+
+    with tempfile.TemporaryDirectory() as t:
+        json_path = os.path.join(t, "bigcrate.json")
+        if args.fanout > 0:
+            print(f"Generating synthetic rustdoc JSON with {args.fanout} modules...")
+            generate_fanout_rustdoc_json(json_path, args.fanout)
+        else:
+            print(f"Generating synthetic rustdoc JSON with {args.items} items...")
+            generate_rustdoc_json(json_path, args.items)
+        bench(json_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+from jinja2 import Template
+
+from fuzzomatic.tools import prompts
+
+CODE_SNIPPET = """#![no_main]
+
+extern crate libfuzzer_sys;
+
+use libfuzzer_sys::fuzz_target;
+
+fuzz_target!(|data: &[u8]| {
+    if let Ok(input) = std::str::from_utf8(data) {
+        let _ = mycrate::parse(input);
+    }
+});
+"""
+
+COMPILER_ERROR = """error[E0425]: cannot find function `parse` in crate `mycrate`
+  --> fuzz_targets/auto.rs:9:26
+   |
+9  |         let _ = mycrate::parse(input);
+   |                          ^^^^^ not found in `mycrate`
+   |
+help: consider importing this function
+   |
+3  + use mycrate::parser::parse;
+   |
+
+"""
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="bench-prompts",
+        description="Measure the render throughput of fix_prompt",
+    )
+    parser.add_argument(
+        "--error-repeat",
+        dest="error_repeat",
+        type=int,
+        default=500,
+        help="Number of times the compiler error is repeated",
+    )
+    parser.add_argument(
+        "--iterations",
+        dest="iterations",
+        type=int,
+        default=200,
+        help="Number of prompts rendered per implementation",
+    )
+    return parser
+
+
+def uncached_fix_prompt(code_snippet, error):
+    # previous fix_prompt: template compiled on every call, whole build output
+    t = Template(prompts.load_file_contents("templates/prompts/fix_code_error.j2"))
+    return t.render(code_snippet=code_snippet, error=error)
+
+
+def bench(name, fix_prompt, error, iterations):
+    start = time.monotonic()
+    for _ in range(iterations):
+        fix_prompt(CODE_SNIPPET, error)
+    duration = time.monotonic() - start
+    print(f"{name:<12}{iterations / duration:>12.1f} prompts/s")
+
+
+def main():
+    parser = get_parser()
+    args = parser.parse_args()
+
+    error = COMPILER_ERROR * args.error_repeat
+    print(f"fix_prompt with a {len(error) / 1024:.0f} KB compiler error")
+    uncached_prompt = uncached_fix_prompt(CODE_SNIPPET, error)
+    prompt = prompts.fix_prompt(CODE_SNIPPET, error)
+    print(f"{'previous':<12}{len(uncached_prompt):>12} chars")
+    print(f"{'current':<12}{len(prompt):>12} chars")
+    bench("previous", uncached_fix_prompt, error, args.iterations)
+    bench("current", prompts.fix_prompt, error, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
-from fuzzomatic.approaches.benches import try_benches_approach
-from fuzzomatic.approaches.examples import try_examples_approach
+from fuzzomatic.approaches.benches import try_benches_approach, bench_prompt_jobs
+from fuzzomatic.approaches.examples import try_examples_approach, example_prompt_jobs
 from fuzzomatic.approaches.functions import try_functions_approach
-from fuzzomatic.approaches.readme import try_readme_approach
+from fuzzomatic.approaches.readme import try_readme_approach, readme_prompt_jobs
 from fuzzomatic.approaches.unit_tests import (
     try_unit_tests_approach,
     try_unit_tests_with_function_approach,
+    unit_test_prompt_jobs,
+    unit_test_with_function_prompt_jobs,
 )
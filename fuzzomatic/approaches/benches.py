@@ -1,4 +1,7 @@
-from fuzzomatic.approaches.examples import try_examples_approach
+from fuzzomatic.approaches.examples import (
+    try_examples_approach,
+    example_prompt_jobs,
+)
 from fuzzomatic.tools.constants import DEFAULT_TARGET_NAME
 
 
@@ -6,3 +9,7 @@ def try_benches_approach(codebase_dir, target_name=DEFAULT_TARGET_NAME, **kwargs
     return try_examples_approach(
         codebase_dir, target_name=target_name, examples_dirname="benches", **kwargs
     )
+
+
+def bench_prompt_jobs(codebase_dir, **kwargs):
+    return example_prompt_jobs(codebase_dir, examples_dirname="benches", **kwargs)
@@ -1,16 +1,49 @@
 import fuzzomatic.tools.utils
 from fuzzomatic.tools import llm, prompts
+from fuzzomatic.tools.fix_knowledge import (
+    apply_code_edits,
+    code_edits_from_fix,
+    error_signatures,
+    find_known_edits,
+    learn_fix,
+    record_fix_failure,
+)
+from fuzzomatic.tools.validation import validate_fuzz_target
 from fuzzomatic.tools.utils import (
     write_fuzz_target,
     build_target,
     remove_fuzz_dependency,
     add_fuzz_dependency,
+    read_fuzz_manifest,
+    restore_fuzz_manifest,
 )
 
 
 def llm_attempt(
     codebase_dir, prompt, target_name, remaining_attempts=2, additional_code=None
 ):
+    code_snippet = generate_fuzz_target(
+        codebase_dir, prompt, additional_code=additional_code
+    )
+    if calls_placeholder_function(code_snippet):
+        print("Generated call to library_function(). Moving on...")
+        return False, None
+
+    syntax_error = None
+    if code_snippet is not None:
+        code_snippet, syntax_error = validate_fuzz_target(code_snippet)
+    return attempt_generated_fuzz_target(
+        codebase_dir,
+        prompt,
+        target_name,
+        code_snippet,
+        syntax_error=syntax_error,
+        remaining_attempts=remaining_attempts,
+        additional_code=additional_code,
+    )
+
+
+def generate_fuzz_target(codebase_dir, prompt, additional_code=None):
     # read the example and feed it to the LLM
     response = llm.ask_llm(prompt)
     code_snippet = llm.extract_fuzz_target(response, codebase_dir)
@@ -24,43 +57,83 @@ def llm_attempt(
     print("Extracted code snippet")
     print("======")
     print(code_snippet)
-    fix = True
+    return code_snippet
 
-    if code_snippet is not None and "library_function(" in code_snippet:
-        print("Generated call to library_function(). Moving on...")
-        return False, None
 
+def calls_placeholder_function(code_snippet):
+    return code_snippet is not None and "library_function(" in code_snippet
+
+
+def attempt_generated_fuzz_target(
+    codebase_dir,
+    prompt,
+    target_name,
+    code_snippet,
+    syntax_error=None,
+    remaining_attempts=2,
+    additional_code=None,
+):
+    # build a validated code snippet, fix it or ask the prompt again
     if code_snippet is not None:
-        fuzz_target_path = write_fuzz_target(code_snippet, codebase_dir, target_name)
+        build_success, fuzz_target_path = build_generated_fuzz_target(
+            codebase_dir, target_name, code_snippet, syntax_error
+        )
+        if build_success:
+            return build_success, fuzz_target_path
+
+    if remaining_attempts > 0:
+        return llm_attempt(
+            codebase_dir,
+            prompt,
+            target_name,
+            remaining_attempts - 1,
+            additional_code=additional_code,
+        )
+    else:
+        # no more remaining attempts
+        return False, None
+
+
+def build_generated_fuzz_target(codebase_dir, target_name, code_snippet, syntax_error):
+    fuzz_target_path = write_fuzz_target(code_snippet, codebase_dir, target_name)
+    if syntax_error is None:
         # try to build the target
         build_success, error, built_code = build_target(codebase_dir, target_name)
     else:
-        build_success = False
-        fix = False
+        # malformed code goes straight to the fix prompt
+        print(f"Invalid syntax, skipping build: {syntax_error}")
+        build_success, error, built_code = False, syntax_error, code_snippet
     if build_success:
         return build_success, fuzz_target_path
-    else:
-        # try to fix the code using the error message
-        if fix:
-            fix_success, error = llm_attempt_fix_error(
-                codebase_dir, target_name, built_code, error, remaining_attempts=2
-            )
-        else:
-            fix_success = False
 
-        if fix_success:
-            return fix_success, fuzz_target_path
-        elif remaining_attempts > 0:
-            return llm_attempt(
-                codebase_dir,
-                prompt,
-                target_name,
-                remaining_attempts - 1,
-                additional_code=additional_code,
-            )
-        else:
-            # no more remaining attempts
-            return False, None
+    # try to fix the code using the error message
+    fix_success, error = llm_attempt_fix_error(
+        codebase_dir, target_name, built_code, error, remaining_attempts=2
+    )
+    if fix_success:
+        return fix_success, fuzz_target_path
+    return False, None
+
+
+def prompt_job(prompt, remaining_attempts=2, additional_code=None):
+    return {
+        "prompt": prompt,
+        "remaining_attempts": remaining_attempts,
+        "additional_code": additional_code,
+    }
+
+
+def attempt_prompt_jobs(codebase_dir, target_name, jobs):
+    for job in jobs:
+        success, fuzz_target_path = llm_attempt(
+            codebase_dir,
+            job["prompt"],
+            target_name,
+            remaining_attempts=job["remaining_attempts"],
+            additional_code=job["additional_code"],
+        )
+        if success:
+            yield fuzz_target_path, None
 
 
 def llm_attempt_fix_error(
@@ -76,6 +149,16 @@ def llm_attempt_fix_error(
     else:
         print("Failed to fix cargo dependencies. Resuming...")
 
+    # try edits that fixed the same errors before
+    build_success, code_snippet = apply_known_fixes(
+        codebase_dir, target_name, code_snippet, error
+    )
+    if build_success:
+        fuzz_target_path = write_fuzz_target(code_snippet, codebase_dir, target_name)
+        return True, fuzz_target_path
+
+    previous_code_snippet = code_snippet
+    error_before_fix = error
     fix_prompt = prompts.fix_prompt(code_snippet, error)
     print("Asking LLM to fix the code...")
     response = llm.ask_llm(fix_prompt)
@@ -88,9 +171,14 @@ def llm_attempt_fix_error(
     fix = True
 
     if code_snippet is not None:
+        code_snippet, syntax_error = validate_fuzz_target(code_snippet)
         fuzz_target_path = write_fuzz_target(code_snippet, codebase_dir, target_name)
-        # try to build the target
-        build_success, error, built_code = build_target(codebase_dir, target_name)
+        if syntax_error is None:
+            # try to build the target
+            build_success, error, built_code = build_target(codebase_dir, target_name)
+        else:
+            print(f"Invalid syntax, skipping build: {syntax_error}")
+            build_success, error, built_code = False, syntax_error, code_snippet
     else:
         build_success = False
         error = None
@@ -98,6 +186,10 @@ def llm_attempt_fix_error(
         fix = False
 
     if build_success:
+        # remember import fixes made by the LLM for the next code bases
+        crate_name = fuzzomatic.tools.utils.detect_crate_name(codebase_dir)
+        edits = code_edits_from_fix(previous_code_snippet, built_code, crate_name)
+        learn_fix(error_signatures(error_before_fix, crate_name), edits)
         return build_success, fuzz_target_path
     elif remaining_attempts > 0:
         if fix:
@@ -118,18 +210,47 @@ def llm_attempt_fix_error(
 
 
 def add_missing_cargo_dependencies(codebase_dir, error, code_snippet, target_name):
+    crate_name = fuzzomatic.tools.utils.detect_crate_name(codebase_dir)
+    edits = plan_dependency_fixes(error, crate_name)
+    if len(edits) == 0:
+        # nothing to change, a rebuild would fail with the same error
+        print("Could not detect any fixable cargo dependencies")
+        return False, error, code_snippet
+
+    # edits that fix the errors are remembered in the fix knowledge base
+    signatures = error_signatures(error, crate_name)
+
+    # apply all the fixes at once and build a single time
+    manifest = read_fuzz_manifest(codebase_dir)
+    fixed_code_snippet, edits = apply_fix_edits(
+        codebase_dir, target_name, code_snippet, edits, crate_name
+    )
+    manifest_changed = manifest != read_fuzz_manifest(codebase_dir)
+    if len(edits) == 0 or (fixed_code_snippet == code_snippet and not manifest_changed):
+        # e.g. every cargo add failed, a rebuild would fail with the same error
+        print("Could not apply any cargo dependency fix")
+        return False, error, code_snippet
+
+    build_success, error, built_code = build_target(codebase_dir, target_name)
+    if build_success:
+        learn_fix(signatures, edits)
+
+    return build_success, error, built_code
+
+
+def plan_dependency_fixes(error, crate_name):
     cant_find_crate_pattern = "can't find crate for `"
     unresolved_import_pattern = "unresolved import `"
     no_matching_package_found = "no matching package found"
     searched_package_name = "searched package name: `"
 
-    crate_name = fuzzomatic.tools.utils.detect_crate_name(codebase_dir)
-
     expected_modules = ["libfuzzer_sys", crate_name]
 
+    edits = []
+    lines = error.split("\n")
+
     if no_matching_package_found in error:
         print("Trying to remove dependency to causes build failure")
-        lines = error.split("\n")
         for line in lines:
             if searched_package_name in line:
                 splits = line.split("`")
@@ -137,11 +258,10 @@ def add_missing_cargo_dependencies(codebase_dir, error, code_snippet, target_nam
                 print("Detected module name: ", module_name)
 
                 if module_name not in expected_modules:
-                    remove_fuzz_dependency(codebase_dir, module_name)
+                    edits.append({"kind": "remove_dependency", "name": module_name})
 
     if cant_find_crate_pattern in error:
         print("Trying to fix can't find crate for error")
-        lines = error.split("\n")
         for line in lines:
             if cant_find_crate_pattern in line:
                 # extract unresolved import name
@@ -151,22 +271,10 @@ def add_missing_cargo_dependencies(codebase_dir, error, code_snippet, target_nam
 
                 if module_name not in expected_modules:
                     source_line = f"extern crate {module_name};"
-                    code_snippet = code_snippet.replace(source_line, "")
-                    print(f"Rewriting fuzz target without {source_line}")
-                    write_fuzz_target(code_snippet, codebase_dir, target_name)
-
-                    # try to build with fix
-                    build_success, error, built_code = build_target(
-                        codebase_dir, target_name
-                    )
-                    if build_success:
-                        return build_success, error, built_code
-    else:
-        print("Could not detect any superfluous extern crate statements")
+                    edits.append({"kind": "remove_line", "line": source_line})
 
     if unresolved_import_pattern in error:
         print("Trying to fix cargo dependencies")
-        lines = error.split("\n")
         for line in lines:
             if unresolved_import_pattern in line:
                 # extract unresolved import name
@@ -180,17 +288,63 @@ def add_missing_cargo_dependencies(codebase_dir, error, code_snippet, target_nam
                 # from libfuzzer_sys and the module's name
                 if module_name not in expected_modules:
                     dependency = f"{module_name}@*"
-                    module_add_success = add_fuzz_dependency(codebase_dir, dependency)
-                    if not module_add_success:
-                        # retry with underscore change:
-                        # if module name contains "_", replace them with "-"
-                        module_name = module_name.replace("_", "-")
-                        dependency = f"{module_name}@*"
-                        _ = add_fuzz_dependency(codebase_dir, dependency)
-    else:
-        print("Could not detect any fixable cargo dependencies")
+                    edits.append({"kind": "add_dependency", "dependency": dependency})
 
-    # build target again and check output
-    build_success, error, built_code = build_target(codebase_dir, target_name)
+    # the same error may be reported several times
+    unique_edits = []
+    for edit in edits:
+        if edit not in unique_edits:
+            unique_edits.append(edit)
+    return unique_edits
 
-    return build_success, error, built_code
+
+def apply_fix_edits(codebase_dir, target_name, code_snippet, edits, crate_name):
+    # returns the rewritten code snippet and the edits that could be applied
+    applied_edits = []
+    for edit in edits:
+        if edit["kind"] == "add_dependency":
+            dependency = edit["dependency"]
+            module_add_success = add_fuzz_dependency(codebase_dir, dependency)
+            if not module_add_success and "_" in dependency:
+                # retry with underscore change:
+                # if module name contains "_", replace them with "-"
+                dependency = dependency.replace("_", "-")
+                module_add_success = add_fuzz_dependency(codebase_dir, dependency)
+            if module_add_success:
+                applied_edits.append(
+                    {"kind": "add_dependency", "dependency": dependency}
+                )
+        elif edit["kind"] == "remove_dependency":
+            remove_fuzz_dependency(codebase_dir, edit["name"])
+            applied_edits.append(edit)
+        else:
+            applied_edits.append(edit)
+
+    code_snippet = apply_code_edits(code_snippet, applied_edits, crate_name)
+    write_fuzz_target(code_snippet, codebase_dir, target_name)
+    return code_snippet, applied_edits
+
+
+def apply_known_fixes(codebase_dir, target_name, code_snippet, error):
+    crate_name = fuzzomatic.tools.utils.detect_crate_name(codebase_dir)
+    signatures = error_signatures(error, crate_name)
+    edits = find_known_edits(signatures)
+    if len(edits) == 0:
+        return False, code_snippet
+
+    print(f"Applying {len(edits)} known fixes for: {signatures}")
+    manifest = read_fuzz_manifest(codebase_dir)
+    _, edits = apply_fix_edits(
+        codebase_dir, target_name, code_snippet, edits, crate_name
+    )
+    build_success, _, built_code = build_target(codebase_dir, target_name)
+    if build_success:
+        learn_fix(signatures, edits)
+        return True, built_code
+
+    print("Known fixes did not work. Resuming...")
+    record_fix_failure(signatures, edits)
+    # do not leave the dependencies of the known fixes behind
+    restore_fuzz_manifest(manifest)
+    write_fuzz_target(code_snippet, codebase_dir, target_name)
+    return False, code_snippet
@@ -2,7 +2,7 @@ import glob
 import os
 
 from fuzzomatic.tools import prompts
-from fuzzomatic.approaches.common import llm_attempt
+from fuzzomatic.approaches.common import attempt_prompt_jobs, prompt_job
 from fuzzomatic.tools.constants import DEFAULT_TARGET_NAME
 
 
@@ -12,6 +12,11 @@ def try_examples_approach(
     examples_dirname="examples",
     **_kwargs,
 ):
+    jobs = example_prompt_jobs(codebase_dir, examples_dirname=examples_dirname)
+    yield from attempt_prompt_jobs(codebase_dir, target_name, jobs)
+
+
+def example_prompt_jobs(codebase_dir, examples_dirname="examples", **_kwargs):
     example_paths = detect_example_paths(codebase_dir, examples_dirname)
 
     if example_paths is None:
@@ -36,11 +41,7 @@ def try_examples_approach(
 
     for example_code in example_snippets:
         prompt = prompts.example_prompt(example_code)
-        success, fuzz_target_path = llm_attempt(
-            codebase_dir, prompt, target_name, remaining_attempts=1
-        )
-        if success:
-            yield fuzz_target_path
+        yield prompt_job(prompt, remaining_attempts=1)
 
 
 def detect_example_paths(codebase_dir, examples_dirname):
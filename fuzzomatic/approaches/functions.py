@@ -1,12 +1,45 @@
-from jinja2 import Template
-
 import fuzzomatic.tools.utils
 from fuzzomatic.tools import prompts
 from fuzzomatic.approaches.common import llm_attempt_fix_error
-from fuzzomatic.tools.cargo_doc import parse_cargo_doc_json, generate_cargo_doc_json
-from fuzzomatic.tools.constants import DEFAULT_TARGET_NAME
+from fuzzomatic.tools.cargo_doc import (
+    parse_cargo_doc_json,
+    generate_cargo_doc_json,
+    generate_workspace_cargo_doc_json,
+    cargo_doc_cache_key,
+    load_cached_cargo_doc,
+    save_cached_cargo_doc,
+)
+from fuzzomatic.tools.constants import DEFAULT_TARGET_NAME, DEFAULT_LIBFUZZER_OPTIONS
+from fuzzomatic.tools.function_model import (
+    arg_type_token,
+    context_features,
+    function_features,
+    load_function_model,
+    logit,
+    record_function_attempt,
+)
+from fuzzomatic.tools.signatures import FunctionTable
 from fuzzomatic.tools.utils import write_fuzz_target, build_target
 
+PRIMITIVE_TYPE_SIZES = {
+    "bool": 1,
+    "u8": 1,
+    "i8": 1,
+    "u16": 2,
+    "i16": 2,
+    "u32": 4,
+    "i32": 4,
+    "f32": 4,
+    "char": 4,
+    "u64": 8,
+    "i64": 8,
+    "f64": 8,
+    "usize": 8,
+    "isize": 8,
+    "u128": 16,
+    "i128": 16,
+}
+
 
 def try_functions_approach(
     codebase_dir,
@@ -15,130 +48,101 @@ def try_functions_approach(
     args=None,
     **_kwargs,
 ):
-    functions = find_target_functions_via_cargo_doc(
+    ordered_functions = find_target_functions_via_cargo_doc(
         codebase_dir, root_codebase_dir=root_codebase_dir
     )
 
-    if functions is None:
-        print("Failed to detect functions")
-        return
-
-    ordered_functions = score_functions(functions)
-
     print(f"{len(ordered_functions)} functions detected")
     print("Detected target functions:")
     for f in ordered_functions:
         print(f)
 
+    # skip functions matching deny list
+    if args is not None and args.functions_denylist is not None:
+        table = FunctionTable(ordered_functions)
+        denylisted = table.denylisted(args.functions_denylist)
+        print(
+            f"Skipping {len(denylisted)} functions "
+            f"because of deny list: {args.functions_denylist}"
+        )
+        ordered_functions = [
+            f for i, f in enumerate(ordered_functions) if i not in denylisted
+        ]
+
+    model = None
+    if args is not None and args.function_scoring == "learned":
+        model = load_function_model()
+        if model is None:
+            print("No learned function model available, using heuristic scoring")
+        else:
+            print(f"Using learned function scoring ({model['samples']} samples)")
+    static_logits = None
+    if model is not None:
+        static_logits = [logit(model, function_features(*f)) for f in ordered_functions]
+
     max_functions = 8  # try max N functions
     max_negative_score_functions = 2
     negative_score_functions = 0
-    for f in ordered_functions[:max_functions]:
-        path = f[0]
-        function_name = f[1]
+    remaining = list(range(len(ordered_functions)))
+    prev_built = None
+    for _ in range(max_functions):
+        if len(remaining) == 0:
+            break
+        i = pick_next_function(
+            model, ordered_functions, remaining, static_logits, prev_built
+        )
+        remaining.remove(i)
+        f = ordered_functions[i]
         score = f[3]
 
-        # skip functions matching deny list
-        if args is not None and args.functions_denylist is not None:
-            skip_function = False
-            fully_qualified_function_name = "::".join(path)
-            if len(fully_qualified_function_name) > 0:
-                fully_qualified_function_name += "::"
-            fully_qualified_function_name += function_name
-            for word in args.functions_denylist:
-                if word in fully_qualified_function_name:
-                    skip_function = True
-            if skip_function:
-                print(
-                    f"Skipping function {fully_qualified_function_name} "
-                    f"because of deny list: {args.functions_denylist}"
-                )
-                continue
-
         print("Attempting function:")
         print(f)
 
         if score <= 0:
             negative_score_functions += 1
 
-        success, fuzz_target_path = try_function(f, codebase_dir, target_name)
+        success, fuzz_target_path, libfuzzer_options = try_function(
+            f, codebase_dir, target_name
+        )
+
+        fuzz_target_code = None
+        if success:
+            with open(fuzz_target_path) as fin:
+                fuzz_target_code = fin.read()
+        attempt_features = function_features(*f) + context_features(f[2], prev_built)
+        record_function_attempt(attempt_features, success, fuzz_target_code)
+        prev_built = success
 
         if success:
-            yield fuzz_target_path
+            yield fuzz_target_path, libfuzzer_options
 
         if negative_score_functions >= max_negative_score_functions:
             break
 
 
-def score_functions(functions):
-    interesting_function_names = ["parse", "load", "read", "str", "eval"]
-    # order functions by most interesting first
-    ordered_functions = []
-    for f in functions:
-        function_name = f[1]
-        args = f[2]
-        priority = 0
-
-        is_name_interesting = False
-        for pattern in interesting_function_names:
-            if pattern in function_name:
-                is_name_interesting = True
-
-        if len(args) == 1:
-            arg_type = args[0]
-
-            if arg_type == "&str":
-                priority = 100
-            elif arg_type == "&[u8]":
-                priority = 100
-            elif arg_type == "String":
-                priority = 100
-            elif arg_type == "bool":
-                priority = 0
-            elif arg_type == "unknown":
-                priority = 10
-            elif type(arg_type) == tuple and arg_type[0] == "&array":
-                priority = 100
-            elif is_name_interesting:
-                priority = 100
-
-                if args[0] == "self":
-                    priority = -15
-            elif args[0] == "self":
-                # functions with "self" as first argument
-                priority = -50
-            else:
-                priority = 50
-        elif len(args) > 1:
-            known_types = 0
-            for arg in args:
-                if arg != "unknown":
-                    known_types += 1
-            if known_types == len(args):
-                priority = 30
-                if "&str" in args or "&[u8]" in args or "String" in args:
-                    priority = 75
-                if any(type(arg) == tuple and arg[0] == "&array" for arg in args):
-                    priority = 75
-            else:
-                # functions with multiple arguments where not all types are known
-                priority = -10
+def pick_next_function(model, functions, remaining, static_logits, prev_built):
+    if model is None:
+        # heuristic order
+        return remaining[0]
 
-            if args[0] == "self":
-                # functions with "self" as first argument
-                priority = -50
-        else:
-            # skip functions with no arguments
-            priority = -100
+    # the context only depends on the first argument type of each function
+    context_logits = {}
 
-        # give low priority to functions that are likely to load something by filename
-        if "file" in function_name and arg_type == "&str":
-            priority = 0
+    def function_logit(i):
+        args = functions[i][2]
+        key = arg_type_token(args[0]) if len(args) > 0 else None
+        if key not in context_logits:
+            context = context_features(args, prev_built)
+            context_logits[key] = logit(model, context) - model["bias"]
+        return static_logits[i] + context_logits[key]
 
-        augmented_function = [*f, priority]
-        ordered_functions.append(augmented_function)
-    ordered_functions = sorted(ordered_functions, key=lambda x: x[3], reverse=True)
-    return ordered_functions
+    return max(remaining, key=function_logit)
+
+
+def score_functions(functions):
+    # order functions by most interesting first
+    table = FunctionTable(functions)
+    return table.rows(table.ranking())
 
 
 def try_function(f, codebase_dir, target_name):
@@ -202,13 +206,65 @@ def try_function(f, codebase_dir, target_name):
             args=literal_args, struct_lifetime_needed=struct_lifetime_needed
         )
 
-    success, fuzz_target_path = try_with_template(
+    success, fuzz_target_path, fixed = try_with_template(
         template_path, codebase_dir, target_name, f, crate_name, extra_args
     )
     if success:
-        return True, fuzz_target_path
+        libfuzzer_options = None
+        if not fixed:
+            # the harness is exactly the template, so we know which inputs it uses
+            libfuzzer_options = derive_libfuzzer_options(template_path, function_args)
+        return True, fuzz_target_path, libfuzzer_options
+
+    return False, None, None
 
-    return False, None
+
+def primitive_type_size(primitive_type):
+    return PRIMITIVE_TYPE_SIZES.get(primitive_type)
+
+
+def array_length(arg):
+    # rustdoc gives the length as a string, it may also be a const generic name
+    try:
+        return int(arg[2])
+    except ValueError:
+        return None
+
+
+def arbitrary_arg_size(arg):
+    # number of input bytes consumed by Arbitrary for a fixed size argument
+    if isinstance(arg, tuple) and arg[0] == "&array":
+        primitive_size = primitive_type_size(arg[1])
+        length = array_length(arg)
+        if primitive_size is None or length is None:
+            return None
+        return primitive_size * length
+    return primitive_type_size(arg)
+
+
+def derive_libfuzzer_options(template_path, function_args):
+    options = dict(DEFAULT_LIBFUZZER_OPTIONS)
+
+    # maximum input length actually read by the harness, if it is bounded
+    max_len = None
+    if template_path.endswith("fuzz_target_bool.j2"):
+        max_len = 1
+    elif template_path.endswith("fuzz_target_primitive.j2"):
+        # the primitive template requires more than 8 bytes and reads 8 of them
+        max_len = 9
+    elif template_path.endswith("fuzz_target_byte_array_length.j2"):
+        max_len = array_length(function_args[0])
+    elif template_path.endswith("multiple_args/base.j2"):
+        sizes = [arbitrary_arg_size(arg) for arg in function_args]
+        if all(size is not None for size in sizes):
+            max_len = sum(sizes)
+
+    if max_len is not None:
+        options["max_len"] = max_len
+        # do not slowly grow input lengths, they are tiny anyway
+        options["len_control"] = 0
+
+    return options
 
 
 def try_with_template(
@@ -234,8 +290,8 @@ def try_with_template(
     print(f"{import_path=}")
     print(f"{usage_path=}")
 
-    t = Template(prompts.load_file_contents(template_path))
-    fuzz_target_code = t.render(
+    fuzz_target_code = prompts.render_template(
+        template_path,
         crate_name=crate_name,
         function_name=function_name,
         import_path=import_path,
@@ -252,7 +308,7 @@ def try_with_template(
     print("-" * 10)
 
     if success:
-        return True, fuzz_target_path
+        return True, fuzz_target_path, False
     else:
         print("Failed to build target")
         print("Error:")
@@ -264,18 +320,64 @@ def try_with_template(
         )
 
         if fix_success:
-            return True, fuzz_target_path
+            return True, fuzz_target_path, True
 
-    return False, None
+    return False, None, False
 
 
-def find_target_functions_via_cargo_doc(codebase_dir, root_codebase_dir=None):
+def find_target_functions_via_cargo_doc(
+    codebase_dir, root_codebase_dir=None, use_cache=True
+):
+    # returns the scored functions, most interesting first
+    cache_key = None
+    if use_cache:
+        cache_key = cargo_doc_cache_key(
+            codebase_dir, root_codebase_dir=root_codebase_dir
+        )
+    if cache_key is not None:
+        cached = load_cached_cargo_doc(cache_key)
+        if cached is not None:
+            print(f"Using cached cargo doc functions: {cache_key}")
+            _, ordered_functions = cached
+            return ordered_functions
+
     json_path = generate_cargo_doc_json(
         codebase_dir, root_codebase_dir=root_codebase_dir
     )
-    if json_path is not None:
-        print(f"Using cargo doc file: {json_path}")
-        functions = parse_cargo_doc_json(json_path)
-        return functions
-    else:
+    if json_path is None:
         return []
+
+    print(f"Using cargo doc file: {json_path}")
+    functions = parse_cargo_doc_json(json_path)
+    ordered_functions = score_functions(functions)
+    if cache_key is not None:
+        save_cached_cargo_doc(cache_key, json_path, ordered_functions)
+    return ordered_functions
+
+
+def prefetch_workspace_functions(root_codebase_dir, member_dirs):
+    # generate the functions of all the workspace members up front,
+    # the functions approach then reads them from the cache
+    missing_member_dirs = []
+    for member_dir in member_dirs:
+        cache_key = cargo_doc_cache_key(member_dir, root_codebase_dir=root_codebase_dir)
+        if cache_key is None:
+            # cannot cache without a toolchain, members will be documented one by one
+            return
+        if load_cached_cargo_doc(cache_key) is None:
+            missing_member_dirs.append(member_dir)
+
+    if len(missing_member_dirs) == 0:
+        return
+
+    print(f"Generating cargo doc json for {len(missing_member_dirs)} members...")
+    json_paths = generate_workspace_cargo_doc_json(
+        root_codebase_dir, missing_member_dirs
+    )
+    for member_dir, json_path in json_paths.items():
+        functions = parse_cargo_doc_json(json_path)
+        ordered_functions = score_functions(functions)
+        # cargo may have created the Cargo.lock file, recompute the key
+        cache_key = cargo_doc_cache_key(member_dir, root_codebase_dir=root_codebase_dir)
+        save_cached_cargo_doc(cache_key, json_path, ordered_functions)
+        print(f"{len(ordered_functions)} functions detected in: {member_dir}")
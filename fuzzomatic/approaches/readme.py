@@ -1,13 +1,17 @@
-import os
-
 from fuzzomatic.tools import prompts
-from fuzzomatic.approaches.common import llm_attempt
-from fuzzomatic.tools.constants import DEFAULT_TARGET_NAME, PARENT_README_ENABLED
+from fuzzomatic.approaches.common import attempt_prompt_jobs, prompt_job
+from fuzzomatic.tools.codebase_index import find_readme_paths
+from fuzzomatic.tools.constants import DEFAULT_TARGET_NAME
 
 
 def try_readme_approach(
     codebase_dir, target_name=DEFAULT_TARGET_NAME, virtual_manifest=False, **_kwargs
 ):
+    jobs = readme_prompt_jobs(codebase_dir, virtual_manifest=virtual_manifest)
+    yield from attempt_prompt_jobs(codebase_dir, target_name, jobs)
+
+
+def readme_prompt_jobs(codebase_dir, virtual_manifest=False, **_kwargs):
     readme_paths = detect_readme_paths(codebase_dir, parent_readme=virtual_manifest)
     if len(readme_paths) == 0:
         print("Failed to detect README")
@@ -25,34 +29,9 @@ def try_readme_approach(
             )
             continue
 
-        prompt = prompts.readme_prompt(readme_contents)
-
-        build_success, fuzz_target_path = llm_attempt(codebase_dir, prompt, target_name)
-
-        if build_success:
-            yield fuzz_target_path
+        yield prompt_job(prompts.readme_prompt(readme_contents))
 
 
 def detect_readme_paths(codebase_dir, parent_readme=False):
     # search for README files in there
-    paths = [
-        "README.md",
-        "README",
-        "README.txt",
-        "readme.txt",
-        "README.MD",
-        "BUILDING",
-        "USAGE",
-    ]
-
-    # if a parent virtual manifest was detected, also try to use the parent README file
-    if parent_readme and PARENT_README_ENABLED:
-        paths.append("../README.md")
-
-    readmes = []
-    for path in paths:
-        full_path = os.path.join(codebase_dir, path)
-        if os.path.exists(full_path):
-            readmes.append(full_path)
-
-    return readmes
+    return find_readme_paths(codebase_dir, parent_readme=parent_readme)
@@ -1,5 +1,5 @@
 from fuzzomatic.tools import prompts
-from fuzzomatic.approaches.common import llm_attempt
+from fuzzomatic.approaches.common import attempt_prompt_jobs, prompt_job
 from fuzzomatic.tools.constants import DEFAULT_TARGET_NAME
 from fuzzomatic.tools.utils import detect_crate_name
 from fuzzomatic.tools.semgrep import (
@@ -12,6 +12,11 @@ from fuzzomatic.tools.semgrep import (
 def try_unit_tests_with_function_approach(
     codebase_dir, target_name=DEFAULT_TARGET_NAME, **_kwargs
 ):
+    jobs = unit_test_with_function_prompt_jobs(codebase_dir)
+    yield from attempt_prompt_jobs(codebase_dir, target_name, jobs)
+
+
+def unit_test_with_function_prompt_jobs(codebase_dir, **_kwargs):
     # try unit tests with associated function
     max_unit_tests = 3
 
@@ -51,18 +56,17 @@ def try_unit_tests_with_function_approach(
         prompt = prompts.unit_test_prompt_with_additional_function(
             test_function_source_code, additional_function_name, use_statements
         )
-        success, fuzz_target_path = llm_attempt(
-            codebase_dir,
-            prompt,
-            target_name,
-            remaining_attempts=0,
-            additional_code=additional_function_code,
+        yield prompt_job(
+            prompt, remaining_attempts=0, additional_code=additional_function_code
         )
-        if success:
-            yield fuzz_target_path
 
 
 def try_unit_tests_approach(codebase_dir, target_name=DEFAULT_TARGET_NAME, **_kwargs):
+    jobs = unit_test_prompt_jobs(codebase_dir)
+    yield from attempt_prompt_jobs(codebase_dir, target_name, jobs)
+
+
+def unit_test_prompt_jobs(codebase_dir, **_kwargs):
     max_unit_tests = 3
     unit_tests = detect_unit_tests(codebase_dir, max_tests=max_unit_tests)
 
@@ -82,11 +86,7 @@ def try_unit_tests_approach(codebase_dir, target_name=DEFAULT_TARGET_NAME, **_kw
         print("---")
 
         prompt = prompts.unit_test_prompt(test_source_code, use_statements)
-        success, fuzz_target_path = llm_attempt(
-            codebase_dir, prompt, target_name, remaining_attempts=0
-        )
-        if success:
-            yield fuzz_target_path
+        yield prompt_job(prompt, remaining_attempts=0)
 
 
 def detect_use_statements(source_file_path, codebase_dir):
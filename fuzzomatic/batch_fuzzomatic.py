@@ -1,13 +1,45 @@
 #!/usr/bin/env python3
 
 import argparse
+import collections
+import concurrent.futures
 import datetime
 import glob
+import itertools
 import os
 import sys
 
+from fuzzomatic import discovery
+from fuzzomatic.approaches.functions import (
+    find_target_functions_via_cargo_doc,
+    prefetch_workspace_functions,
+)
 from fuzzomatic.main import get_parser as fuzzomatic_parser, add_parser_shared_arguments
 from fuzzomatic.main import main as fuzzomatic_main
+from fuzzomatic.main import (
+    find_unfuzzed_members,
+    get_approaches,
+    is_project_building_by_default,
+    read_allowed_workspace_members,
+    read_codebase_results,
+    save_results,
+)
+from fuzzomatic.tools.budget import Budget, use_budget
+from fuzzomatic.tools.commands import configure_command_timeouts, record_commands
+from fuzzomatic.tools.constants import DEFAULT_PREFETCH_CODEBASES
+from fuzzomatic.tools.scheduling import (
+    codebase_features,
+    codebase_outcome,
+    expected_yield_rate,
+    load_scheduling_model,
+    record_codebase_outcome,
+    schedule_codebases,
+)
+from fuzzomatic.tools.utils import (
+    cargo_fetch,
+    check_has_workspace_members,
+    detect_git_url,
+)
 
 
 def get_parser():
@@ -16,6 +48,40 @@ def get_parser():
         usage="Run fuzzomatic on all codebases in the specified directory.",
     )
     parser.add_argument("targets_dir", help="Directory containing codebases to target")
+    parser.add_argument(
+        "--prefetch",
+        dest="prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH_CODEBASES,
+        help="Number of upcoming code bases to prepare in the background "
+        "(dependency fetch, cargo check and cargo doc). 0 disables prefetching.",
+    )
+    parser.add_argument(
+        "--schedule",
+        dest="schedule",
+        choices=["predicted", "filesystem"],
+        default="predicted",
+        help="Order of the code bases. `predicted` runs the code bases with the "
+        "highest expected useful fuzz targets per second first, "
+        "learned from previous batches when enough were recorded.",
+    )
+    parser.add_argument(
+        "--batch-time-budget",
+        dest="batch_time_budget",
+        type=int,
+        default=0,
+        help="Maximum number of seconds to spend on the whole batch. "
+        "The remaining code bases are not processed once it ran out. "
+        "0 means no limit.",
+    )
+    parser.add_argument(
+        "--batch-token-budget",
+        dest="batch_token_budget",
+        type=int,
+        default=0,
+        help="Maximum number of LLM tokens to spend on the whole batch. "
+        "0 means no limit.",
+    )
     parser = add_parser_shared_arguments(parser)
 
     return parser
@@ -26,16 +92,139 @@ def get_targets(targets_dir):
     return dirs
 
 
-def run_fuzzomatic(codebase_dir, fz_batch_args):
+def get_fuzzomatic_args(codebase_dir, fz_batch_args):
     fparser = fuzzomatic_parser()
     args = fparser.parse_args(["foobar"])
     args.codebase_dir = codebase_dir
 
     # pass arguments from fz-batch down to fz
-    skip_args = ["targets_dir"]
+    skip_args = [
+        "targets_dir",
+        "prefetch",
+        "schedule",
+        "batch_time_budget",
+        "batch_token_budget",
+    ]
     for arg_name, arg_value in vars(fz_batch_args).items():
         if arg_name not in skip_args:
             setattr(args, arg_name, arg_value)
+    return args
+
+
+def prepare_codebase(codebase_dir, args):
+    # returns whether fuzzomatic should run on the code base,
+    # and the outcome reason to save if it should not
+    if read_codebase_results(codebase_dir) is not None:
+        return False, None
+
+    git_url = detect_git_url(codebase_dir)
+    if not args.force and discovery.is_project_to_be_skipped(codebase_dir, git_url):
+        return False, "project_already_fuzzed"
+
+    if not os.path.exists(os.path.join(codebase_dir, "Cargo.toml")):
+        return False, "not_a_cargo_project"
+
+    print(f"Prefetching: {codebase_dir}")
+    cargo_fetch(codebase_dir)
+
+    is_workspace = check_has_workspace_members(codebase_dir)
+    if not is_workspace:
+        if not is_project_building_by_default(codebase_dir, quiet=True):
+            return False, "project_does_not_build"
+
+    # the rustdoc json is cached for the functions approach
+    approaches = [name for name, _ in get_approaches(args.approaches)]
+    if "functions" in approaches:
+        if is_workspace:
+            members = read_allowed_workspace_members(args, codebase_dir)
+            prefetch_workspace_functions(codebase_dir, find_unfuzzed_members(members))
+        else:
+            find_target_functions_via_cargo_doc(codebase_dir)
+
+    print(f"Prefetched: {codebase_dir}")
+    return True, None
+
+
+def timed_prepare_codebase(codebase_dir, args):
+    start_time = datetime.datetime.utcnow()
+    # not counted in the results of the code base being processed meanwhile
+    command_stats = {}
+    try:
+        with record_commands(command_stats):
+            ready, outcome_reason = prepare_codebase(codebase_dir, args)
+    except Exception as e:
+        # fuzzomatic will run the setup steps itself
+        print(f"Failed to prefetch {codebase_dir}: {e}")
+        ready, outcome_reason = True, None
+    end_time = datetime.datetime.utcnow()
+    return ready, outcome_reason, start_time, end_time, command_stats
+
+
+def prefetch_codebases(targets, args, depth=DEFAULT_PREFETCH_CODEBASES):
+    # yields the code bases in order, with the result of their preparation,
+    # while the next `depth` code bases are prepared in the background
+    if depth <= 0:
+        for t in targets:
+            yield t, (True, None, None, None, None)
+        return
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=depth)
+    remaining = iter(targets)
+    pending = collections.deque()
+    try:
+        for t in itertools.islice(remaining, depth + 1):
+            pending.append((t, executor.submit(timed_prepare_codebase, t, args)))
+        while len(pending) > 0:
+            t, future = pending.popleft()
+            preparation = future.result()
+            for next_t in itertools.islice(remaining, 1):
+                future = executor.submit(timed_prepare_codebase, next_t, args)
+                pending.append((next_t, future))
+            yield t, preparation
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def save_skipped_codebase(args, outcome_reason, start_time, end_time, command_stats):
+    git_url = detect_git_url(args.codebase_dir)
+    duration = end_time - start_time
+    save_results(
+        args,
+        git_url,
+        [],
+        start_time,
+        end_time,
+        duration,
+        outcome_reason,
+        command_stats=command_stats,
+    )
+
+
+def order_targets(targets, features, schedule):
+    if schedule == "filesystem":
+        return targets
+
+    model = load_scheduling_model()
+    if model is None:
+        print("Scheduling code bases with the static heuristic")
+    else:
+        print(f"Scheduling code bases with a model of {model['samples']} code bases")
+    ordered = schedule_codebases(targets, features, model=model)
+    for t in ordered:
+        rate = expected_yield_rate(features[t], model=model)
+        print(f"{rate * 3600:.2f} useful/h expected: {t}")
+    return ordered
+
+
+def record_outcome(codebase_dir, features):
+    # outcomes of previous batches improve the predicted schedule
+    results = read_codebase_results(codebase_dir)
+    if results is not None:
+        record_codebase_outcome(codebase_outcome(features, results))
+
+
+def run_fuzzomatic(codebase_dir, fz_batch_args):
+    args = get_fuzzomatic_args(codebase_dir, fz_batch_args)
 
     print()
     print("*" * 80)
@@ -57,14 +246,45 @@ def main():
         sys.exit(-1)
 
     very_start = datetime.datetime.utcnow()
+    # the prefetch runs commands before fuzzomatic does
+    configure_command_timeouts(args.command_timeouts)
     targets = get_targets(targets_dir)
     total_targets = len(targets)
+    features = {t: codebase_features(t) for t in targets}
+    targets = order_targets(targets, features, args.schedule)
+
+    budget = Budget(
+        "batch", max_seconds=args.batch_time_budget, max_tokens=args.batch_token_budget
+    )
 
     # initial run
     print("Starting initial run loop")
-    for i, t in enumerate(targets):
+    prefetched = prefetch_codebases(targets, args, depth=args.prefetch)
+    for i, (t, preparation) in enumerate(prefetched):
+        if budget.exhausted() is not None:
+            print(f"Batch {budget.exhausted()} budget exhausted. Stopping.")
+            print(f"Remaining targets: {total_targets - i}")
+            break
+
+        ready, outcome_reason, start_time, end_time, command_stats = preparation
+        if not ready:
+            # dropped before it takes the main worker
+            print(f"Skipping target {i + 1}/{total_targets}: {t}")
+            if outcome_reason is not None:
+                print(f"{outcome_reason=}")
+                fz_args = get_fuzzomatic_args(t, args)
+                save_skipped_codebase(
+                    fz_args, outcome_reason, start_time, end_time, command_stats
+                )
+                record_outcome(t, features[t])
+            continue
+
         print(f"Running fuzzomatic on target {i + 1}/{total_targets}: {t}")
-        run_fuzzomatic(t, args)
+        already_processed = read_codebase_results(t) is not None
+        with use_budget(budget):
+            run_fuzzomatic(t, args)
+        if not already_processed:
+            record_outcome(t, features[t])
 
     very_end = datetime.datetime.utcnow()
     total_duration = very_end - very_start
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 
-from fuzzomatic.approaches.functions import score_functions
+from fuzzomatic.approaches.functions import (
+    score_functions,
+    find_target_functions_via_cargo_doc,
+)
 from fuzzomatic.tools.cargo_doc import parse_cargo_doc_json
 
 
@@ -14,7 +18,14 @@ def get_parser():
     )
     parser.add_argument(
         "json_path",
-        help="Path to cargo doc json file",
+        help="Path to cargo doc json file or to a codebase. "
+        "For a codebase, the cached functions are used when available",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Regenerate the cargo doc json of a codebase even if it is cached",
     )
     return parser
 
@@ -22,8 +33,13 @@ def get_parser():
 def main():
     parser = get_parser()
     args = parser.parse_args()
-    functions = parse_cargo_doc_json(args.json_path)
-    ordered_functions = score_functions(functions)
+    if os.path.isdir(args.json_path):
+        ordered_functions = find_target_functions_via_cargo_doc(
+            args.json_path, use_cache=not args.no_cache
+        )
+    else:
+        functions = parse_cargo_doc_json(args.json_path)
+        ordered_functions = score_functions(functions)
     for f in ordered_functions:
         print(f)
 
@@ -55,26 +55,29 @@ def get_parser():
     return parser
 
 
-def read_results(fuzz_projects_dir):
-    results = []
-
+def find_results_paths(fuzz_projects_dir):
     # check if it's a single codebase directory
     root_fuzzomatic_results_file = os.path.join(
         fuzz_projects_dir, FUZZOMATIC_RESULTS_FILENAME
     )
     if os.path.exists(root_fuzzomatic_results_file):
-        with open(root_fuzzomatic_results_file) as f:
-            jso = json.loads(f.read())
-            results.append(jso)
-            return results
+        return [root_fuzzomatic_results_file]
 
+    results_paths = []
     dirs = glob.glob(f"{fuzz_projects_dir}/*")
     for codebase_dir in dirs:
         results_file_path = os.path.join(codebase_dir, FUZZOMATIC_RESULTS_FILENAME)
         if os.path.exists(results_file_path):
-            with open(results_file_path) as f:
-                jso = json.loads(f.read())
-                results.append(jso)
+            results_paths.append(results_file_path)
+    return results_paths
+
+
+def read_results(fuzz_projects_dir):
+    results = []
+    for results_file_path in find_results_paths(fuzz_projects_dir):
+        with open(results_file_path) as f:
+            jso = json.loads(f.read())
+            results.append(jso)
     return results
 
 
@@ -158,6 +161,99 @@ def strip_libfuzzer_error(runtime_error):
     return stripped_error
 
 
+def print_fuzz_stats_table(targets_with_stats):
+    titles = [
+        "Project",
+        "Approach",
+        "Exec/s",
+        "Peak RSS (MB)",
+        "Corpus",
+        "Features",
+        "First new cov (s)",
+    ]
+    spacings = [30, 26, 10, 15, 10, 10, 18]
+    print_aligned(*titles, spacings=spacings)
+    separators = ["-" * max(3, sp - 3) for sp in spacings]
+    print_aligned(*separators, spacings=spacings)
+
+    # slow targets (e.g. allocating per input) are shown first
+    def exec_speed(row):
+        execs_per_second = row[2]["execs_per_second"]
+        return execs_per_second if execs_per_second is not None else 0
+
+    for name, approach, fuzz_stats in sorted(targets_with_stats, key=exec_speed):
+        print_aligned(
+            name,
+            approach,
+            fuzz_stats["execs_per_second"],
+            fuzz_stats["peak_rss_mb"],
+            fuzz_stats["corpus_units"],
+            fuzz_stats["features"],
+            fuzz_stats["time_to_first_new_coverage_seconds"],
+            spacings=spacings,
+        )
+
+
+def print_coverage_ranking(targets_with_coverage):
+    titles = ["Project", "Approach", "Lines %", "Lines", "Functions %", "Path"]
+    spacings = [30, 26, 10, 15, 13, 25]
+    print_aligned(*titles, spacings=spacings)
+    separators = ["-" * max(3, sp - 3) for sp in spacings]
+    print_aligned(*separators, spacings=spacings)
+
+    def line_coverage(row):
+        return row[3]["lines"]["percent"]
+
+    ranked = sorted(targets_with_coverage, key=line_coverage, reverse=True)
+    for name, approach, fuzz_target_path, coverage in ranked:
+        lines = coverage["lines"]
+        functions = coverage["functions"]
+        print_aligned(
+            name,
+            approach,
+            lines["percent"],
+            f"{lines['covered']}/{lines['count']}",
+            functions["percent"],
+            fuzz_target_path,
+            spacings=spacings,
+        )
+
+
+def print_fuzz_stats(fuzz_stats):
+    for key in [
+        "total_execs",
+        "execs_per_second",
+        "peak_rss_mb",
+        "coverage",
+        "features",
+        "corpus_units",
+        "corpus_size_bytes",
+        "time_to_first_new_coverage_seconds",
+    ]:
+        print(f"{key}={fuzz_stats[key]}")
+    growth_points = []
+    for elapsed, execs, ft in fuzz_stats["ft_growth"]:
+        if elapsed is not None:
+            growth_points.append(f"{ft}@{elapsed}s")
+        else:
+            growth_points.append(f"{ft}@#{execs}")
+    print(f"ft_growth={' '.join(growth_points)}")
+
+
+def print_crash(crash):
+    print(f"crash_signature={crash['signature']}")
+    print(f"crash_kind={crash['kind']}")
+    print(f"panic_location={crash['panic_location']}")
+    for frame in crash["frames"]:
+        print(f"  in {frame}")
+    if crash["duplicate_of"] is not None:
+        duplicate_of = crash["duplicate_of"]["fuzz_target_path"]
+        print(f"duplicate_of={duplicate_of}")
+    if crash["minimized_input_path"] is not None:
+        print(f"minimized_input_path={crash['minimized_input_path']}")
+        print(f"minimized_input (base64)={crash['minimized_input']}")
+
+
 def print_aligned(*cols, spacing=25, spacings=None):
     line = ""
     for i, col in enumerate(cols):
@@ -181,6 +277,57 @@ def min_max_stats(values):
         print("No values")
 
 
+def print_approach_yield(approach_prices, successful_approaches_useful):
+    titles = [
+        "Approach",
+        "Time",
+        "Tokens",
+        "LLM calls",
+        "Useful",
+        "Useful/h",
+        "/1k tokens",
+    ]
+    spacings = [26, 12, 10, 11, 8, 10, 10]
+    print_aligned(*titles, spacings=spacings)
+    print_aligned(*["---"] * len(titles), spacings=spacings)
+    for approach_name, prices in approach_prices.items():
+        seconds = prices["seconds"]
+        useful = successful_approaches_useful.count(approach_name)
+        useful_per_hour = "-"
+        if seconds > 0:
+            useful_per_hour = round(useful * 3600 / seconds, 2)
+        useful_per_tokens = "-"
+        if prices["total_tokens"] > 0:
+            useful_per_tokens = round(useful * 1000 / prices["total_tokens"], 3)
+        print_aligned(
+            approach_name,
+            str(datetime.timedelta(seconds=round(seconds))),
+            prices["total_tokens"],
+            prices["llm_calls"],
+            useful,
+            useful_per_hour,
+            useful_per_tokens,
+            spacings=spacings,
+        )
+
+
+def print_command_stats(command_stats):
+    titles = ["Kind", "Count", "Time", "Failures", "Timeouts"]
+    spacings = [14, 8, 12, 10, 10]
+    print_aligned(*titles, spacings=spacings)
+    print_aligned(*["---"] * len(titles), spacings=spacings)
+    by_time = sorted(command_stats.items(), key=lambda x: x[1]["seconds"], reverse=True)
+    for kind, stats in by_time:
+        print_aligned(
+            kind,
+            stats["count"],
+            str(datetime.timedelta(seconds=round(stats["seconds"]))),
+            stats["failures"],
+            stats["timeouts"],
+            spacings=spacings,
+        )
+
+
 def show_runtime_duration_stats(durations):
     print("Median runtime:", datetime.timedelta(seconds=statistics.median(durations)))
     print("Average runtime", datetime.timedelta(seconds=statistics.mean(durations)))
@@ -219,6 +366,9 @@ def main():
     useful_targets = []
     bug_found_targets = []
     no_approach_worked_targets = []
+    budget_exhausted_targets = []
+    command_stats = {}
+    timed_out_commands = []
 
     print("*" * 80)
     print("Projects covered:")
@@ -281,6 +431,9 @@ def main():
     has_useful = []
     bugs_found = []
     has_bug_found = []
+    crash_signatures = []
+    targets_with_stats = []
+    targets_with_coverage = []
     for r in results:
         name = r["name"]
         codebase_dir = r["codebase_dir"]
@@ -291,6 +444,19 @@ def main():
         if outcome_reason == "no_approach_worked":
             no_approach_worked_targets.append(codebase_dir)
 
+        for kind, stats in r.get("commands", {}).items():
+            totals = command_stats.setdefault(
+                kind, {"count": 0, "seconds": 0.0, "failures": 0, "timeouts": 0}
+            )
+            for key in totals:
+                totals[key] += stats[key]
+            for cmd in stats["timed_out_commands"]:
+                timed_out_commands.append((codebase_dir, cmd))
+
+        budget_exhausted = r.get("budget_exhausted")
+        if budget_exhausted is not None:
+            budget_exhausted_targets.append((codebase_dir, budget_exhausted))
+
         # successful approaches
         if outcome_reason == "success":
             successes += 1
@@ -302,6 +468,21 @@ def main():
             success_durations.append(duration_seconds)
         projects_with_durations.append((name, duration_seconds))
 
+        # time and LLM usage per approach
+        for approach_name, stats in r.get("approach_stats", {}).items():
+            prices = approach_prices.setdefault(
+                approach_name,
+                {
+                    "seconds": 0.0,
+                    "total_tokens": 0,
+                    "in_tokens": 0,
+                    "out_tokens": 0,
+                    "llm_calls": 0,
+                },
+            )
+            for key in prices:
+                prices[key] += stats.get(key, 0)
+
         # fuzz targets
         generated_fuzz_targets = r["generated_fuzz_targets"]
         contains_building = False
@@ -325,6 +506,16 @@ def main():
             approach = ft["successful_approach"]
             successful_approaches_building.append(approach)
 
+            fuzz_stats = ft.get("fuzz_stats")
+            if fuzz_stats is not None:
+                targets_with_stats.append((name, approach, fuzz_stats))
+
+            coverage = ft.get("coverage")
+            if coverage is not None:
+                targets_with_coverage.append(
+                    (name, approach, ft["fuzz_target_path"], coverage)
+                )
+
             if useful:
                 useful_targets.append(codebase_dir)
                 successful_approaches_useful.append(approach)
@@ -336,6 +527,14 @@ def main():
                 bugs_found.append(name)
                 successful_approaches_bug_found.append(approach)
 
+                crash = ft.get("crash")
+                if crash is not None:
+                    crash_signatures.append((crash, codebase_dir))
+
+        # crashes found later on by fz-soak
+        for soak_crash in r.get("soak_crashes", []):
+            crash_signatures.append((soak_crash["crash"], codebase_dir))
+
         has_building.append(contains_building)
         has_useful.append(contains_useful)
         has_bug_found.append(contains_bug_found)
@@ -377,6 +576,10 @@ def main():
     print()
     histogram(successful_approaches_bug_found, col1="Bug found approach")
 
+    if len(approach_prices) > 0:
+        print()
+        print_approach_yield(approach_prices, successful_approaches_useful)
+
     print()
     print("Runtime durations (all)")
     show_runtime_duration_stats(durations)
@@ -438,11 +641,44 @@ def main():
     for (codebase_dir, git_url), count in bug_counter.items():
         print(f"{git_url} ({count})")
 
+    print()
+    print("Fuzz target performance (slowest first):")
+    print_fuzz_stats_table(targets_with_stats)
+
+    print()
+    print("Coverage ranking (most library lines covered first):")
+    print_coverage_ranking(targets_with_coverage)
+
+    print()
+    print("Unique crashes:")
+    unique_crashes = {}
+    for crash, codebase_dir in crash_signatures:
+        signature = crash["signature"]
+        if signature not in unique_crashes:
+            unique_crashes[signature] = (crash, [])
+        unique_crashes[signature][1].append(codebase_dir)
+    print(f"{len(unique_crashes)} unique crashes out of {len(crash_signatures)} bugs")
+    for signature, (crash, codebase_dirs) in unique_crashes.items():
+        location = crash["panic_location"]
+        print(f"{signature} {crash['kind']} at {location} ({len(codebase_dirs)})")
+
     print()
     print("Targets where no approach worked:")
     for t in no_approach_worked_targets:
         print(t)
 
+    if len(command_stats) > 0:
+        print()
+        print("External commands:")
+        print_command_stats(command_stats)
+        for codebase_dir, cmd in timed_out_commands:
+            print(f"Timed out in {codebase_dir}: {cmd}")
+
+    print()
+    print("Targets where a budget ran out:")
+    for t, budget_exhausted in budget_exhausted_targets:
+        print(f"{t} ({budget_exhausted['budget']} {budget_exhausted['resource']})")
+
     if args.verbose:
         print()
         print()
@@ -518,6 +754,12 @@ def main():
                     print(f"{successful_approach=}")
                     print(f"{useful=}")
                     print(f"{bug_found=}")
+                    fuzz_stats = ft.get("fuzz_stats")
+                    if fuzz_stats is not None:
+                        print_fuzz_stats(fuzz_stats)
+                    coverage = ft.get("coverage")
+                    if coverage is not None:
+                        print(f"{coverage=}")
                     print("----")
                     print(fuzz_target_code)
                     print("----")
@@ -526,6 +768,10 @@ def main():
                         stripped_runtime_error = strip_libfuzzer_error(runtime_error)
                         print(stripped_runtime_error)
                         print("----")
+                        crash = ft.get("crash")
+                        if crash is not None:
+                            print_crash(crash)
+                            print("----")
 
                     print()
 
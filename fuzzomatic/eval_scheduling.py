@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import argparse
+import datetime
+import json
+import os
+import sys
+
+from fuzzomatic.eval_results import find_results_paths, print_aligned
+from fuzzomatic.tools.scheduling import (
+    codebase_features,
+    codebase_outcome,
+    cross_validated_rates,
+    expected_yield_rate,
+    normalized_yield_area,
+    simulate_schedule,
+    time_to_fraction,
+    useful_within,
+)
+
+
+def get_parser():
+    prog_name = "fz-eval-schedule"
+    parser = argparse.ArgumentParser(
+        prog=prog_name,
+        description="Replay recorded fz-batch runs with different "
+        "code base scheduling policies",
+    )
+    parser.add_argument(
+        "batch_dirs",
+        nargs="+",
+        help="Directories that were used with fz-batch",
+    )
+    parser.add_argument(
+        "--folds",
+        dest="folds",
+        type=int,
+        default=5,
+        help="Number of cross-validation folds for the learned policy",
+    )
+    parser.add_argument(
+        "--budget-hours",
+        dest="budget_hours",
+        type=float,
+        default=0,
+        help="Count the useful fuzz targets found within this time. "
+        "Defaults to half of the recorded time.",
+    )
+    return parser
+
+
+def load_recorded_outcomes(batch_dirs):
+    # in the order fz-batch used to process them
+    outcomes = []
+    for batch_dir in batch_dirs:
+        for results_path in find_results_paths(batch_dir):
+            with open(results_path) as f:
+                results = json.loads(f.read())
+            codebase_dir = os.path.dirname(os.path.realpath(results_path))
+            features = codebase_features(codebase_dir)
+            outcomes.append(codebase_outcome(features, results))
+    return outcomes
+
+
+def policy_orders(outcomes, folds):
+    heuristic_rates = [expected_yield_rate(o["features"]) for o in outcomes]
+    learned_rates = cross_validated_rates(outcomes, folds=folds)
+    actual_rates = [o["useful"] / max(o["duration_seconds"], 1) for o in outcomes]
+
+    def by_rate(rates):
+        order = sorted(range(len(outcomes)), key=lambda i: rates[i], reverse=True)
+        return [outcomes[i] for i in order]
+
+    return [
+        ("filesystem", outcomes),
+        ("heuristic", by_rate(heuristic_rates)),
+        ("learned", by_rate(learned_rates)),
+        # upper bound, knows the actual results
+        ("oracle", by_rate(actual_rates)),
+    ]
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return None
+    return datetime.timedelta(seconds=round(seconds))
+
+
+def main():
+    parser = get_parser()
+    args = parser.parse_args()
+
+    for batch_dir in args.batch_dirs:
+        if not os.path.exists(batch_dir):
+            print(f"[ERROR] path does not exist: {batch_dir}")
+            sys.exit(-1)
+
+    outcomes = load_recorded_outcomes(args.batch_dirs)
+    if len(outcomes) == 0:
+        print("No fuzzomatic results found")
+        sys.exit(-1)
+
+    total_seconds = sum(o["duration_seconds"] for o in outcomes)
+    total_useful = sum(o["useful"] for o in outcomes)
+    budget_seconds = args.budget_hours * 3600
+    if budget_seconds <= 0:
+        budget_seconds = total_seconds / 2
+
+    print(f"Code bases: {len(outcomes)}")
+    print(f"Total duration: {format_seconds(total_seconds)}")
+    print(f"Useful fuzz targets: {total_useful}")
+    print(f"Budget: {format_seconds(budget_seconds)}")
+    print()
+
+    titles = ["Policy", "Useful in budget", "Half useful at", "Yield area"]
+    spacings = [15, 20, 20, 12]
+    print_aligned(*titles, spacings=spacings)
+    print_aligned(*["-" * (sp - 3) for sp in spacings], spacings=spacings)
+    for name, ordered in policy_orders(outcomes, args.folds):
+        curve = simulate_schedule(ordered)
+        print_aligned(
+            name,
+            useful_within(curve, budget_seconds),
+            format_seconds(time_to_fraction(curve, 0.5)),
+            round(normalized_yield_area(curve), 3),
+            spacings=spacings,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 
 import argparse
+import concurrent.futures
 import datetime
 import json
 import os.path
+import queue
 import subprocess
 import sys
+import threading
 
 import fuzzomatic.tools.utils
-from fuzzomatic.tools import utils
+from fuzzomatic.tools import commands, utils
 from fuzzomatic import discovery
 from fuzzomatic.approaches import (
     try_functions_approach,
@@ -17,16 +20,68 @@ from fuzzomatic.approaches import (
     try_benches_approach,
     try_unit_tests_approach,
     try_unit_tests_with_function_approach,
+    readme_prompt_jobs,
+    example_prompt_jobs,
+    unit_test_prompt_jobs,
+    unit_test_with_function_prompt_jobs,
+    bench_prompt_jobs,
 )
+from fuzzomatic.approaches.common import (
+    attempt_generated_fuzz_target,
+    calls_placeholder_function,
+    generate_fuzz_target,
+)
+from fuzzomatic.approaches.functions import prefetch_workspace_functions
+from fuzzomatic.tools.approach_bandit import (
+    approach_context,
+    approach_outcomes,
+    charge_approach,
+    expected_approach_costs,
+    new_approach_stats,
+    order_approaches_adaptively,
+    record_approach_outcomes,
+)
+from fuzzomatic.tools.budget import (
+    Budget,
+    exhausted_budget,
+    next_approach,
+    remaining_budget_fraction,
+    run_within_budget,
+)
+from fuzzomatic.tools.cancellation import (
+    Stopped,
+    current_stop_events,
+    is_stopped,
+    stop_when_set,
+)
+from fuzzomatic.tools.codebase_index import build_codebase_index, applicable_approaches
 from fuzzomatic.tools.constants import (
+    DEFAULT_COMMAND_TIMEOUTS,
     DEFAULT_TARGET_NAME,
     FUZZOMATIC_RESULTS_FILENAME,
     EXIT_NOT_A_CARGO_PROJECT,
     EXIT_PROJECT_ALREADY_FUZZED,
     EXIT_PROJECT_DOES_NOT_BUILD,
     EXIT_OPENAI_API_KEY_ERROR,
+    DEFAULT_TRIAGE_WORKERS,
+    DEFAULT_LIBFUZZER_OPTIONS,
+    DEFAULT_PIPELINE_STAGE_WORKERS,
+    DEFAULT_LLM_MAX_CONCURRENT_REQUESTS,
 )
+from fuzzomatic.tools.coverage import measure_coverage, line_coverage_percent
+from fuzzomatic.tools.function_model import record_target_usefulness
+from fuzzomatic.tools.isolation import (
+    create_isolated_copy,
+    original_path,
+    new_build_cache,
+    share_build_cache,
+    warm_up_fuzz_build,
+)
+from fuzzomatic.tools.llm import configure_rate_limit
+from fuzzomatic.tools.pipeline import run_pipeline, print_pipeline_stats, take
 from fuzzomatic.tools.runtime import evaluate_target, cleanup_corpus
+from fuzzomatic.tools.triage import triage_crash, minimize_crashes
+from fuzzomatic.tools.validation import validate_fuzz_target
 from fuzzomatic.tools.utils import (
     get_codebase_name,
     git_clone,
@@ -100,9 +155,145 @@ def add_parser_shared_arguments(parser):
         help="List of workspace members to process. "
         "Unspecified workspace members will be skipped.",
     )
+    parser.add_argument(
+        "--triage-workers",
+        dest="triage_workers",
+        type=int,
+        default=DEFAULT_TRIAGE_WORKERS,
+        help="Number of crashes to minimize in parallel with cargo fuzz tmin",
+    )
+    parser.add_argument(
+        "--coverage",
+        action="store_true",
+        dest="coverage",
+        help="Measure line and function coverage of useful fuzz targets "
+        "with cargo fuzz coverage and llvm-cov",
+    )
+    parser.add_argument(
+        "--min-line-coverage",
+        dest="min_line_coverage",
+        type=float,
+        default=0,
+        help="With --coverage, only count useful fuzz targets that cover "
+        "at least this percentage of the library lines for `--stop-on useful`",
+    )
+    parser.add_argument(
+        "--approach-workers",
+        dest="approach_workers",
+        type=int,
+        default=1,
+        help="Number of approaches to run concurrently. "
+        "Each approach runs in its own copy of the code base.",
+    )
+    parser.add_argument(
+        "--workspace-workers",
+        dest="workspace_workers",
+        type=int,
+        default=1,
+        help="Number of workspace members to autofuzz concurrently. "
+        "The stop condition applies to the whole workspace.",
+    )
+    parser.add_argument(
+        "--llm-max-concurrency",
+        dest="llm_max_concurrency",
+        type=int,
+        default=DEFAULT_LLM_MAX_CONCURRENT_REQUESTS,
+        help="Maximum number of concurrent LLM requests, shared by all workers",
+    )
+    parser.add_argument(
+        "--llm-requests-per-minute",
+        dest="llm_requests_per_minute",
+        type=int,
+        default=0,
+        help="Maximum number of LLM requests per minute, shared by all workers. "
+        "0 means no limit.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        dest="pipeline",
+        help="Run the LLM, validation, build and evaluation of the prompt based "
+        "approaches as concurrent stages connected by bounded queues",
+    )
+    parser.add_argument(
+        "--stage-workers",
+        dest="stage_workers",
+        type=parse_stage_workers,
+        default=DEFAULT_PIPELINE_STAGE_WORKERS,
+        help="Number of workers per pipeline stage, "
+        "for example: llm=4,build=2. Stages are llm, validate, build and evaluate.",
+    )
+    parser.add_argument(
+        "--command-timeouts",
+        dest="command_timeouts",
+        type=parse_command_timeouts,
+        default={},
+        help="Timeout in seconds per kind of external command, for example: "
+        f"build=3600,git=300. Kinds are {', '.join(DEFAULT_COMMAND_TIMEOUTS)}. "
+        "The fuzz timeout is added to the fuzzing time. 0 means no timeout.",
+    )
+    parser.add_argument(
+        "--function-scoring",
+        dest="function_scoring",
+        choices=["heuristic", "learned"],
+        default="heuristic",
+        help="How the functions approach orders target functions. "
+        "`learned` uses the model trained with fz-train-scoring from previous runs.",
+    )
+    parser.add_argument(
+        "--time-budget",
+        dest="time_budget",
+        type=int,
+        default=0,
+        help="Maximum number of seconds to spend on a code base. "
+        "No LLM request or build is started once it ran out. 0 means no limit.",
+    )
+    parser.add_argument(
+        "--token-budget",
+        dest="token_budget",
+        type=int,
+        default=0,
+        help="Maximum number of LLM tokens to spend on a code base. 0 means no limit.",
+    )
+    parser.add_argument(
+        "--approach-order",
+        dest="approach_order",
+        choices=["static", "adaptive"],
+        default="static",
+        help="Order of the approaches. `adaptive` picks the order per code base "
+        "with a bandit policy learned from the approach outcomes of previous runs.",
+    )
+    parser.add_argument(
+        "--approach-reward",
+        dest="approach_reward",
+        choices=["time", "tokens", "both"],
+        default="time",
+        help="Reward of the adaptive approach order: useful fuzz targets "
+        "per second, per LLM token or per both.",
+    )
     return parser
 
 
+def parse_stage_workers(value):
+    stage_workers = dict(DEFAULT_PIPELINE_STAGE_WORKERS)
+    for item in value.split(","):
+        name, _, workers = item.partition("=")
+        if name not in stage_workers or not workers.isdigit() or int(workers) < 1:
+            raise argparse.ArgumentTypeError(f"invalid stage workers: {item}")
+        stage_workers[name] = int(workers)
+    return stage_workers
+
+
+def parse_command_timeouts(value):
+    timeouts = {}
+    for item in value.split(","):
+        kind, _, seconds = item.partition("=")
+        if kind not in DEFAULT_COMMAND_TIMEOUTS or not seconds.isdigit():
+            raise argparse.ArgumentTypeError(f"invalid command timeout: {item}")
+        timeouts[kind] = int(seconds)
+    return timeouts
+
+
 def save_results(
     args,
     git_url,
@@ -111,6 +302,9 @@ def save_results(
     end_time,
     duration,
     outcome_reason,
+    approach_stats=None,
+    budget_exhausted=None,
+    command_stats=None,
 ):
     name = get_codebase_name(args.codebase_dir)
 
@@ -129,7 +323,13 @@ def save_results(
         "end_time": end_time.isoformat(),
         "duration_seconds": duration_seconds,
         "outcome_reason": outcome_reason,
+        "budget_exhausted": budget_exhausted,
     }
+    if approach_stats is not None:
+        results["approach_stats"] = approach_stats
+    if command_stats is not None:
+        # time, failures and timeouts per kind of external command
+        results["commands"] = command_stats
 
     # save results to file
     with open(results_path, "w+") as fout:
@@ -150,7 +350,7 @@ def get_approaches(requested_approaches):
 
 
 def generate_building_fuzz_targets(
-    args, codebase_dir, git_url, approaches, force=False
+    args, codebase_dir, git_url, approaches, force=False, approach_stats=None
 ):
     codebase_name = get_codebase_name(codebase_dir)
     if not force:
@@ -158,7 +358,9 @@ def generate_building_fuzz_targets(
         if discovery.is_project_to_be_skipped(codebase_dir, git_url):
             yield "message", EXIT_PROJECT_ALREADY_FUZZED
 
-    autofuzz_generator = autofuzz_codebase(args, codebase_dir, approaches=approaches)
+    autofuzz_generator = autofuzz_codebase(
+        args, codebase_dir, approaches=approaches, approach_stats=approach_stats
+    )
     for result in autofuzz_generator:
         yield result
 
@@ -172,8 +374,8 @@ def ensure_dependencies_available():
     print("Checking external dependencies...")
     for cmd_name, cmd in required_external_commands:
         try:
-            subprocess.check_call(
-                cmd, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL
+            commands.check_call(
+                cmd, "toolchain", stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL
             )
             print(f"[SUCCESS] {cmd_name}")
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -210,6 +412,7 @@ def main(args=None):
     ensure_env_vars_set()
 
     very_start = datetime.datetime.utcnow()
+    commands.configure_command_timeouts(args.command_timeouts)
 
     # if git URL, clone the repository
     git_url = None
@@ -229,13 +432,17 @@ def main(args=None):
     print(f"Code base total duration: {total_duration}")
 
 
-def current_stats(generated_fuzz_targets):
+def current_stats(generated_fuzz_targets, min_line_coverage=0):
     building = 0
     useful = 0
     bug_found = 0
 
     for fuzz_target in generated_fuzz_targets:
         is_useful = fuzz_target["is_useful"]
+        if is_useful and min_line_coverage > 0:
+            # only count useful targets that reach enough library code
+            line_coverage = line_coverage_percent(fuzz_target)
+            is_useful = line_coverage is not None and line_coverage >= min_line_coverage
         is_bug_found = fuzz_target["bug_found"]
         building += 1
         if is_useful:
@@ -256,36 +463,77 @@ def process_codebase(args, git_url):
         return
 
     approaches = get_approaches(args.approaches)
+    configure_rate_limit(
+        args.llm_max_concurrency, requests_per_minute=args.llm_requests_per_minute
+    )
 
+    # time and LLM usage per approach
+    approach_stats = {}
+    budget = Budget(
+        "codebase", max_seconds=args.time_budget, max_tokens=args.token_budget
+    )
     generator = generate_building_fuzz_targets(
-        args, args.codebase_dir, git_url, approaches, force=args.force
+        args,
+        args.codebase_dir,
+        git_url,
+        approaches,
+        force=args.force,
+        approach_stats=approach_stats,
     )
+    generator = run_within_budget(generator, budget)
+    command_stats = {}
+    generator = commands.run_recording_commands(generator, command_stats)
 
     generated_fuzz_targets = []
+    crashes = {}
     outcome_reason = "success"
     for building_target in generator:
         result_type, contents = building_target
 
         if result_type == "fuzz_target":
-            fuzz_target_code, fuzz_target_path, successful_approach = contents
-
-            fuzz_project_dir = os.path.realpath(
-                os.path.join(os.path.dirname(fuzz_target_path), os.path.pardir)
-            )
-
-            # Try to run the target and evaluate it
-            cleanup_corpus(fuzz_project_dir)
-
-            is_useful, bug_found, error = evaluate_target(
-                fuzz_project_dir, max_total_time_seconds=10
-            )
+            # evaluate the fuzz target now, unless the pipeline already did
+            contents = (contents, evaluate_fuzz_target(args, *contents))
+            result_type = "evaluated_fuzz_target"
+
+        if result_type == "evaluated_fuzz_target":
+            (
+                (
+                    fuzz_target_code,
+                    fuzz_target_path,
+                    successful_approach,
+                    _,
+                ),
+                evaluation,
+            ) = contents
+            # fuzz targets of isolated copies are recorded in the original
+            # package, the copies are disposable
+            run_dir = evaluation["fuzz_project_dir"]
+            fuzz_project_dir = original_path(run_dir)
+            fuzz_target_path = original_path(fuzz_target_path)
+            libfuzzer_options = evaluation["libfuzzer_options"]
+            is_useful = evaluation["is_useful"]
+            bug_found = evaluation["bug_found"]
+            fuzz_stats = evaluation["fuzz_stats"]
+            coverage = evaluation["coverage"]
+
+            crash = None
+            error = None
             if bug_found:
-                error = error.decode("utf-8")
-            else:
                 # do not store output if no bug is found
-                error = None
-            print(f"{is_useful=}")
-            print(f"{bug_found=}")
+                error = evaluation["output"].decode("utf-8")
+                crash_origin = {
+                    "codebase_dir": args.codebase_dir,
+                    "git_url": git_url,
+                    "fuzz_target_path": fuzz_target_path,
+                }
+                crash = triage_crash(
+                    fuzz_project_dir,
+                    fuzz_target_code,
+                    error,
+                    crash_origin,
+                    run_dir=run_dir,
+                )
+                crashes.setdefault(fuzz_project_dir, []).append(crash)
 
             fuzz_target_result = {
                 "fuzz_target_code": fuzz_target_code,
@@ -294,11 +542,17 @@ def process_codebase(args, git_url):
                 "is_useful": is_useful,
                 "bug_found": bug_found,
                 "error": error,
+                "crash": crash,
+                "fuzz_stats": fuzz_stats,
+                "libfuzzer_options": libfuzzer_options,
+                "coverage": coverage,
             }
             generated_fuzz_targets.append(fuzz_target_result)
 
             # print current stats
-            building, useful, bug_found = current_stats(generated_fuzz_targets)
+            building, useful, bug_found = current_stats(
+                generated_fuzz_targets, min_line_coverage=args.min_line_coverage
+            )
             print()
             print("Generated fuzz targets so far for this codebase:")
             print_current_stats(args, bug_found, building, useful)
@@ -319,6 +573,9 @@ def process_codebase(args, git_url):
                     print("Stopping condition reached. Stopping.")
                     print(f"{bug_found=} >= {args.max_fuzz_targets}")
                     break
+            if exhausted_budget() is not None:
+                print("Budget exhausted. Stopping.")
+                break
         elif result_type == "message":
             exit_code = contents
             outcome_reason = "unknown"
@@ -338,12 +595,30 @@ def process_codebase(args, git_url):
                 print("OpenAI API key not set. Aborting.")
                 sys.exit(-1)
             break
+    # the code base budget is not active anymore once it ended the results,
+    # the batch budget still is
+    budget_exhausted = None
+    if budget.exhausted() is not None:
+        budget_exhausted = budget.status()
+    elif exhausted_budget() is not None:
+        budget_exhausted = exhausted_budget().status()
+    # charge the time of the running approaches
+    generator.close()
+
+    # minimize unique crashes, the results are updated in place
+    with commands.record_commands(command_stats):
+        for fuzz_project_dir, project_crashes in crashes.items():
+            minimize_crashes(
+                fuzz_project_dir, project_crashes, workers=args.triage_workers
+            )
 
     end_time = datetime.datetime.utcnow()
     duration = end_time - start_time
 
     if len(generated_fuzz_targets) == 0 and outcome_reason == "success":
         outcome_reason = "no_approach_worked"
+        if budget_exhausted is not None:
+            outcome_reason = "budget_exhausted"
 
     # save results to disk
     save_results(
@@ -354,13 +629,61 @@ def process_codebase(args, git_url):
         end_time,
         duration,
         outcome_reason,
+        approach_stats=approach_stats,
+        budget_exhausted=budget_exhausted,
+        command_stats=command_stats,
+    )
+    # outcomes of all runs drive the adaptive approach order
+    record_approach_outcomes(approach_outcomes(approach_stats, generated_fuzz_targets))
+    building, useful, bug_found = current_stats(
+        generated_fuzz_targets, min_line_coverage=args.min_line_coverage
     )
-    building, useful, bug_found = current_stats(generated_fuzz_targets)
     print()
     print("Final fuzz targets generated for this codebase:")
     print_current_stats(args, bug_found, building, useful)
 
 
+def evaluate_fuzz_target(
+    args, fuzz_target_code, fuzz_target_path, successful_approach, libfuzzer_options
+):
+    if libfuzzer_options is None:
+        libfuzzer_options = DEFAULT_LIBFUZZER_OPTIONS
+
+    fuzz_project_dir = os.path.realpath(
+        os.path.join(os.path.dirname(fuzz_target_path), os.path.pardir)
+    )
+
+    # Try to run the target and evaluate it
+    cleanup_corpus(fuzz_project_dir)
+
+    is_useful, bug_found, output, fuzz_stats = evaluate_target(
+        fuzz_project_dir,
+        max_total_time_seconds=10,
+        libfuzzer_options=libfuzzer_options,
+    )
+    print(f"{is_useful=}")
+    print(f"{bug_found=}")
+
+    if successful_approach == "functions":
+        # outcome used to learn function priorities
+        record_target_usefulness(fuzz_target_code, is_useful)
+
+    coverage = None
+    if args.coverage and is_useful:
+        coverage = measure_coverage(fuzz_project_dir, fuzz_target_code)
+        print(f"{coverage=}")
+
+    return {
+        "fuzz_project_dir": fuzz_project_dir,
+        "libfuzzer_options": libfuzzer_options,
+        "is_useful": is_useful,
+        "bug_found": bug_found,
+        "output": output,
+        "fuzz_stats": fuzz_stats,
+        "coverage": coverage,
+    }
+
+
 def print_current_stats(args, bug_found, building, useful):
     print("*" * 50)
     print(f"{args.codebase_dir=}")
@@ -380,7 +703,7 @@ def read_codebase_results(codebase_dir):
     return target_results
 
 
-def autofuzz_workspace(args, codebase_dir, target_name, approaches=[]):
+def read_allowed_workspace_members(args, codebase_dir):
     # identify workspace members
     members = fuzzomatic.tools.utils.read_workspace_members(codebase_dir)
 
@@ -390,48 +713,197 @@ def autofuzz_workspace(args, codebase_dir, target_name, approaches=[]):
             if any([member.endswith(m) for m in args.workspace_members_allowlist]):
                 final_members.append(member)
         members = final_members
+    return members
+
+
+def find_unfuzzed_members(members):
+    # check that the subdirs are not fuzzed
+    return [
+        m
+        for m in members
+        if os.path.isdir(m) and not discovery.is_project_already_fuzzed(m)
+    ]
+
+
+def autofuzz_workspace(
+    args, codebase_dir, target_name, approaches=[], approach_stats=None
+):
+    members = read_allowed_workspace_members(args, codebase_dir)
 
     print("About to autofuzz workspace members:")
     for m in members:
         print(m)
     print()
 
+    unfuzzed_members = find_unfuzzed_members(members)
+
+    if any(name == "functions" for name, _ in approaches):
+        prefetch_workspace_functions(codebase_dir, unfuzzed_members)
+
     # run autofuzz on each workspace member
+    if args.workspace_workers > 1 and len(unfuzzed_members) > 1:
+        generator = autofuzz_members_concurrently(
+            args,
+            codebase_dir,
+            unfuzzed_members,
+            target_name=target_name,
+            approaches=approaches,
+            approach_stats=approach_stats,
+        )
+    else:
+        generator = autofuzz_members_sequentially(
+            args,
+            codebase_dir,
+            unfuzzed_members,
+            target_name=target_name,
+            approaches=approaches,
+            approach_stats=approach_stats,
+        )
+
     build_failure_count = 0
+    for result in generator:
+        result_type, contents = result
+        if result_type == "message" and contents == EXIT_PROJECT_DOES_NOT_BUILD:
+            build_failure_count += 1
 
-    for f in members:
-        # check that the subdir is not fuzzed
-        is_fuzzed = discovery.is_project_already_fuzzed(f)
-        if os.path.isdir(f) and not is_fuzzed:
-            print(f"Retrying with workspace member: {f}")
-            generator = autofuzz_codebase(
-                args,
-                f,
-                target_name=target_name,
-                virtual_manifest=True,
-                approaches=approaches,
-                root_codebase_dir=codebase_dir,
-            )
+            if build_failure_count == len(members):
+                # all members failed to build, consider this a build failure
+                yield "message", EXIT_PROJECT_DOES_NOT_BUILD
 
-            for result in generator:
-                result_type, contents = result
-                if result_type == "message" and contents == EXIT_PROJECT_DOES_NOT_BUILD:
-                    build_failure_count += 1
+            continue
+        else:
+            yield result
 
-                    if build_failure_count == len(members):
-                        # all members failed to build, consider this a build failure
-                        yield "message", EXIT_PROJECT_DOES_NOT_BUILD
 
-                    continue
-                else:
-                    yield result
+def autofuzz_members_sequentially(
+    args,
+    codebase_dir,
+    member_dirs,
+    target_name=DEFAULT_TARGET_NAME,
+    approaches=[],
+    approach_stats=None,
+):
+    for f in member_dirs:
+        print(f"Retrying with workspace member: {f}")
+        yield from autofuzz_codebase(
+            args,
+            f,
+            target_name=target_name,
+            virtual_manifest=True,
+            approaches=approaches,
+            root_codebase_dir=codebase_dir,
+            approach_stats=approach_stats,
+        )
 
 
-def is_project_building_by_default(codebase_dir):
+def run_member_worker(
+    args,
+    codebase_dir,
+    member_dir,
+    results,
+    stop_events,
+    build_cache,
+    target_name=DEFAULT_TARGET_NAME,
+    approaches=[],
+    approach_stats=None,
+):
+    try:
+        print(f"Autofuzzing workspace member: {member_dir}")
+        generator = autofuzz_codebase(
+            args,
+            member_dir,
+            target_name=target_name,
+            virtual_manifest=True,
+            approaches=approaches,
+            root_codebase_dir=codebase_dir,
+            build_cache=build_cache,
+            approach_stats=approach_stats,
+        )
+        with stop_when_set(stop_events):
+            forward_results(generator, results)
+    except Stopped:
+        print(f"Workspace member {member_dir} stopped")
+    except Exception as e:
+        print(f"Workspace member {member_dir} failed: {e}")
+    finally:
+        results.put(("done", member_dir, None))
+
+
+def autofuzz_members_concurrently(
+    args,
+    codebase_dir,
+    member_dirs,
+    target_name=DEFAULT_TARGET_NAME,
+    approaches=[],
+    approach_stats=None,
+):
+    # the stop condition is checked by the consumer on the results of all
+    # members, closing this generator stops all of them
+    build_cache = new_build_cache(codebase_dir)
+    results = queue.Queue()
+    stop = threading.Event()
+    stop_events = current_stop_events() + [stop]
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=args.workspace_workers)
+    for member_dir in member_dirs:
+        executor.submit(
+            commands.with_command_stats(run_member_worker),
+            args,
+            codebase_dir,
+            member_dir,
+            results,
+            stop_events,
+            build_cache,
+            target_name=target_name,
+            approaches=approaches,
+            approach_stats=approach_stats,
+        )
+
+    try:
+        yield from merge_results(results, len(member_dirs))
+    finally:
+        # running members stop before their next LLM request or build,
+        # nothing they do is charged to the next code base
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def forward_results(generator, results):
+    # hand the results over to the consumer thread one at a time, fuzz targets
+    # are evaluated in place so the generator waits until they are processed
+    for result in generator:
+        processed = threading.Event()
+        results.put(("result", result, processed))
+        while not processed.wait(timeout=1):
+            if is_stopped():
+                break
+        if is_stopped():
+            generator.close()
+            break
+
+
+def merge_results(results, workers):
+    # yields the results forwarded by the workers in order of arrival
+    remaining = workers
+    while remaining > 0:
+        kind, result, processed = results.get()
+        if kind == "done":
+            remaining -= 1
+            continue
+        yield result
+        processed.set()
+
+
+def is_project_building_by_default(codebase_dir, quiet=False):
     cmd = ["cargo", "check"]
 
     try:
-        subprocess.check_call(cmd, cwd=codebase_dir)
+        if quiet:
+            # e.g. when checking in the background
+            commands.check_output(
+                cmd, "check", cwd=codebase_dir, stderr=subprocess.STDOUT
+            )
+        else:
+            commands.check_call(cmd, "check", cwd=codebase_dir)
         return True
     except subprocess.CalledProcessError as e:
         print("Project does not build by default")
@@ -446,6 +918,8 @@ def autofuzz_codebase(
     virtual_manifest=False,
     approaches=[],
     root_codebase_dir=None,
+    build_cache=None,
+    approach_stats=None,
 ):
     # cargo fuzz init
     cargo_fuzz_init_success = init_cargo_fuzz(codebase_dir, target_name)
@@ -467,7 +941,11 @@ def autofuzz_codebase(
 
     if is_workspace:
         workspace_generator = autofuzz_workspace(
-            args, codebase_dir, target_name=target_name, approaches=approaches
+            args,
+            codebase_dir,
+            target_name=target_name,
+            approaches=approaches,
+            approach_stats=approach_stats,
         )
         for result in workspace_generator:
             yield result
@@ -478,25 +956,318 @@ def autofuzz_codebase(
         # also add the arbitrary crate for target functions with multiple arguments
         utils.add_fuzz_dependency(codebase_dir, "arbitrary@1", features=["derive"])
 
-        for approach_name, approach_function in approaches:
-            print("=" * 40)
-            print(f"ATTEMPTING APPROACH: {approach_name}")
-            print("=" * 40)
+        if build_cache is not None:
+            # reuse the dependencies built for the other workspace members
+            share_build_cache(build_cache, codebase_dir, target_name)
+
+        index = build_codebase_index(codebase_dir, parent_readme=virtual_manifest)
+        approaches, skipped = applicable_approaches(approaches, index)
+        if len(skipped) > 0:
+            print(f"Skipping approaches without inputs: {', '.join(skipped)}")
+        context = approach_context(index)
+        if args.approach_order == "adaptive":
+            approaches = order_approaches_adaptively(
+                approaches, context, reward=args.approach_reward
+            )
+        if approach_stats is not None:
+            for approach_name, _ in approaches:
+                approach_stats.setdefault(approach_name, new_approach_stats(context))
+
+        if args.pipeline:
+            yield from run_approaches_pipelined(
+                args,
+                codebase_dir,
+                approaches,
+                target_name=target_name,
+                virtual_manifest=virtual_manifest,
+                root_codebase_dir=root_codebase_dir,
+                approach_stats=approach_stats,
+            )
+            return
 
-            # attempt approach
-            approach_function_generator = approach_function(
+        if args.approach_workers > 1 and len(approaches) > 1:
+            yield from run_approaches_concurrently(
+                args,
                 codebase_dir,
+                approaches,
                 target_name=target_name,
                 virtual_manifest=virtual_manifest,
                 root_codebase_dir=root_codebase_dir,
-                args=args,
+                approach_stats=approach_stats,
             )
+            return
+
+        yield from run_approaches_sequentially(
+            args,
+            codebase_dir,
+            approaches,
+            target_name=target_name,
+            virtual_manifest=virtual_manifest,
+            root_codebase_dir=root_codebase_dir,
+            approach_stats=approach_stats,
+        )
+
 
+def run_approaches_sequentially(
+    args,
+    codebase_dir,
+    approaches,
+    target_name=DEFAULT_TARGET_NAME,
+    virtual_manifest=False,
+    root_codebase_dir=None,
+    approach_stats=None,
+):
+    expected_costs = {}
+    if remaining_budget_fraction() is not None:
+        expected_costs = expected_approach_costs()
+
+    remaining_approaches = list(approaches)
+    while len(remaining_approaches) > 0:
+        approach = next_approach(remaining_approaches, expected_costs)
+        remaining_approaches.remove(approach)
+        approach_name, approach_function = approach
+        print("=" * 40)
+        print(f"ATTEMPTING APPROACH: {approach_name}")
+        print("=" * 40)
+
+        # attempt approach
+        approach_function_generator = approach_function(
+            codebase_dir,
+            target_name=target_name,
+            virtual_manifest=virtual_manifest,
+            root_codebase_dir=root_codebase_dir,
+            args=args,
+        )
+
+        # the wall time includes the evaluation of the yielded fuzz targets
+        with charge_approach(approach_stats, approach_name):
             for result in approach_function_generator:
-                fuzz_target_path = result
+                fuzz_target_path, libfuzzer_options = result
                 with open(fuzz_target_path, "r") as f:
                     fuzz_target_code = f.read()
-                yield "fuzz_target", (fuzz_target_code, fuzz_target_path, approach_name)
+                yield "fuzz_target", (
+                    fuzz_target_code,
+                    fuzz_target_path,
+                    approach_name,
+                    libfuzzer_options,
+                )
+
+
+def run_approach_worker(
+    args,
+    codebase_dir,
+    approach,
+    results,
+    stop_events,
+    target_name=DEFAULT_TARGET_NAME,
+    virtual_manifest=False,
+    root_codebase_dir=None,
+    approach_stats=None,
+):
+    approach_name, _ = approach
+    try:
+        print(f"Approach {approach_name} runs in: {codebase_dir}")
+        generator = run_approaches_sequentially(
+            args,
+            codebase_dir,
+            [approach],
+            target_name=target_name,
+            virtual_manifest=virtual_manifest,
+            root_codebase_dir=root_codebase_dir,
+            approach_stats=approach_stats,
+        )
+        with stop_when_set(stop_events):
+            forward_results(generator, results)
+    except Stopped:
+        print(f"Approach {approach_name} stopped")
+    except Exception as e:
+        print(f"Approach {approach_name} failed: {e}")
+    finally:
+        results.put(("done", approach_name, None))
+
+
+def run_approaches_concurrently(
+    args,
+    codebase_dir,
+    approaches,
+    target_name=DEFAULT_TARGET_NAME,
+    virtual_manifest=False,
+    root_codebase_dir=None,
+    approach_stats=None,
+):
+    # each approach runs in its own copy of the code base, so that
+    # they do not overwrite each other's fuzz target
+    warm_up_fuzz_build(codebase_dir, target_name)
+    # the first approach keeps the original code base, the copies are made
+    # before it starts writing its fuzz targets and dependencies
+    copies = [(codebase_dir, root_codebase_dir)]
+    for approach_name, _ in approaches[1:]:
+        copies.append(
+            create_isolated_copy(
+                codebase_dir, approach_name, root_codebase_dir=root_codebase_dir
+            )
+        )
+
+    results = queue.Queue()
+    stop = threading.Event()
+    stop_events = current_stop_events() + [stop]
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=args.approach_workers)
+    for approach, (approach_codebase_dir, approach_root_dir) in zip(approaches, copies):
+        executor.submit(
+            commands.with_command_stats(run_approach_worker),
+            args,
+            approach_codebase_dir,
+            approach,
+            results,
+            stop_events,
+            target_name=target_name,
+            virtual_manifest=virtual_manifest,
+            root_codebase_dir=approach_root_dir,
+            approach_stats=approach_stats,
+        )
+
+    try:
+        # fuzz targets are evaluated in order of arrival
+        yield from merge_results(results, len(approaches))
+    finally:
+        # stop condition reached or all approaches done,
+        # running approaches stop before their next LLM request or build
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run_approaches_pipelined(
+    args,
+    codebase_dir,
+    approaches,
+    target_name=DEFAULT_TARGET_NAME,
+    virtual_manifest=False,
+    root_codebase_dir=None,
+    approach_stats=None,
+):
+    # approaches that are not driven by prompts build their own fuzz targets
+    other_approaches = [a for a in approaches if a[0] not in PROMPT_APPROACHES]
+    yield from run_approaches_sequentially(
+        args,
+        codebase_dir,
+        other_approaches,
+        target_name=target_name,
+        virtual_manifest=virtual_manifest,
+        root_codebase_dir=root_codebase_dir,
+        approach_stats=approach_stats,
+    )
+
+    prompt_approaches = [a for a in approaches if a[0] in PROMPT_APPROACHES]
+    if len(prompt_approaches) == 0:
+        return
+
+    expected_costs = {}
+    if remaining_budget_fraction() is not None:
+        expected_costs = expected_approach_costs()
+
+    def prompt_jobs():
+        remaining_approaches = list(prompt_approaches)
+        while len(remaining_approaches) > 0:
+            approach = next_approach(remaining_approaches, expected_costs)
+            remaining_approaches.remove(approach)
+            approach_name, _ = approach
+            print(f"ATTEMPTING APPROACH: {approach_name}")
+            jobs = PROMPT_APPROACHES[approach_name](
+                codebase_dir, virtual_manifest=virtual_manifest
+            )
+            for job in jobs:
+                job["approach"] = approach_name
+                yield job
+
+    # a fuzz target is built and evaluated in a build slot, a copy of the
+    # code base that is not reused before the fuzz target was processed
+    stage_workers = args.stage_workers
+    slot_count = stage_workers["build"] + stage_workers["evaluate"]
+    if slot_count > 1:
+        warm_up_fuzz_build(codebase_dir, target_name)
+    slots = queue.Queue()
+    slots.put((codebase_dir, root_codebase_dir))
+    for i in range(1, slot_count):
+        slots.put(
+            create_isolated_copy(
+                codebase_dir, f"slot{i}", root_codebase_dir=root_codebase_dir
+            )
+        )
+
+    stop = threading.Event()
+
+    # approaches overlap in the pipeline, each one is charged with the time
+    # its items spend in the stages
+    def llm_stage(job):
+        with charge_approach(approach_stats, job["approach"]):
+            code_snippet = generate_fuzz_target(
+                codebase_dir, job["prompt"], additional_code=job["additional_code"]
+            )
+        if calls_placeholder_function(code_snippet):
+            print("Generated call to library_function(). Moving on...")
+            return []
+        return [dict(job, code=code_snippet, syntax_error=None)]
+
+    def validate_stage(candidate):
+        if candidate["code"] is not None:
+            code_snippet, syntax_error = validate_fuzz_target(candidate["code"])
+            candidate = dict(candidate, code=code_snippet, syntax_error=syntax_error)
+        return [candidate]
+
+    def build_stage(candidate):
+        slot, _ = take(slots, stop)
+        if slot is None:
+            return []
+        slot_codebase_dir, _ = slot
+        try:
+            with charge_approach(approach_stats, candidate["approach"]):
+                success, fuzz_target_path = attempt_generated_fuzz_target(
+                    slot_codebase_dir,
+                    candidate["prompt"],
+                    target_name,
+                    candidate["code"],
+                    syntax_error=candidate["syntax_error"],
+                    remaining_attempts=candidate["remaining_attempts"],
+                    additional_code=candidate["additional_code"],
+                )
+        except Exception:
+            # e.g. the budget ran out
+            slots.put(slot)
+            raise
+        if not success:
+            slots.put(slot)
+            return []
+        with open(fuzz_target_path, "r") as f:
+            fuzz_target_code = f.read()
+        contents = (fuzz_target_code, fuzz_target_path, candidate["approach"], None)
+        return [(contents, slot)]
+
+    def evaluate_stage(built):
+        contents, slot = built
+        try:
+            with charge_approach(approach_stats, contents[2]):
+                evaluation = evaluate_fuzz_target(args, *contents)
+        except Exception:
+            slots.put(slot)
+            raise
+        return [(contents, evaluation, slot)]
+
+    stages = [
+        ("llm", llm_stage, stage_workers["llm"]),
+        ("validate", validate_stage, stage_workers["validate"]),
+        ("build", build_stage, stage_workers["build"]),
+        ("evaluate", evaluate_stage, stage_workers["evaluate"]),
+    ]
+    stats = {}
+    try:
+        for contents, evaluation, slot in run_pipeline(
+            prompt_jobs(), stages, stats=stats, stop=stop
+        ):
+            yield "evaluated_fuzz_target", (contents, evaluation)
+            # the slot is reused once the results of the fuzz target are saved
+            slots.put(slot)
+    finally:
+        print_pipeline_stats(stats)
 
 
 def check_project_builds(codebase_dir):
@@ -506,6 +1277,15 @@ def check_project_builds(codebase_dir):
     return default_builds
 
 
+# approaches that only produce prompts, used by the pipeline
+PROMPT_APPROACHES = {
+    "readme": readme_prompt_jobs,
+    "examples": example_prompt_jobs,
+    "unit_tests": unit_test_prompt_jobs,
+    "unit_tests_with_function": unit_test_with_function_prompt_jobs,
+    "benches": bench_prompt_jobs,
+}
+
 ENABLED_APPROACHES = [
     ("functions", try_functions_approach),
     ("readme", try_readme_approach),
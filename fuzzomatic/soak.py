@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
+from fuzzomatic.eval_results import find_results_paths, print_aligned
+from fuzzomatic.tools.constants import (
+    DEFAULT_SOAK_SLICE_SECONDS,
+    SOAK_CORPUS_DIRNAME,
+)
+from fuzzomatic.tools.runtime import evaluate_target
+from fuzzomatic.tools.triage import triage_crash, minimize_crashes
+from fuzzomatic.tools.utils import add_named_fuzz_target, write_json_atomically
+
+# growth rate bonus (features/s) per slice a target spent waiting,
+# so that targets whose coverage stalled are still revisited from time to time
+AGING_BONUS = 0.01
+
+results_lock = threading.Lock()
+
+
+def get_parser():
+    prog_name = "fuzzomatic-soak"
+    parser = argparse.ArgumentParser(
+        prog=prog_name,
+        description="Continuously fuzz the useful fuzz targets found by fuzzomatic",
+    )
+    parser.add_argument(
+        "fuzz_projects_dir",
+        help="Path to a codebase or to a directory containing codebases "
+        "that were autofuzzed",
+    )
+    parser.add_argument(
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of fuzz targets to run concurrently. Defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--slice-seconds",
+        dest="slice_seconds",
+        type=int,
+        default=DEFAULT_SOAK_SLICE_SECONDS,
+        help="Duration of a single fuzzing time slice",
+    )
+    parser.add_argument(
+        "--max-total-time",
+        dest="max_total_time",
+        type=int,
+        default=0,
+        help="Stop soaking after this many seconds. 0 means run until interrupted.",
+    )
+    return parser
+
+
+def load_soak_targets(fuzz_projects_dir):
+    targets = []
+    for results_path in find_results_paths(fuzz_projects_dir):
+        with open(results_path) as f:
+            results = json.loads(f.read())
+
+        # paths in the results file are relative to where fuzzomatic was run
+        codebase_dir = os.path.dirname(os.path.realpath(results_path))
+        for i, fuzz_target in enumerate(results["generated_fuzz_targets"]):
+            if not fuzz_target["is_useful"]:
+                continue
+
+            fuzz_target_path = os.path.relpath(
+                fuzz_target["fuzz_target_path"], results["codebase_dir"]
+            )
+            fuzz_target_path = os.path.join(codebase_dir, fuzz_target_path)
+            fuzz_project_dir = os.path.realpath(
+                os.path.join(os.path.dirname(fuzz_target_path), os.path.pardir)
+            )
+            name = f"soak_{i}"
+
+            targets.append(
+                {
+                    "name": name,
+                    "results_path": results_path,
+                    "codebase_name": results["name"],
+                    "codebase_dir": codebase_dir,
+                    "git_url": results["git_url"],
+                    "fuzz_project_dir": fuzz_project_dir,
+                    "fuzz_target_path": fuzz_target_path,
+                    "fuzz_target_code": fuzz_target["fuzz_target_code"],
+                    "libfuzzer_options": fuzz_target.get("libfuzzer_options"),
+                    "corpus_dir": os.path.join(
+                        fuzz_project_dir, SOAK_CORPUS_DIRNAME, name
+                    ),
+                    "slices": 0,
+                    "total_seconds": 0,
+                    "features": None,
+                    "growth_rate": None,
+                    "waiting_slices": 0,
+                    "crashes": 0,
+                }
+            )
+    return targets
+
+
+def prepare_soak_target(target):
+    # each useful target gets its own fuzz target and persistent corpus
+    crate_dir = os.path.dirname(target["fuzz_project_dir"])
+    fuzz_target_path = add_named_fuzz_target(
+        crate_dir, target["name"], target["fuzz_target_code"]
+    )
+    os.makedirs(target["corpus_dir"], exist_ok=True)
+    return fuzz_target_path is not None
+
+
+def soak_priority(target):
+    # never fuzzed targets go first
+    if target["slices"] == 0:
+        return float("inf")
+    return target["growth_rate"] + AGING_BONUS * target["waiting_slices"]
+
+
+def pick_next_target(targets, running_targets):
+    running_ids = [id(t) for t in running_targets]
+    candidates = [t for t in targets if id(t) not in running_ids]
+    if len(candidates) == 0:
+        return None
+
+    best = max(candidates, key=soak_priority)
+    for t in candidates:
+        if t is not best:
+            t["waiting_slices"] += 1
+    best["waiting_slices"] = 0
+    return best
+
+
+def record_soak_crash(target, crash, output):
+    soak_crash = {
+        "fuzz_target_path": target["fuzz_target_path"],
+        "soak_target": target["name"],
+        "found_at": datetime.datetime.utcnow().isoformat(),
+        "error": output,
+        "crash": crash,
+    }
+
+    with results_lock:
+        with open(target["results_path"]) as f:
+            results = json.loads(f.read())
+        results.setdefault("soak_crashes", []).append(soak_crash)
+        write_json_atomically(target["results_path"], results)
+
+    print(f"Saved new crash to: {target['results_path']}")
+
+
+def run_slice(target, slice_seconds):
+    print(f"Soaking {target['codebase_name']}/{target['name']} for {slice_seconds}s")
+    start = time.monotonic()
+    _, bug_found, output, stats = evaluate_target(
+        target["fuzz_project_dir"],
+        max_total_time_seconds=slice_seconds,
+        libfuzzer_options=target["libfuzzer_options"],
+        target_name=target["name"],
+        corpus_dir=target["corpus_dir"],
+    )
+    elapsed = time.monotonic() - start
+
+    # new features found during this slice, on top of the persistent corpus
+    ft_growth = stats["ft_growth"]
+    new_features = 0
+    if len(ft_growth) > 0:
+        new_features = ft_growth[-1][2] - ft_growth[0][2]
+
+    target["slices"] += 1
+    target["total_seconds"] += elapsed
+    target["features"] = stats["features"]
+    target["growth_rate"] = new_features / max(elapsed, 1)
+
+    if bug_found:
+        output = output.decode("utf-8")
+        crash_origin = {
+            "codebase_dir": target["codebase_dir"],
+            "git_url": target["git_url"],
+            "fuzz_target_path": target["fuzz_target_path"],
+        }
+        crash = triage_crash(
+            target["fuzz_project_dir"], target["fuzz_target_code"], output, crash_origin
+        )
+        if crash["duplicate_of"] is None:
+            target["crashes"] += 1
+            minimize_crashes(target["fuzz_project_dir"], [crash], workers=1)
+            record_soak_crash(target, crash, output)
+        else:
+            # do not keep spending time on a known crash
+            target["growth_rate"] = 0
+
+
+def print_soak_status(targets):
+    titles = ["Project", "Target", "Slices", "Time", "Features", "ft/s", "Crashes"]
+    spacings = [30, 12, 8, 18, 10, 10, 8]
+    print()
+    print_aligned(*titles, spacings=spacings)
+    separators = ["-" * max(3, sp - 3) for sp in spacings]
+    print_aligned(*separators, spacings=spacings)
+    for t in sorted(targets, key=soak_priority, reverse=True):
+        growth_rate = t["growth_rate"]
+        if growth_rate is not None:
+            growth_rate = round(growth_rate, 3)
+        print_aligned(
+            t["codebase_name"],
+            t["name"],
+            t["slices"],
+            datetime.timedelta(seconds=round(t["total_seconds"])),
+            t["features"],
+            growth_rate,
+            t["crashes"],
+            spacings=spacings,
+        )
+    print()
+
+
+def soak(targets, jobs, slice_seconds, max_total_time=0):
+    deadline = None
+    if max_total_time > 0:
+        deadline = time.monotonic() + max_total_time
+
+    running = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        while True:
+            # fill all the available cores
+            while len(running) < jobs:
+                duration = slice_seconds
+                if deadline is not None:
+                    duration = min(duration, int(deadline - time.monotonic()))
+                    if duration <= 0:
+                        break
+
+                target = pick_next_target(targets, running.values())
+                if target is None:
+                    break
+                future = executor.submit(run_slice, target, duration)
+                running[future] = target
+
+            if len(running) == 0:
+                break
+
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                target = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Failed to soak {target['name']}: {e}")
+            print_soak_status(targets)
+
+
+def main():
+    parser = get_parser()
+    args = parser.parse_args()
+
+    fuzz_dir = args.fuzz_projects_dir
+    if not os.path.exists(fuzz_dir):
+        print(f"[ERROR] path does not exist: {fuzz_dir}")
+        sys.exit(-1)
+
+    targets = load_soak_targets(fuzz_dir)
+    targets = [t for t in targets if prepare_soak_target(t)]
+    if len(targets) == 0:
+        print(f"No useful fuzz targets available in directory: {fuzz_dir}")
+        sys.exit(-1)
+
+    print(f"Soaking {len(targets)} useful fuzz targets on {args.jobs} cores")
+    very_start = datetime.datetime.utcnow()
+    try:
+        soak(
+            targets,
+            args.jobs,
+            args.slice_seconds,
+            max_total_time=args.max_total_time,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted. Stopping.")
+
+    print_soak_status(targets)
+    very_end = datetime.datetime.utcnow()
+    total_duration = very_end - very_start
+    print(f"Soak total duration: {total_duration}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+
+from fuzzomatic.tools.constants import (
+    FUZZOMATIC_DATA_DIR,
+    APPROACH_OUTCOMES_FILENAME,
+    BANDIT_TOKENS_PER_SECOND,
+)
+from fuzzomatic.tools.budget import check_budget
+from fuzzomatic.tools.cancellation import check_stopped
+from fuzzomatic.tools.llm import new_llm_usage, track_llm_usage
+
+# prior belief: one useful fuzz target per this cost,
+# in seconds, LLM tokens or seconds plus tokens converted to seconds
+PRIOR_COSTS = {
+    "time": 600,
+    "tokens": 20000,
+    "both": 600 + 20000 / BANDIT_TOKENS_PER_SECOND,
+}
+# rough (seconds, tokens) of a run of each approach, until some are recorded
+DEFAULT_APPROACH_COSTS = {
+    "functions": (600, 2000),
+    "readme": (120, 6000),
+    "examples": (240, 12000),
+    "unit_tests": (240, 9000),
+    "unit_tests_with_function": (300, 9000),
+    "benches": (240, 12000),
+}
+# weight of the outcomes of other kinds of code bases
+POOLED_WEIGHT = 0.2
+SMALL_SOURCE_BYTES = 64 * 1024
+LARGE_SOURCE_BYTES = 1024 * 1024
+
+stats_lock = threading.Lock()
+outcomes_lock = threading.Lock()
+
+
+def get_approach_outcomes_path():
+    return os.path.join(FUZZOMATIC_DATA_DIR, APPROACH_OUTCOMES_FILENAME)
+
+
+def approach_context(index):
+    # kind of code base, the approaches do not yield the same everywhere
+    if index["source_bytes"] < SMALL_SOURCE_BYTES:
+        size = "small"
+    elif index["source_bytes"] < LARGE_SOURCE_BYTES:
+        size = "medium"
+    else:
+        size = "large"
+    crate_type = "lib" if index["has_lib"] else "bin"
+    return f"{crate_type}:{size}"
+
+
+def new_approach_stats(context):
+    stats = new_llm_usage()
+    stats["context"] = context
+    stats["seconds"] = 0.0
+    # approaches that never ran, e.g. the stop condition was reached before,
+    # have no outcome
+    stats["started"] = False
+    return stats
+
+
+def add_approach_usage(approach_stats, approach_name, seconds, usage):
+    with stats_lock:
+        stats = approach_stats[approach_name]
+        stats["started"] = True
+        stats["seconds"] += seconds
+        for key, value in usage.items():
+            stats[key] += value
+
+
+@contextlib.contextmanager
+def charge_approach(approach_stats, approach_name):
+    # the time and LLM tokens spent in the block are charged to the approach,
+    # it is not started when nothing can run anymore
+    check_budget()
+    check_stopped()
+    start = time.monotonic()
+    usage = new_llm_usage()
+    try:
+        with track_llm_usage(usage):
+            yield
+    finally:
+        if approach_stats is not None and approach_name in approach_stats:
+            seconds = time.monotonic() - start
+            add_approach_usage(approach_stats, approach_name, seconds, usage)
+
+
+def approach_outcomes(approach_stats, generated_fuzz_targets):
+    outcomes = []
+    for approach_name, stats in approach_stats.items():
+        if not stats["started"]:
+            continue
+        targets = [
+            t
+            for t in generated_fuzz_targets
+            if t["successful_approach"] == approach_name
+        ]
+        outcomes.append(
+            {
+                "approach": approach_name,
+                "context": stats["context"],
+                "seconds": stats["seconds"],
+                "total_tokens": stats["total_tokens"],
+                "building": len(targets),
+                "useful": sum(1 for t in targets if t["is_useful"]),
+            }
+        )
+    return outcomes
+
+
+def record_approach_outcomes(outcomes, path=None):
+    if path is None:
+        path = get_approach_outcomes_path()
+    with outcomes_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as fout:
+            for outcome in outcomes:
+                fout.write(json.dumps(outcome) + "\n")
+
+
+def load_approach_outcomes(path=None):
+    if path is None:
+        path = get_approach_outcomes_path()
+    if not os.path.exists(path):
+        return []
+    outcomes = []
+    with open(path) as f:
+        for line in f:
+            try:
+                outcomes.append(json.loads(line))
+            except json.JSONDecodeError:
+                # partially written line
+                continue
+    return outcomes
+
+
+def expected_approach_costs(outcomes=None):
+    # mean (seconds, tokens) of a run of each approach
+    if outcomes is None:
+        outcomes = load_approach_outcomes()
+    totals = {}
+    for outcome in outcomes:
+        runs, seconds, tokens = totals.get(outcome["approach"], (0, 0.0, 0))
+        totals[outcome["approach"]] = (
+            runs + 1,
+            seconds + outcome["seconds"],
+            tokens + outcome["total_tokens"],
+        )
+    costs = dict(DEFAULT_APPROACH_COSTS)
+    for approach_name, (runs, seconds, tokens) in totals.items():
+        costs[approach_name] = (seconds / runs, tokens / runs)
+    return costs
+
+
+def approach_cost(outcome, reward):
+    if reward == "time":
+        return outcome["seconds"]
+    if reward == "tokens":
+        return outcome["total_tokens"]
+    return outcome["seconds"] + outcome["total_tokens"] / BANDIT_TOKENS_PER_SECOND
+
+
+def approach_posteriors(outcomes, context, reward="time"):
+    # useful fuzz targets arrive as a Poisson process over the cost of an
+    # approach, its rate has a Gamma(alpha, beta) posterior. Outcomes of
+    # other kinds of code bases only weigh as a prior
+    totals = {}
+    for outcome in outcomes:
+        same_context = outcome["context"] == context
+        key = (outcome["approach"], same_context)
+        useful, cost = totals.get(key, (0, 0.0))
+        totals[key] = (
+            useful + outcome["useful"],
+            cost + approach_cost(outcome, reward),
+        )
+
+    posteriors = {}
+    for approach_name in set(name for name, _ in totals):
+        pooled_useful, pooled_cost = totals.get((approach_name, False), (0, 0.0))
+        useful, cost = totals.get((approach_name, True), (0, 0.0))
+        alpha = 1 + POOLED_WEIGHT * pooled_useful + useful
+        beta = PRIOR_COSTS[reward] + POOLED_WEIGHT * pooled_cost + cost
+        posteriors[approach_name] = (alpha, beta)
+    return posteriors
+
+
+def order_approaches(approaches, context, outcomes, reward="time", rng=None):
+    # Thompson sampling: approaches run in order of a rate sampled from
+    # their posterior, so uncertain approaches still get explored.
+    # Returns the ordered approaches and the sampled rates
+    if len(outcomes) == 0:
+        # nothing learned yet, keep the static order
+        return list(approaches), {}
+    if rng is None:
+        rng = random.Random()
+    posteriors = approach_posteriors(outcomes, context, reward=reward)
+    prior = (1, PRIOR_COSTS[reward])
+    rates = {}
+    for approach_name, _ in approaches:
+        alpha, beta = posteriors.get(approach_name, prior)
+        rates[approach_name] = rng.gammavariate(alpha, 1 / beta)
+    ordered = sorted(approaches, key=lambda a: rates[a[0]], reverse=True)
+    return ordered, rates
+
+
+def order_approaches_adaptively(approaches, context, reward="time"):
+    outcomes = load_approach_outcomes()
+    approaches, rates = order_approaches(approaches, context, outcomes, reward=reward)
+    if len(rates) == 0:
+        print("No approach outcomes recorded yet, keeping the approach order")
+    else:
+        print(f"Approach order for {context} code bases ({reward} reward):")
+        for approach_name, _ in approaches:
+            print(f"{approach_name}: sampled rate {rates[approach_name]:.3g}")
+    return approaches
@@ -0,0 +1,147 @@
+import contextlib
+import threading
+import time
+
+# approaches are picked by cost once less than this fraction of a budget remains
+BUDGET_LOW_FRACTION = 0.5
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class Budget:
+    # wall time and LLM tokens allowed to a code base or a batch,
+    # 0 means no limit
+    __slots__ = ("name", "max_seconds", "max_tokens", "start", "tokens", "lock")
+
+    def __init__(self, name, max_seconds=0, max_tokens=0):
+        self.name = name
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.start = time.monotonic()
+        self.tokens = 0
+        self.lock = threading.Lock()
+
+    def is_limited(self):
+        return self.max_seconds > 0 or self.max_tokens > 0
+
+    def spent_seconds(self):
+        return time.monotonic() - self.start
+
+    def charge_tokens(self, tokens):
+        with self.lock:
+            self.tokens += tokens
+
+    def remaining(self):
+        # remaining (seconds, tokens), None when not limited
+        seconds = None
+        if self.max_seconds > 0:
+            seconds = max(self.max_seconds - self.spent_seconds(), 0)
+        tokens = None
+        if self.max_tokens > 0:
+            tokens = max(self.max_tokens - self.tokens, 0)
+        return seconds, tokens
+
+    def remaining_fraction(self):
+        fractions = []
+        seconds, tokens = self.remaining()
+        if seconds is not None:
+            fractions.append(seconds / self.max_seconds)
+        if tokens is not None:
+            fractions.append(tokens / self.max_tokens)
+        if len(fractions) == 0:
+            return None
+        return min(fractions)
+
+    def exhausted(self):
+        # the resource that ran out, None if there is some left
+        seconds, tokens = self.remaining()
+        if seconds is not None and seconds <= 0:
+            return "time"
+        if tokens is not None and tokens <= 0:
+            return "tokens"
+        return None
+
+    def status(self):
+        return {
+            "budget": self.name,
+            "resource": self.exhausted(),
+            "seconds": round(self.spent_seconds(), 1),
+            "tokens": self.tokens,
+        }
+
+
+# budgets of the code base and the batch being processed, shared by all threads
+active_budgets = []
+
+
+@contextlib.contextmanager
+def use_budget(budget):
+    if not budget.is_limited():
+        yield budget
+        return
+    active_budgets.append(budget)
+    try:
+        yield budget
+    finally:
+        active_budgets.remove(budget)
+
+
+def charge_budget_tokens(tokens):
+    for budget in list(active_budgets):
+        budget.charge_tokens(tokens)
+
+
+def exhausted_budget():
+    for budget in list(active_budgets):
+        if budget.exhausted() is not None:
+            return budget
+    return None
+
+
+def check_budget():
+    # called before each LLM request and fuzz target build
+    budget = exhausted_budget()
+    if budget is not None:
+        raise BudgetExhausted(f"{budget.name} {budget.exhausted()} budget exhausted")
+
+
+def run_within_budget(generator, budget):
+    # the budget applies while the results are consumed,
+    # they end when a budget ran out
+    with use_budget(budget):
+        try:
+            yield from generator
+        except BudgetExhausted as e:
+            print(e)
+
+
+def remaining_budget_fraction():
+    fractions = [b.remaining_fraction() for b in list(active_budgets)]
+    fractions = [f for f in fractions if f is not None]
+    if len(fractions) == 0:
+        return None
+    return min(fractions)
+
+
+def relative_cost(seconds, tokens):
+    # share of the most constrained remaining budget that a cost would take
+    share = 0.0
+    for budget in list(active_budgets):
+        remaining_seconds, remaining_tokens = budget.remaining()
+        if remaining_seconds is not None:
+            share = max(share, seconds / max(remaining_seconds, 1))
+        if remaining_tokens is not None:
+            share = max(share, tokens / max(remaining_tokens, 1))
+    return share
+
+
+def next_approach(approaches, expected_costs):
+    # the next approach in order, or the cheapest one when the budget runs low
+    fraction = remaining_budget_fraction()
+    if fraction is None or fraction > BUDGET_LOW_FRACTION:
+        return approaches[0]
+    return min(
+        approaches, key=lambda a: relative_cost(*expected_costs.get(a[0], (0, 0)))
+    )
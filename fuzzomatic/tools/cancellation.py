@@ -0,0 +1,35 @@
+import contextlib
+import threading
+
+
+class Stopped(Exception):
+    pass
+
+
+# stop events of the workers the current thread runs for, e.g. set once
+# the stop condition is reached, nested workers inherit those of their parent
+stop_events_local = threading.local()
+
+
+def current_stop_events():
+    return list(getattr(stop_events_local, "events", []))
+
+
+@contextlib.contextmanager
+def stop_when_set(events):
+    previous = current_stop_events()
+    stop_events_local.events = list(events)
+    try:
+        yield
+    finally:
+        stop_events_local.events = previous
+
+
+def is_stopped():
+    return any(event.is_set() for event in current_stop_events())
+
+
+def check_stopped():
+    # called before each LLM request and fuzz target build
+    if is_stopped():
+        raise Stopped("worker stopped")
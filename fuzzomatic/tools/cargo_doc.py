@@ -1,43 +1,78 @@
-import copy
 import glob
+import hashlib
 import json
 import os
+import shutil
 import subprocess
 
-from fuzzomatic.tools.utils import detect_crate_name
+from fuzzomatic.tools import commands
+from fuzzomatic.tools.constants import FUZZOMATIC_DATA_DIR, CARGO_DOC_CACHE_DIRNAME
+from fuzzomatic.tools.utils import (
+    detect_crate_name,
+    load_toml,
+    write_json_atomically,
+)
 
+# directories that never contain sources of the library itself
+IGNORED_SOURCE_DIRS = ["target", "fuzz", ".git"]
 
-def parse_item(index, it, path):
-    functions = []
 
+def parse_item(index, item_id, memo, visiting):
+    # returns the public functions reachable from an item as
+    # (path relative to the item, function id, function name, args) tuples
+    if item_id in memo:
+        return memo[item_id]
+    if item_id in visiting:
+        # re-export cycle, the item is already being walked
+        return ()
+
+    it = index[item_id]
     if it["visibility"] != "public":
-        return []
+        memo[item_id] = ()
+        return ()
 
+    visiting.add(item_id)
+    functions = ()
     if "module" in it["inner"]:
         module = it["inner"]["module"]
         module_name = it["name"]
-        path.append(module_name)
-        funcs = parse_module(index, module, path)
-        functions.extend(funcs)
+        funcs = parse_module(index, module, memo, visiting)
+        functions = prefix_functions(module_name, funcs)
     elif "import" in it["inner"]:
         imp = it["inner"]["import"]
-        funcs = parse_import(index, imp, path)
-        functions.extend(funcs)
+        functions = parse_import(index, imp, memo, visiting)
     elif "struct" in it["inner"]:
         struct = it["inner"]["struct"]
         struct_name = it["name"]
-        path.append(struct_name)
-        funcs = parse_struct(index, struct, path)
-        functions.extend(funcs)
+        funcs = parse_struct(index, struct, memo, visiting)
+        functions = prefix_functions(struct_name, funcs)
     elif "function" in it["inner"]:
-        funcs = parse_function(index, it, path)
-        functions.extend(funcs)
+        functions = parse_function(index, item_id, it)
+    visiting.discard(item_id)
 
+    memo[item_id] = functions
     return functions
 
 
-def parse_function(index, it, path):
-    functions = []
+def prefix_functions(name, functions):
+    return tuple(
+        ((name, *path), fid, fname, args) for path, fid, fname, args in functions
+    )
+
+
+def deduplicate_functions(functions):
+    # the same function can be reachable through several re-exports,
+    # only keep its shortest path
+    best = {}
+    for f in functions:
+        path, fid = f[0], f[1]
+        if fid not in best or len(path) < len(best[fid][0]):
+            best[fid] = f
+    return tuple(best.values())
+
+
+def parse_function(index, item_id, it):
+    functions = ()
     if "function" in it["inner"] and it["visibility"] == "public":
         function_name = it["name"]
         function_decl = it["inner"]["function"]["decl"]
@@ -52,7 +87,7 @@ def parse_function(index, it, path):
                 args.append(arg_type)
             else:
                 args.append("self")
-        functions.append((path, function_name, args))
+        functions = (((), item_id, function_name, args),)
     return functions
 
 
@@ -95,60 +130,206 @@ def determine_arg_type(index, extra):
     return arg_type
 
 
-def parse_struct(index, struct, path):
+def parse_struct(index, struct, memo, visiting):
     functions = []
     impls = struct["impls"]
     for impl in impls:
         impl = index[impl]
         items = impl["inner"]["impl"]["items"]
         for item in items:
-            item = index[item]
-            funcs = parse_item(index, item, copy.deepcopy(path))
+            funcs = parse_item(index, item, memo, visiting)
             functions.extend(funcs)
 
-    return functions
+    return deduplicate_functions(functions)
 
 
-def parse_module(index, module, path):
+def parse_module(index, module, memo, visiting):
     functions = []
     for item in module["items"]:
-        it = index[item]
-        funcs = parse_item(index, it, copy.deepcopy(path))
+        funcs = parse_item(index, item, memo, visiting)
         functions.extend(funcs)
-    return functions
+    return deduplicate_functions(functions)
 
 
-def parse_import(index, imp, path):
-    functions = []
+def parse_import(index, imp, memo, visiting):
     ref = imp["id"]
-    try:
+    if ref not in index:
+        # external item
+        return ()
+
+    if imp.get("glob", False):
+        # pub use module::*; re-exports the module items at the current level
         child_elem = index[ref]
-        funcs = parse_item(index, child_elem, path)
-    except KeyError:
-        funcs = []
-    functions.extend(funcs)
-    return functions
+        if child_elem is not DROPPED_ITEM and "module" in child_elem["inner"]:
+            module = child_elem["inner"]["module"]
+            if ref in visiting:
+                return ()
+            visiting.add(ref)
+            functions = parse_module(index, module, memo, visiting)
+            visiting.discard(ref)
+            return functions
+
+    return parse_item(index, ref, memo, visiting)
+
+
+# items kept in the compact index, other items are only kept as a stub
+KEPT_ITEM_KINDS = ["module", "import", "struct", "impl", "function"]
+DROPPED_ITEM = {"visibility": None, "name": None, "inner": {}}
+STREAM_CHUNK_SIZE = 1024 * 1024
 
 
-def parse_cargo_doc_json(path):
+class JsonStream:
+    # minimal incremental JSON reader:
+    # objects are walked key by key, any other value is decoded at once
+
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if chunk == "":
+            self.eof = True
+            return False
+        # drop what was already consumed
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\n\r":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char} at position {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a number at the end of the buffer may be truncated
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def object_keys(self):
+        # the caller must consume the value of each key before the next one
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"Expected , or }} at position {self.pos}")
+
+    def skip_value(self):
+        if self.peek() == "{":
+            for _ in self.object_keys():
+                self.skip_value()
+        else:
+            self.value()
+
+
+def compact_item(item):
+    inner = item["inner"]
+    kind = None
+    for k in KEPT_ITEM_KINDS:
+        if k in inner:
+            kind = k
+            break
+    if kind is None:
+        return DROPPED_ITEM
+
+    if kind == "module":
+        compact_inner = {"items": inner["module"]["items"]}
+    elif kind == "import":
+        compact_inner = {
+            "id": inner["import"]["id"],
+            "glob": inner["import"].get("glob", False),
+        }
+    elif kind == "struct":
+        compact_inner = {"impls": inner["struct"]["impls"]}
+    elif kind == "impl":
+        compact_inner = {"items": inner["impl"]["items"]}
+    else:
+        compact_inner = {"decl": {"inputs": inner["function"]["decl"]["inputs"]}}
+
+    return {
+        "visibility": item["visibility"],
+        "name": item["name"],
+        "inner": {kind: compact_inner},
+    }
+
+
+def load_cargo_doc_index(path, chunk_size=STREAM_CHUNK_SIZE):
+    # stream the rustdoc JSON file and only keep what parse_item needs
+    root = None
+    index = {}
+    with open(path) as f:
+        stream = JsonStream(f, chunk_size=chunk_size)
+        for key in stream.object_keys():
+            if key == "root":
+                root = stream.value()
+            elif key == "index":
+                for item_id in stream.object_keys():
+                    index[item_id] = compact_item(stream.value())
+            else:
+                stream.skip_value()
+    return root, index
+
+
+def load_cargo_doc_index_full(path):
     with open(path) as f:
         jso = json.loads(f.read())
+    return jso["root"], jso["index"]
+
 
+def parse_cargo_doc_index(root, index):
     # get functions that take only one parameter and that are public
-    root = jso["root"]
-    index = jso["index"]
     root_elem = index[root]
     root_inner_items = root_elem["inner"]["module"]["items"]
 
+    memo = {}
+    visiting = {root}
     functions = []
 
     for elem in root_inner_items:
-        path = []
-        e = index[elem]
-        funcs = parse_item(index, e, path)
+        funcs = parse_item(index, elem, memo, visiting)
         functions.extend(funcs)
 
-    return functions
+    functions = deduplicate_functions(functions)
+    return [(list(path), name, args) for path, _, name, args in functions]
+
+
+def parse_cargo_doc_json(path, streaming=True):
+    if streaming:
+        root, index = load_cargo_doc_index(path)
+    else:
+        root, index = load_cargo_doc_index_full(path)
+    return parse_cargo_doc_index(root, index)
 
 
 def generate_cargo_doc_json(codebase_dir, root_codebase_dir=None):
@@ -169,7 +350,7 @@ def generate_cargo_doc_json(codebase_dir, root_codebase_dir=None):
     json_file_path = None
 
     try:
-        subprocess.check_call(cmd, cwd=codebase_dir)
+        commands.check_call(cmd, "doc", cwd=codebase_dir)
         target_root = codebase_dir
         if root_codebase_dir is not None:
             target_root = root_codebase_dir
@@ -185,3 +366,150 @@ def generate_cargo_doc_json(codebase_dir, root_codebase_dir=None):
         print("Error: failed to generate cargo doc json")
 
     return json_file_path
+
+
+def generate_workspace_cargo_doc_json(root_codebase_dir, member_dirs):
+    # document all the workspace members with a single cargo invocation,
+    # cargo builds them in parallel and shares the workspace target dir
+    packages = {}
+    for member_dir in member_dirs:
+        crate_name = detect_crate_name(member_dir)
+        if crate_name is None:
+            # no library to document
+            continue
+        cargo_toml = load_toml(os.path.join(member_dir, "Cargo.toml"))
+        package_name = cargo_toml["package"]["name"]
+        packages[member_dir] = (package_name, crate_name)
+
+    if len(packages) == 0:
+        return {}
+
+    cmd = ["cargo", "+nightly", "doc", "--no-deps", "--lib"]
+    for package_name, _ in packages.values():
+        cmd.extend(["-p", package_name])
+
+    env = os.environ.copy()
+    env["RUSTDOCFLAGS"] = "--output-format json -Z unstable-options -A rustdoc::all"
+    try:
+        commands.check_call(cmd, "doc", cwd=root_codebase_dir, env=env)
+    except subprocess.CalledProcessError:
+        print("Error: failed to generate cargo doc json for workspace members")
+        return {}
+
+    target = os.path.join(root_codebase_dir, "target", "doc")
+    json_file_paths = {}
+    for member_dir, (_, crate_name) in packages.items():
+        json_file_path = os.path.join(target, f"{crate_name}.json")
+        if os.path.exists(json_file_path):
+            json_file_paths[member_dir] = json_file_path
+    return json_file_paths
+
+
+def get_toolchain_version():
+    cmd = ["rustc", "+nightly", "--version"]
+    try:
+        return commands.check_output(cmd, "toolchain").decode("utf-8").strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def get_git_head(codebase_dir):
+    # only trust HEAD if the sources do not have uncommitted changes,
+    # the fuzz directory is modified by fuzzomatic itself
+    head_cmd = ["git", "rev-parse", "HEAD"]
+    status_cmd = [
+        "git",
+        "status",
+        "--porcelain",
+        "--untracked-files=no",
+        "--",
+        ".",
+        ":(exclude,glob)**/fuzz/**",
+    ]
+    try:
+        head = commands.check_output(
+            head_cmd, "git", cwd=codebase_dir, stderr=subprocess.DEVNULL
+        )
+        status = commands.check_output(
+            status_cmd, "git", cwd=codebase_dir, stderr=subprocess.DEVNULL
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+    if len(status.strip()) > 0:
+        return None
+    return head.decode("utf-8").strip()
+
+
+def hash_sources(source_dir):
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_SOURCE_DIRS)
+        for f in sorted(files):
+            if not (f.endswith(".rs") or f == "Cargo.toml"):
+                continue
+            file_path = os.path.join(root, f)
+            h.update(os.path.relpath(file_path, source_dir).encode("utf-8"))
+            with open(file_path, "rb") as fin:
+                h.update(fin.read())
+    return h.hexdigest()
+
+
+def cargo_doc_cache_key(codebase_dir, root_codebase_dir=None):
+    toolchain_version = get_toolchain_version()
+    if toolchain_version is None:
+        return None
+
+    source_dir = codebase_dir
+    if root_codebase_dir is not None:
+        # workspace members may depend on each other
+        source_dir = root_codebase_dir
+
+    source_id = get_git_head(source_dir)
+    if source_id is None:
+        source_id = hash_sources(source_dir)
+
+    h = hashlib.sha256()
+    h.update(toolchain_version.encode("utf-8"))
+    h.update(source_id.encode("utf-8"))
+    h.update(os.path.relpath(codebase_dir, source_dir).encode("utf-8"))
+    cargo_lock_path = os.path.join(source_dir, "Cargo.lock")
+    if os.path.exists(cargo_lock_path):
+        with open(cargo_lock_path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def get_cargo_doc_cache_dir(cache_key):
+    return os.path.join(FUZZOMATIC_DATA_DIR, CARGO_DOC_CACHE_DIRNAME, cache_key)
+
+
+def load_cached_cargo_doc(cache_key):
+    # returns the cached rustdoc json path and scored functions
+    index_path = os.path.join(get_cargo_doc_cache_dir(cache_key), "functions.json")
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path) as f:
+        cached = json.loads(f.read())
+
+    functions = []
+    for path, name, args, score in cached["functions"]:
+        # json turns the array argument type tuples into lists
+        args = [tuple(arg) if isinstance(arg, list) else arg for arg in args]
+        functions.append([path, name, args, score])
+
+    json_path = os.path.join(get_cargo_doc_cache_dir(cache_key), cached["json_file"])
+    if not os.path.exists(json_path):
+        json_path = None
+    return json_path, functions
+
+
+def save_cached_cargo_doc(cache_key, json_path, functions):
+    cache_dir = get_cargo_doc_cache_dir(cache_key)
+    os.makedirs(cache_dir, exist_ok=True)
+    json_file = os.path.basename(json_path)
+    tmp_path = os.path.join(cache_dir, f"{json_file}.{os.getpid()}.tmp")
+    shutil.copyfile(json_path, tmp_path)
+    os.replace(tmp_path, os.path.join(cache_dir, json_file))
+    cached = {"json_file": json_file, "functions": functions}
+    write_json_atomically(os.path.join(cache_dir, "functions.json"), cached)
@@ -0,0 +1,134 @@
+import os
+import re
+
+from fuzzomatic.tools.constants import PARENT_README_ENABLED
+
+IGNORED_DIRS = ["target", "fuzz", ".git"]
+README_FILENAMES = [
+    "README.md",
+    "README",
+    "README.txt",
+    "readme.txt",
+    "README.MD",
+    "BUILDING",
+    "USAGE",
+]
+PUBLIC_FUNCTION_REGEX = re.compile(
+    r"\bpub\s+(?:const\s+|async\s+|unsafe\s+)*fn\s+\w+\s*(?:<[^>{]*>)?\s*\(([^)]*)\)"
+)
+BYTES_ARG_REGEX = re.compile(r"&\s*(?:'\w+\s+)?(?:mut\s+)?(?:str\b|\[u8\])")
+SELF_ARG_REGEX = re.compile(r"^\s*&?\s*(?:'\w+\s+)?(?:mut\s+)?self\s*$")
+
+# max number of inputs each approach tries, more inputs do not help
+APPROACH_INPUT_LIMITS = {
+    "functions": 8,
+    "readme": None,
+    "examples": 5,
+    "unit_tests": 3,
+    "unit_tests_with_function": 3,
+    "benches": 5,
+}
+
+
+def count_code_blocks(path):
+    with open(path, errors="ignore") as f:
+        return f.read().count("```") // 2
+
+
+def find_readme_paths(codebase_dir, parent_readme=False):
+    paths = list(README_FILENAMES)
+    # if a parent virtual manifest was detected, also try to use the parent README file
+    if parent_readme and PARENT_README_ENABLED:
+        paths.append("../README.md")
+
+    readmes = []
+    for path in paths:
+        full_path = os.path.join(codebase_dir, path)
+        if os.path.exists(full_path):
+            readmes.append(full_path)
+    return readmes
+
+
+def has_lib_target(codebase_dir):
+    if os.path.exists(os.path.join(codebase_dir, "src", "lib.rs")):
+        return True
+    cargo_toml_path = os.path.join(codebase_dir, "Cargo.toml")
+    if os.path.exists(cargo_toml_path):
+        with open(cargo_toml_path, errors="ignore") as f:
+            return any(line.strip() == "[lib]" for line in f)
+    return False
+
+
+def build_codebase_index(codebase_dir, parent_readme=False):
+    # one pass over the files of the code base, tells which approaches
+    # have something to work with before running any of them
+    index = {
+        "readmes": [],
+        "examples": [],
+        "benches": [],
+        "unit_tests": 0,
+        "public_functions": 0,
+        "bytes_functions": 0,
+        "source_bytes": 0,
+        "has_lib": has_lib_target(codebase_dir),
+    }
+    for readme_path in find_readme_paths(codebase_dir, parent_readme=parent_readme):
+        if os.path.isfile(readme_path):
+            index["readmes"].append((readme_path, count_code_blocks(readme_path)))
+
+    examples_dir = os.path.join(codebase_dir, "examples")
+    benches_dir = os.path.join(codebase_dir, "benches")
+    for root, dirs, files in os.walk(codebase_dir):
+        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+        for name in files:
+            if not name.endswith(".rs"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                with open(path, errors="ignore") as f:
+                    source = f.read()
+            except OSError:
+                continue
+
+            # only the top level files, like the examples approach
+            if root == examples_dir:
+                index["examples"].append((path, len(source)))
+            elif root == benches_dir:
+                index["benches"].append((path, len(source)))
+
+            index["source_bytes"] += len(source)
+            index["unit_tests"] += source.count("#[test]")
+            for m in PUBLIC_FUNCTION_REGEX.finditer(source):
+                args = m.group(1).split(",")
+                args = [a for a in args if a.strip() and not SELF_ARG_REGEX.match(a)]
+                if len(args) > 0:
+                    index["public_functions"] += 1
+                # public functions taking &str or &[u8] are easy to fuzz
+                if BYTES_ARG_REGEX.search(m.group(1)):
+                    index["bytes_functions"] += 1
+    return index
+
+
+def approach_inputs(index):
+    # number of inputs available to each approach
+    inputs = {
+        "functions": index["public_functions"] if index["has_lib"] else 0,
+        "readme": sum(1 for _, blocks in index["readmes"] if blocks > 0),
+        "examples": len(index["examples"]),
+        "unit_tests": index["unit_tests"],
+        "unit_tests_with_function": index["unit_tests"],
+        "benches": len(index["benches"]),
+    }
+    for name, limit in APPROACH_INPUT_LIMITS.items():
+        if limit is not None:
+            inputs[name] = min(inputs[name], limit)
+    return inputs
+
+
+def applicable_approaches(approaches, index):
+    # skip approaches without inputs, the ones with most inputs go first.
+    # Approaches unknown to the index are kept
+    inputs = approach_inputs(index)
+    applicable = [a for a in approaches if inputs.get(a[0], 1) > 0]
+    skipped = [a[0] for a in approaches if a not in applicable]
+    return sorted(applicable, key=lambda a: inputs.get(a[0], 0), reverse=True), skipped
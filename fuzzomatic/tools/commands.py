@@ -0,0 +1,301 @@
+import collections
+import contextlib
+import os
+import signal
+import subprocess
+import threading
+import time
+
+from fuzzomatic.tools.constants import (
+    DEFAULT_COMMAND_TIMEOUTS,
+    MAX_COMMAND_OUTPUT_BYTES,
+)
+
+# seconds between SIGTERM and SIGKILL of a timed out command
+KILL_GRACE_SECONDS = 5
+# seconds to wait for the output once the command exited,
+# processes it left behind may keep the pipe open
+OUTPUT_DRAIN_SECONDS = 5
+
+command_timeouts = dict(DEFAULT_COMMAND_TIMEOUTS)
+
+
+class CommandTimeout(subprocess.CalledProcessError):
+    # callers handle a timed out command like a failed one
+    def __init__(self, cmd, timeout, output=None, stderr=None):
+        super().__init__(-signal.SIGKILL, cmd, output=output, stderr=stderr)
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"Command '{self.cmd}' timed out after {self.timeout} seconds"
+
+
+def configure_command_timeouts(timeouts):
+    command_timeouts.update(timeouts)
+
+
+def get_command_timeout(kind):
+    return command_timeouts.get(kind, command_timeouts["default"])
+
+
+# per kind stats the commands of the current thread are recorded into,
+# worker threads record into those of the code base they work for
+command_stats_local = threading.local()
+command_stats_lock = threading.Lock()
+
+
+def current_command_stats():
+    return list(getattr(command_stats_local, "stats", []))
+
+
+@contextlib.contextmanager
+def use_command_stats(stats_list):
+    previous = current_command_stats()
+    command_stats_local.stats = list(stats_list)
+    try:
+        yield
+    finally:
+        command_stats_local.stats = previous
+
+
+@contextlib.contextmanager
+def record_commands(stats):
+    with use_command_stats(current_command_stats() + [stats]):
+        yield stats
+
+
+def with_command_stats(function):
+    # binds a function run in a worker thread to the stats of this thread
+    stats_list = current_command_stats()
+
+    def run(*args, **kwargs):
+        with use_command_stats(stats_list):
+            return function(*args, **kwargs)
+
+    return run
+
+
+def run_recording_commands(generator, stats):
+    with record_commands(stats):
+        yield from generator
+
+
+def record_command(kind, cmd, result):
+    with command_stats_lock:
+        for stats in current_command_stats():
+            kind_stats = stats.setdefault(
+                kind,
+                {
+                    "count": 0,
+                    "seconds": 0.0,
+                    "failures": 0,
+                    "timeouts": 0,
+                    "timed_out_commands": [],
+                },
+            )
+            kind_stats["count"] += 1
+            kind_stats["seconds"] = round(kind_stats["seconds"] + result["seconds"], 3)
+            if result["returncode"] != 0:
+                kind_stats["failures"] += 1
+            if result["timed_out"]:
+                kind_stats["timeouts"] += 1
+                kind_stats["timed_out_commands"].append(" ".join(cmd))
+
+
+def read_output(stream, output, start, max_bytes):
+    # keeps the first and last lines, up to max_bytes in total (None means
+    # everything, e.g. for JSON output), with the time each line was read at
+    for line in iter(stream.readline, b""):
+        line_time = time.monotonic() - start
+        if max_bytes is None or output["head_bytes"] + len(line) <= max_bytes // 2:
+            output["head"].append((line_time, line))
+            output["head_bytes"] += len(line)
+            continue
+        output["tail"].append((line_time, line))
+        output["tail_bytes"] += len(line)
+        while output["tail_bytes"] > max_bytes // 2 and len(output["tail"]) > 1:
+            _, dropped = output["tail"].popleft()
+            output["tail_bytes"] -= len(dropped)
+            output["truncated_bytes"] += len(dropped)
+    stream.close()
+
+
+def new_output():
+    return {
+        "head": [],
+        "tail": collections.deque(),
+        "head_bytes": 0,
+        "tail_bytes": 0,
+        "truncated_bytes": 0,
+    }
+
+
+def join_output(output):
+    lines = output["head"]
+    if output["truncated_bytes"] > 0:
+        marker = f"... {output['truncated_bytes']} bytes truncated ...\n"
+        line_time = lines[-1][0] if len(lines) > 0 else 0.0
+        lines = lines + [(line_time, marker.encode("utf-8"))]
+    lines = lines + list(output["tail"])
+    return b"".join(line for _, line in lines), [t for t, _ in lines]
+
+
+def kill_process_group(process):
+    # the command runs in its own session, its whole process tree is killed
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        process.wait(timeout=KILL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def run_command(
+    cmd,
+    kind,
+    cwd=None,
+    env=None,
+    stdout=subprocess.PIPE,
+    stderr=None,
+    input=None,
+    timeout=None,
+    max_output_bytes=MAX_COMMAND_OUTPUT_BYTES,
+):
+    # stdout and stderr are passed like for subprocess,
+    # the captured output is bounded and the command is killed on timeout,
+    # a timeout of 0 means no timeout
+    if timeout is None:
+        timeout = get_command_timeout(kind)
+
+    start = time.monotonic()
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        env=env,
+        # never wait for a prompt
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=stdout,
+        stderr=stderr,
+        start_new_session=True,
+    )
+
+    outputs = {}
+    threads = []
+    for name, stream in [("stdout", process.stdout), ("stderr", process.stderr)]:
+        if stream is None:
+            continue
+        outputs[name] = new_output()
+        thread = threading.Thread(
+            target=read_output,
+            args=(stream, outputs[name], start, max_output_bytes),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    if input is not None:
+        thread = threading.Thread(
+            target=write_input, args=(process.stdin, input), daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+
+    timed_out = False
+    try:
+        process.wait(timeout=timeout if timeout > 0 else None)
+    except subprocess.TimeoutExpired:
+        print(f"Command timed out after {timeout} seconds: {' '.join(cmd)}")
+        timed_out = True
+        kill_process_group(process)
+    except BaseException:
+        # e.g. KeyboardInterrupt, do not leave the command running
+        kill_process_group(process)
+        raise
+
+    for thread in threads:
+        thread.join(timeout=OUTPUT_DRAIN_SECONDS)
+    if any(thread.is_alive() for thread in threads):
+        kill_process_group(process)
+        for thread in threads:
+            thread.join()
+
+    result = {
+        "returncode": process.returncode,
+        "seconds": time.monotonic() - start,
+        "timed_out": timed_out,
+        "timeout": timeout,
+        "output": None,
+        "line_times": None,
+        "stderr": None,
+        "truncated_bytes": 0,
+    }
+    if "stdout" in outputs:
+        result["output"], result["line_times"] = join_output(outputs["stdout"])
+        result["truncated_bytes"] += outputs["stdout"]["truncated_bytes"]
+    if "stderr" in outputs:
+        result["stderr"], _ = join_output(outputs["stderr"])
+        result["truncated_bytes"] += outputs["stderr"]["truncated_bytes"]
+
+    record_command(kind, cmd, result)
+    return result
+
+
+def write_input(stdin, input):
+    try:
+        stdin.write(input)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def check_result(cmd, result):
+    if result["timed_out"]:
+        raise CommandTimeout(
+            cmd, result["timeout"], output=result["output"], stderr=result["stderr"]
+        )
+    if result["returncode"] != 0:
+        raise subprocess.CalledProcessError(
+            result["returncode"],
+            cmd,
+            output=result["output"],
+            stderr=result["stderr"],
+        )
+
+
+def check_output(
+    cmd,
+    kind,
+    cwd=None,
+    env=None,
+    stderr=None,
+    timeout=None,
+    max_output_bytes=MAX_COMMAND_OUTPUT_BYTES,
+):
+    result = run_command(
+        cmd,
+        kind,
+        cwd=cwd,
+        env=env,
+        stderr=stderr,
+        timeout=timeout,
+        max_output_bytes=max_output_bytes,
+    )
+    check_result(cmd, result)
+    return result["output"]
+
+
+def check_call(cmd, kind, cwd=None, env=None, stdout=None, stderr=None, timeout=None):
+    result = run_command(
+        cmd, kind, cwd=cwd, env=env, stdout=stdout, stderr=stderr, timeout=timeout
+    )
+    check_result(cmd, result)
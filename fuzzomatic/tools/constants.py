@@ -1,3 +1,5 @@
+import os
+
 DEFAULT_TARGET_NAME = "auto"
 FUZZOMATIC_RESULTS_FILENAME = ".fuzzomatic_results.json"
 PARENT_README_ENABLED = False
@@ -7,3 +9,48 @@ EXIT_NOT_A_CARGO_PROJECT = 100
 EXIT_PROJECT_ALREADY_FUZZED = 101
 EXIT_PROJECT_DOES_NOT_BUILD = 102
 EXIT_OPENAI_API_KEY_ERROR = 103
+FUZZOMATIC_DATA_DIR = os.environ.get(
+    "FUZZOMATIC_DATA_DIR", os.path.join(os.path.expanduser("~"), ".fuzzomatic")
+)
+CRASH_SIGNATURES_FILENAME = "crash_signatures.json"
+DEFAULT_TRIAGE_WORKERS = 4
+DEFAULT_LIBFUZZER_OPTIONS = {"timeout": 5, "rss_limit_mb": 2048}
+DEFAULT_SOAK_SLICE_SECONDS = 300
+SOAK_CORPUS_DIRNAME = "soak_corpus"
+COVERAGE_CACHE_DIRNAME = "coverage"
+CARGO_DOC_CACHE_DIRNAME = "cargo_doc"
+FUNCTION_OUTCOMES_FILENAME = "function_outcomes.jsonl"
+FUNCTION_MODEL_FILENAME = "function_model.json"
+JINJA_CACHE_DIRNAME = "jinja"
+FIX_PROMPT_ERROR_TOKEN_BUDGET = 2000
+FIX_KNOWLEDGE_FILENAME = "fix_knowledge.json"
+WORKERS_DIRNAME = "workers"
+DEFAULT_PIPELINE_QUEUE_SIZE = 2
+DEFAULT_PIPELINE_STAGE_WORKERS = {"llm": 2, "validate": 1, "build": 1, "evaluate": 1}
+DEFAULT_LLM_MAX_CONCURRENT_REQUESTS = 4
+BUILD_CACHE_DIRNAME = "build_cache"
+DEFAULT_PREFETCH_CODEBASES = 1
+CODEBASE_OUTCOMES_FILENAME = "codebase_outcomes.jsonl"
+MIN_SCHEDULING_SAMPLES = 20
+APPROACH_OUTCOMES_FILENAME = "approach_outcomes.jsonl"
+# LLM tokens that cost as much as one second of wall time
+BANDIT_TOKENS_PER_SECOND = 50
+# seconds, per kind of external command
+DEFAULT_COMMAND_TIMEOUTS = {
+    "build": 1800,
+    "check": 1800,
+    "fetch": 900,
+    "doc": 1800,
+    "cargo": 300,
+    "git": 600,
+    "semgrep": 300,
+    "rustfmt": 60,
+    "toolchain": 60,
+    # on top of the fuzzing time
+    "fuzz": 600,
+    "coverage": 1800,
+    "minimize": 600,
+    "copy": 1800,
+    "default": 600,
+}
+MAX_COMMAND_OUTPUT_BYTES = 1024 * 1024
@@ -0,0 +1,226 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+
+import toml
+
+from fuzzomatic.tools import commands
+from fuzzomatic.tools.cargo_doc import hash_sources
+from fuzzomatic.tools.constants import (
+    DEFAULT_TARGET_NAME,
+    FUZZOMATIC_DATA_DIR,
+    COVERAGE_CACHE_DIRNAME,
+)
+from fuzzomatic.tools.utils import write_json_atomically
+
+# only count the code of the library itself,
+# not the standard library, dependencies or the fuzz target
+IGNORED_COVERAGE_FILES_REGEX = (
+    r"/rustc/|/\.cargo/registry/|/\.cargo/git/|/fuzz_targets/"
+)
+
+
+def get_host_triple():
+    cmd = ["rustc", "+nightly", "-vV"]
+    try:
+        output = commands.check_output(cmd, "toolchain").decode("utf-8")
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        print("Failed to detect rustc host triple")
+        return None
+
+    for line in output.split("\n"):
+        if line.startswith("host: "):
+            return line.replace("host: ", "").strip()
+    return None
+
+
+def find_llvm_cov(host_triple):
+    llvm_cov = shutil.which("llvm-cov")
+    if llvm_cov is not None:
+        return llvm_cov
+
+    # llvm-tools-preview rustup component
+    cmd = ["rustc", "+nightly", "--print", "sysroot"]
+    try:
+        sysroot = commands.check_output(cmd, "toolchain").decode("utf-8").strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    llvm_cov = os.path.join(sysroot, "lib", "rustlib", host_triple, "bin", "llvm-cov")
+    if os.path.exists(llvm_cov):
+        return llvm_cov
+    return None
+
+
+def hash_corpus(corpus_dir):
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(corpus_dir)):
+        path = os.path.join(corpus_dir, name)
+        if not os.path.isfile(path):
+            continue
+        h.update(name.encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def local_dependency_dirs(fuzz_project_dir):
+    # the library and e.g. the workspace members it depends on
+    dirs = [os.path.join(fuzz_project_dir, os.path.pardir)]
+    try:
+        manifest = toml.load(os.path.join(fuzz_project_dir, "Cargo.toml"))
+    except (OSError, toml.TomlDecodeError):
+        return dirs
+    for dependency in manifest.get("dependencies", {}).values():
+        if isinstance(dependency, dict) and "path" in dependency:
+            dirs.append(os.path.join(fuzz_project_dir, dependency["path"]))
+    return sorted(set(os.path.realpath(d) for d in dirs))
+
+
+def coverage_cache_key(fuzz_project_dir, fuzz_target_code, corpus_dir):
+    # the same for isolated copies of a code base, and changes with the
+    # library sources, the fuzz crate dependencies and the corpus
+    h = hashlib.sha256()
+    for source_dir in local_dependency_dirs(fuzz_project_dir):
+        h.update(hash_sources(source_dir).encode("utf-8"))
+    for filename in ["Cargo.toml", "Cargo.lock"]:
+        path = os.path.join(fuzz_project_dir, filename)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                h.update(f.read())
+    h.update(fuzz_target_code.encode("utf-8"))
+    h.update(hash_corpus(corpus_dir).encode("utf-8"))
+    return h.hexdigest()
+
+
+def get_coverage_cache_path(cache_key):
+    return os.path.join(
+        FUZZOMATIC_DATA_DIR, COVERAGE_CACHE_DIRNAME, f"{cache_key}.json"
+    )
+
+
+def load_cached_coverage(cache_key):
+    cache_path = get_coverage_cache_path(cache_key)
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.loads(f.read())
+    return None
+
+
+def run_cargo_fuzz_coverage(fuzz_project_dir, target_name, corpus_dir):
+    cmd = ["cargo", "+nightly", "fuzz", "coverage", target_name, corpus_dir]
+
+    env = os.environ.copy()
+    env["RUSTFLAGS"] = "-A warnings"
+    try:
+        print("Measuring coverage...")
+        commands.check_output(
+            cmd, "coverage", cwd=fuzz_project_dir, stderr=subprocess.STDOUT, env=env
+        )
+        return True
+    except subprocess.CalledProcessError as e:
+        cmd_str = " ".join(cmd)
+        print(f"Failed to run command: {cmd_str}")
+        print(e.output.decode("utf-8"))
+        return False
+
+
+def export_coverage_summary(llvm_cov, binary_path, profdata_path):
+    cmd = [
+        llvm_cov,
+        "export",
+        "-summary-only",
+        f"-instr-profile={profdata_path}",
+        f"-ignore-filename-regex={IGNORED_COVERAGE_FILES_REGEX}",
+        binary_path,
+    ]
+    try:
+        output = commands.check_output(
+            cmd, "coverage", stderr=subprocess.DEVNULL, max_output_bytes=None
+        )
+    except subprocess.CalledProcessError:
+        cmd_str = " ".join(cmd)
+        print(f"Failed to run command: {cmd_str}")
+        return None
+
+    return parse_coverage_summary(json.loads(output.decode("utf-8")))
+
+
+def parse_coverage_summary(jso):
+    totals = jso["data"][0]["totals"]
+    coverage = {}
+    for kind in ["lines", "functions", "regions"]:
+        if kind in totals:
+            coverage[kind] = {
+                "count": totals[kind]["count"],
+                "covered": totals[kind]["covered"],
+                "percent": round(totals[kind]["percent"], 2),
+            }
+    return coverage
+
+
+def measure_coverage(
+    fuzz_project_dir, fuzz_target_code, target_name=DEFAULT_TARGET_NAME
+):
+    corpus_dir = os.path.join(fuzz_project_dir, "corpus", target_name)
+    if not os.path.exists(corpus_dir) or len(os.listdir(corpus_dir)) == 0:
+        print("No corpus available to measure coverage")
+        return None
+
+    cache_key = coverage_cache_key(fuzz_project_dir, fuzz_target_code, corpus_dir)
+    coverage = load_cached_coverage(cache_key)
+    if coverage is not None:
+        print("Using cached coverage")
+        return coverage
+
+    host_triple = get_host_triple()
+    if host_triple is None:
+        return None
+    llvm_cov = find_llvm_cov(host_triple)
+    if llvm_cov is None:
+        print(
+            "llvm-cov not found. Install it with: "
+            "rustup +nightly component add llvm-tools-preview"
+        )
+        return None
+
+    if not run_cargo_fuzz_coverage(fuzz_project_dir, target_name, corpus_dir):
+        return None
+
+    profdata_path = os.path.join(
+        fuzz_project_dir, "coverage", target_name, "coverage.profdata"
+    )
+    binary_path = os.path.join(
+        fuzz_project_dir,
+        "target",
+        host_triple,
+        "coverage",
+        host_triple,
+        "release",
+        target_name,
+    )
+    if not os.path.exists(binary_path):
+        # older cargo fuzz versions do not nest the target triple
+        candidates = glob.glob(
+            os.path.join(fuzz_project_dir, "target", "**", "release", target_name),
+            recursive=True,
+        )
+        candidates = [c for c in candidates if "coverage" in c]
+        if len(candidates) == 0:
+            print("Failed to find coverage binary")
+            return None
+        binary_path = candidates[0]
+
+    coverage = export_coverage_summary(llvm_cov, binary_path, profdata_path)
+    if coverage is not None:
+        write_json_atomically(get_coverage_cache_path(cache_key), coverage)
+    return coverage
+
+
+def line_coverage_percent(fuzz_target_result):
+    coverage = fuzz_target_result.get("coverage")
+    if coverage is None or "lines" not in coverage:
+        return None
+    return coverage["lines"]["percent"]
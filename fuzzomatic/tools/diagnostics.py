@@ -0,0 +1,138 @@
+import json
+import re
+
+DIAGNOSTIC_HEADER_REGEX = re.compile(
+    r"^(?P<level>error|warning)(\[(?P<code>[A-Z]\d{4})\])?: (?P<message>.*)$"
+)
+DIAGNOSTIC_LOCATION_REGEX = re.compile(r"^\s*--> (?P<location>\S+:\d+:\d+)")
+
+# summaries printed by rustc and cargo after the actual errors
+IGNORED_ERROR_MESSAGES = [
+    "aborting due to",
+    "could not compile",
+    "build failed, waiting for other jobs to finish",
+]
+
+# rough estimate used to keep prompts under a token budget
+CHARS_PER_TOKEN = 4
+
+
+def parse_json_diagnostic(line):
+    # cargo --message-format=json
+    try:
+        jso = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(jso, dict) or jso.get("reason") != "compiler-message":
+        return None
+
+    message = jso["message"]
+    code = None
+    if message.get("code") is not None:
+        code = message["code"]["code"]
+    location = None
+    for span in message.get("spans", []):
+        if span["is_primary"]:
+            location = (
+                f"{span['file_name']}:{span['line_start']}:{span['column_start']}"
+            )
+            break
+    return {
+        "level": message["level"],
+        "code": code,
+        "message": message["message"],
+        "location": location,
+        "rendered": message.get("rendered") or message["message"],
+    }
+
+
+def parse_diagnostics(output):
+    diagnostics = []
+    current = None
+    for line in output.split("\n"):
+        if line.startswith("{"):
+            diagnostic = parse_json_diagnostic(line)
+            if diagnostic is not None:
+                diagnostics.append(diagnostic)
+                current = None
+                continue
+
+        m = None
+        if line.startswith(("error", "warning")):
+            m = DIAGNOSTIC_HEADER_REGEX.match(line)
+        if m is not None:
+            current = {
+                "level": m.group("level"),
+                "code": m.group("code"),
+                "message": m.group("message"),
+                "location": None,
+                "lines": [line],
+            }
+            diagnostics.append(current)
+        elif current is not None:
+            if len(line.strip()) == 0:
+                # diagnostics end with an empty line
+                current = None
+                continue
+            current["lines"].append(line)
+            if current["location"] is None and "-->" in line:
+                m = DIAGNOSTIC_LOCATION_REGEX.match(line)
+                if m is not None:
+                    current["location"] = m.group("location")
+
+    for diagnostic in diagnostics:
+        if "lines" in diagnostic:
+            diagnostic["rendered"] = "\n".join(diagnostic.pop("lines"))
+    return diagnostics
+
+
+def is_primary_error(diagnostic):
+    if diagnostic["level"] != "error":
+        return False
+    return not any(m in diagnostic["message"] for m in IGNORED_ERROR_MESSAGES)
+
+
+def deduplicate_diagnostics(diagnostics):
+    seen = set()
+    unique = []
+    for diagnostic in diagnostics:
+        # errors without a code, like cargo errors, are told apart by their message
+        key = (
+            diagnostic["code"] or diagnostic["message"],
+            diagnostic["location"],
+        )
+        if key not in seen:
+            seen.add(key)
+            unique.append(diagnostic)
+    return unique
+
+
+def format_build_errors(output, token_budget=None):
+    errors = [d for d in parse_diagnostics(output) if is_primary_error(d)]
+    errors = deduplicate_diagnostics(errors)
+
+    max_chars = None
+    if token_budget is not None:
+        max_chars = token_budget * CHARS_PER_TOKEN
+
+    if len(errors) == 0:
+        # unknown output format, the end of the output is the most relevant
+        output = output.strip()
+        if max_chars is not None and len(output) > max_chars:
+            output = output[-max_chars:]
+        return output
+
+    blocks = []
+    total_chars = 0
+    for error in errors:
+        rendered = error["rendered"].rstrip()
+        if max_chars is not None and len(blocks) > 0:
+            if total_chars + len(rendered) > max_chars:
+                break
+        blocks.append(rendered)
+        total_chars += len(rendered) + 2
+
+    omitted = len(errors) - len(blocks)
+    if omitted > 0:
+        blocks.append(f"... {omitted} more errors omitted")
+    return "\n\n".join(blocks)
@@ -0,0 +1,167 @@
+import difflib
+import json
+import os
+import re
+import threading
+
+from fuzzomatic.tools.constants import FUZZOMATIC_DATA_DIR, FIX_KNOWLEDGE_FILENAME
+from fuzzomatic.tools.diagnostics import (
+    deduplicate_diagnostics,
+    is_primary_error,
+    parse_diagnostics,
+)
+from fuzzomatic.tools.utils import write_json_atomically
+
+CRATE_PLACEHOLDER = "<crate>"
+# only small import fixes are learned from the LLM
+LEARNED_LINE_PREFIXES = ["use ", "extern crate "]
+MAX_LEARNED_LINE_EDITS = 4
+
+fix_knowledge_lock = threading.Lock()
+
+
+def get_fix_knowledge_path():
+    return os.path.join(FUZZOMATIC_DATA_DIR, FIX_KNOWLEDGE_FILENAME)
+
+
+def load_fix_knowledge(path=None):
+    if path is None:
+        path = get_fix_knowledge_path()
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.loads(f.read())
+
+
+def normalize_crate_name(text, crate_name):
+    if crate_name is None:
+        return text
+    return re.sub(rf"\b{re.escape(crate_name)}\b", CRATE_PLACEHOLDER, text)
+
+
+def error_signatures(error, crate_name):
+    # rustc errors are identified by their code and message,
+    # without locations so that they match across codebases.
+    # cargo errors without a code keep their details out of the message
+    errors = [d for d in parse_diagnostics(error) if is_primary_error(d)]
+    errors = [d for d in errors if d["code"] is not None]
+    signatures = []
+    for d in deduplicate_diagnostics(errors):
+        message = normalize_crate_name(d["message"], crate_name)
+        signature = f"{d['code']}: {message}"
+        if signature not in signatures:
+            signatures.append(signature)
+    return signatures
+
+
+def edit_subject(edit):
+    if edit["kind"] == "add_dependency":
+        return edit["dependency"].split("@")[0]
+    if edit["kind"] == "remove_dependency":
+        return edit["name"]
+    return edit["line"]
+
+
+def edit_signatures(edit, signatures):
+    # errors an edit fixes: those naming what the edit touches,
+    # e.g. the unresolved import `serde` for the serde dependency
+    if len(signatures) == 1:
+        return signatures
+    words = set(re.findall(r"\w+", edit_subject(edit).replace("-", "_")))
+    matching = []
+    for signature in signatures:
+        names = re.findall(r"`([^`]+)`", signature)
+        names = [n for n in names if n != CRATE_PLACEHOLDER]
+        if any(set(re.findall(r"\w+", n)) & words for n in names):
+            matching.append(signature)
+    return matching
+
+
+def update_fix_knowledge(signatures, edits, success, path=None):
+    # successes and failures are counted for each edit and error it fixes
+    if path is None:
+        path = get_fix_knowledge_path()
+
+    with fix_knowledge_lock:
+        knowledge = load_fix_knowledge(path)
+        for edit in edits:
+            for signature in edit_signatures(edit, signatures):
+                fixes = knowledge.get(signature, [])
+                for fix in fixes:
+                    if fix["edit"] == edit:
+                        break
+                else:
+                    if not success:
+                        # only successful edits are learned
+                        continue
+                    fix = {"edit": edit, "successes": 0, "failures": 0}
+                    knowledge.setdefault(signature, []).append(fix)
+                if success:
+                    fix["successes"] += 1
+                else:
+                    fix["failures"] += 1
+        write_json_atomically(path, knowledge)
+
+
+def learn_fix(signatures, edits, path=None):
+    if len(signatures) > 0 and len(edits) > 0:
+        update_fix_knowledge(signatures, edits, True, path=path)
+
+
+def record_fix_failure(signatures, edits, path=None):
+    if len(signatures) > 0 and len(edits) > 0:
+        update_fix_knowledge(signatures, edits, False, path=path)
+
+
+def find_known_edits(signatures, path=None):
+    # edits that worked more often than not for each known signature
+    knowledge = load_fix_knowledge(path)
+    edits = []
+    for signature in signatures:
+        for fix in knowledge.get(signature, []):
+            if fix["successes"] > fix["failures"] and fix["edit"] not in edits:
+                edits.append(fix["edit"])
+    return edits
+
+
+def code_edits_from_fix(code_before, code_after, crate_name):
+    # import rewrites and extern crate removals done by the LLM
+    before = [line.strip() for line in code_before.split("\n")]
+    after = [line.strip() for line in code_after.split("\n")]
+    edits = []
+    for line in difflib.ndiff(before, after):
+        if line.startswith("? ") or line.startswith("  "):
+            continue
+        kind = "add_line" if line.startswith("+ ") else "remove_line"
+        content = line[2:]
+        if len(content) == 0:
+            continue
+        if not any(content.startswith(p) for p in LEARNED_LINE_PREFIXES):
+            # the fix changed more than imports, it is specific to this code
+            return []
+        edits.append({"kind": kind, "line": normalize_crate_name(content, crate_name)})
+
+    if len(edits) > MAX_LEARNED_LINE_EDITS:
+        return []
+    return edits
+
+
+def apply_code_edits(code, edits, crate_name):
+    lines = code.split("\n")
+    for edit in edits:
+        if edit["kind"] not in ["add_line", "remove_line"]:
+            continue
+        line = edit["line"]
+        if crate_name is not None:
+            line = line.replace(CRATE_PLACEHOLDER, crate_name)
+
+        if edit["kind"] == "remove_line":
+            lines = [ln for ln in lines if ln.strip() != line]
+        elif line not in [ln.strip() for ln in lines]:
+            # add imports after the last top level use or extern crate statement
+            position = 0
+            for i, ln in enumerate(lines):
+                if any(ln.startswith(p) for p in LEARNED_LINE_PREFIXES):
+                    position = i + 1
+            lines.insert(position, line)
+    return "\n".join(lines)
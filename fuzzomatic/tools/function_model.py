@@ -0,0 +1,175 @@
+import datetime
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+
+from fuzzomatic.tools.constants import (
+    FUZZOMATIC_DATA_DIR,
+    FUNCTION_OUTCOMES_FILENAME,
+    FUNCTION_MODEL_FILENAME,
+)
+from fuzzomatic.tools.utils import write_json_atomically
+
+KNOWN_ARG_TYPES = ["&str", "&[u8]", "String", "bool", "char", "unknown", "self"]
+PRIMITIVE_TYPE_REGEX = re.compile(r"^[iuf](8|16|32|64|128|size)$")
+MAX_ARGS_FEATURES = 3
+MAX_PATH_DEPTH_FEATURE = 4
+
+outcomes_lock = threading.Lock()
+
+
+def get_outcomes_path():
+    return os.path.join(FUZZOMATIC_DATA_DIR, FUNCTION_OUTCOMES_FILENAME)
+
+
+def get_model_path():
+    return os.path.join(FUZZOMATIC_DATA_DIR, FUNCTION_MODEL_FILENAME)
+
+
+def arg_type_token(arg_type):
+    if type(arg_type) in [tuple, list]:
+        return arg_type[0]
+    if arg_type in KNOWN_ARG_TYPES:
+        return arg_type
+    if PRIMITIVE_TYPE_REGEX.match(arg_type):
+        return "primitive"
+    return "other"
+
+
+def prev_built_token(prev_built):
+    if prev_built is None:
+        return "none"
+    return str(int(prev_built))
+
+
+def function_features(path, name, args, priority):
+    # features that do not depend on previous attempts
+    features = [
+        f"priority:{priority}",
+        f"arg_count:{min(len(args), MAX_ARGS_FEATURES)}",
+        f"depth:{min(len(path), MAX_PATH_DEPTH_FEATURE)}",
+    ]
+    for i, arg in enumerate(args[:MAX_ARGS_FEATURES]):
+        features.append(f"arg{i}:{arg_type_token(arg)}")
+    for token in name.lower().split("_"):
+        if len(token) > 0:
+            features.append(f"name:{token}")
+    return features
+
+
+def context_features(args, prev_built):
+    # the outcome of the previous attempt is crossed with the first argument type,
+    # on its own it would shift all the candidates alike
+    first_arg = "none"
+    if len(args) > 0:
+        first_arg = arg_type_token(args[0])
+    prev = prev_built_token(prev_built)
+    return [f"prev_built:{prev}", f"prev_built:{prev}|arg0:{first_arg}"]
+
+
+def target_hash(fuzz_target_code):
+    return hashlib.sha256(fuzz_target_code.encode("utf-8")).hexdigest()
+
+
+def append_outcome(record, path=None):
+    if path is None:
+        path = get_outcomes_path()
+    with outcomes_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as fout:
+            fout.write(json.dumps(record) + "\n")
+
+
+def record_function_attempt(features, built, fuzz_target_code=None, path=None):
+    record = {"kind": "attempt", "features": features, "built": built}
+    if fuzz_target_code is not None:
+        record["target"] = target_hash(fuzz_target_code)
+    append_outcome(record, path=path)
+
+
+def record_target_usefulness(fuzz_target_code, is_useful, path=None):
+    record = {
+        "kind": "evaluation",
+        "target": target_hash(fuzz_target_code),
+        "useful": is_useful,
+    }
+    append_outcome(record, path=path)
+
+
+def load_training_samples(path=None):
+    # an attempt is a positive sample if the fuzz target it built was useful
+    if path is None:
+        path = get_outcomes_path()
+    if not os.path.exists(path):
+        return []
+
+    attempts = []
+    useful_targets = set()
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # partially written line
+                continue
+            if record["kind"] == "attempt":
+                attempts.append(record)
+            elif record["kind"] == "evaluation" and record["useful"]:
+                useful_targets.add(record["target"])
+
+    samples = []
+    for attempt in attempts:
+        label = attempt.get("target") in useful_targets
+        samples.append((attempt["features"], int(label)))
+    return samples
+
+
+def sigmoid(x):
+    if x < 0:
+        return math.exp(x) / (1 + math.exp(x))
+    return 1 / (1 + math.exp(-x))
+
+
+def logit(model, features):
+    weights = model["weights"]
+    return model["bias"] + sum(weights.get(f, 0) for f in features)
+
+
+def train_function_model(samples, epochs=30, learning_rate=0.1, l2=0.001, seed=0):
+    # logistic regression with stochastic gradient descent
+    model = {"bias": 0.0, "weights": {}}
+    weights = model["weights"]
+    samples = list(samples)
+    rng = random.Random(seed)
+    for _ in range(epochs):
+        rng.shuffle(samples)
+        for features, label in samples:
+            error = sigmoid(logit(model, features)) - label
+            model["bias"] -= learning_rate * error
+            for f in features:
+                w = weights.get(f, 0.0)
+                weights[f] = w - learning_rate * (error + l2 * w)
+
+    model["samples"] = len(samples)
+    model["positives"] = sum(label for _, label in samples)
+    model["trained_at"] = datetime.datetime.utcnow().isoformat()
+    return model
+
+
+def save_function_model(model, path=None):
+    if path is None:
+        path = get_model_path()
+    write_json_atomically(path, model)
+
+
+def load_function_model(path=None):
+    if path is None:
+        path = get_model_path()
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.loads(f.read())
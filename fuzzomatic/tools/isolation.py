@@ -0,0 +1,156 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+
+from fuzzomatic.tools import commands
+from fuzzomatic.tools.constants import (
+    FUZZOMATIC_DATA_DIR,
+    WORKERS_DIRNAME,
+    BUILD_CACHE_DIRNAME,
+)
+
+# never copied into isolated copies
+IGNORED_DIRS = [".git", "target"]
+# fuzz crate outputs that are not needed to build new fuzz targets
+IGNORED_FUZZ_DIRS = ["target", "corpus", "artifacts", "coverage"]
+
+# original code base dir of each isolated copy, the copies are deleted
+# the next time the code base is processed so results must not use them
+isolated_copies = {}
+
+
+def get_workers_dir(tree_root):
+    h = hashlib.sha256(os.path.realpath(tree_root).encode("utf-8"))
+    return os.path.join(FUZZOMATIC_DATA_DIR, WORKERS_DIRNAME, h.hexdigest()[:16])
+
+
+def link_or_copy(src, dst):
+    # sources are only read, hardlinks are enough
+    try:
+        os.link(src, dst)
+    except OSError:
+        # e.g. across file systems
+        shutil.copy2(src, dst)
+
+
+def copy_tree_linked(src, dst, fuzz_dir):
+    src = os.path.abspath(src)
+    fuzz_dir = os.path.abspath(fuzz_dir)
+    codebase_dir = os.path.dirname(fuzz_dir)
+
+    def ignore(directory, names):
+        ignored = [n for n in names if n in IGNORED_DIRS]
+        if directory == fuzz_dir:
+            ignored.extend(n for n in names if n in IGNORED_FUZZ_DIRS)
+        elif directory != codebase_dir and "fuzz" in names:
+            # fuzz crates of other workspace members
+            if os.path.exists(os.path.join(directory, "fuzz", "Cargo.toml")):
+                ignored.append("fuzz")
+        return ignored
+
+    def copy_function(src_file, dst_file):
+        if src_file.startswith(fuzz_dir + os.sep) or src_file.endswith("Cargo.lock"):
+            # the fuzz crate is modified by the approaches,
+            # and cargo may rewrite lock files in place
+            shutil.copy2(src_file, dst_file)
+        else:
+            link_or_copy(src_file, dst_file)
+
+    shutil.copytree(src, dst, ignore=ignore, copy_function=copy_function, symlinks=True)
+
+
+def seed_build_cache(fuzz_dir, worker_fuzz_dir):
+    # reuse the dependencies already built for the original fuzz crate,
+    # copy-on-write when the file system supports it
+    target_dir = os.path.join(fuzz_dir, "target")
+    if not os.path.isdir(target_dir):
+        return
+    cmd = ["cp", "-a", "--reflink=auto", target_dir, worker_fuzz_dir]
+    try:
+        commands.check_output(cmd, "copy", stderr=subprocess.STDOUT)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        print(f"Failed to seed build cache from: {target_dir}")
+
+
+def create_isolated_copy(codebase_dir, name, root_codebase_dir=None):
+    # returns the codebase dir and root codebase dir inside the copy
+    tree_root = codebase_dir
+    if root_codebase_dir is not None:
+        # workspace members may depend on each other
+        tree_root = root_codebase_dir
+
+    # keyed by code base, workspace members may be processed concurrently
+    worker_root = os.path.join(get_workers_dir(codebase_dir), name)
+    if os.path.exists(worker_root):
+        shutil.rmtree(worker_root)
+
+    tree_root = os.path.abspath(tree_root)
+    codebase_dir = os.path.abspath(codebase_dir)
+    fuzz_dir = os.path.join(codebase_dir, "fuzz")
+    print(f"Creating isolated copy for {name}: {worker_root}")
+    copy_tree_linked(tree_root, worker_root, fuzz_dir)
+
+    worker_codebase_dir = os.path.join(
+        worker_root, os.path.relpath(codebase_dir, tree_root)
+    )
+    worker_codebase_dir = os.path.normpath(worker_codebase_dir)
+    seed_build_cache(fuzz_dir, os.path.join(worker_codebase_dir, "fuzz"))
+    isolated_copies[os.path.realpath(worker_codebase_dir)] = codebase_dir
+
+    worker_root_codebase_dir = None
+    if root_codebase_dir is not None:
+        worker_root_codebase_dir = worker_root
+    return worker_codebase_dir, worker_root_codebase_dir
+
+
+def original_path(path):
+    # the same path in the original code base for a path inside an isolated copy
+    real_path = os.path.realpath(path)
+    for copy_dir, codebase_dir in list(isolated_copies.items()):
+        if real_path == copy_dir or real_path.startswith(copy_dir + os.sep):
+            return os.path.join(codebase_dir, os.path.relpath(real_path, copy_dir))
+    return path
+
+
+def warm_up_fuzz_build(codebase_dir, target_name):
+    # build the dependencies of the fuzz crate once,
+    # before they are shared with the isolated copies
+    cmd = ["cargo", "+nightly", "fuzz", "build", target_name]
+    env = os.environ.copy()
+    env["RUSTFLAGS"] = "-A warnings"
+    print("Building fuzz crate dependencies...")
+    try:
+        commands.check_output(
+            cmd, "build", cwd=codebase_dir, stderr=subprocess.STDOUT, env=env
+        )
+    except subprocess.CalledProcessError:
+        # the default fuzz target may not build, dependencies are still built
+        print("Default fuzz target does not build")
+
+
+def new_build_cache(tree_root):
+    # dependencies built once and shared by the fuzz crates of a workspace
+    return {
+        "lock": threading.Lock(),
+        "dir": os.path.join(get_workers_dir(tree_root), BUILD_CACHE_DIRNAME),
+        "ready": False,
+    }
+
+
+def share_build_cache(build_cache, codebase_dir, target_name):
+    fuzz_dir = os.path.join(codebase_dir, "fuzz")
+    with build_cache["lock"]:
+        if not build_cache["ready"]:
+            # the first fuzz crate builds the dependencies, the others wait
+            warm_up_fuzz_build(codebase_dir, target_name)
+            # snapshot the build, the fuzz crate keeps changing its own target dir
+            if os.path.exists(build_cache["dir"]):
+                shutil.rmtree(build_cache["dir"])
+            os.makedirs(build_cache["dir"])
+            seed_build_cache(fuzz_dir, build_cache["dir"])
+            build_cache["ready"] = True
+        elif not os.path.isdir(os.path.join(fuzz_dir, "target")):
+            print(f"Seeding build cache of: {fuzz_dir}")
+            seed_build_cache(build_cache["dir"], fuzz_dir)
@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
+import contextlib
 import os
 import sys
+import threading
 import time
 
 import openai
 
 import fuzzomatic.tools.utils
-from fuzzomatic.tools.constants import EXIT_OPENAI_API_KEY_ERROR
+from fuzzomatic.tools.constants import (
+    EXIT_OPENAI_API_KEY_ERROR,
+    DEFAULT_LLM_MAX_CONCURRENT_REQUESTS,
+)
+from fuzzomatic.tools.budget import charge_budget_tokens, check_budget
+from fuzzomatic.tools.cancellation import check_stopped
+from fuzzomatic.tools.rate_limit import RateLimiter
 
 DEFAULT_CLIENT = "azure_openai"
 OPENAI_CLIENT = os.environ.get("OPENAI_CLIENT", DEFAULT_CLIENT)
@@ -18,6 +26,48 @@ else:
     DEFAULT_MODEL = os.environ.get("OPENAI_MODEL")
     DEFAULT_MODEL_LONG = os.environ.get("OPENAI_MODEL_LONG")
 
+# shared by all the threads asking the LLM
+LLM_RATE_LIMITER = RateLimiter(DEFAULT_LLM_MAX_CONCURRENT_REQUESTS)
+
+
+# LLM usage of the current thread is added to each of its trackers
+llm_usage_local = threading.local()
+llm_usage_lock = threading.Lock()
+
+
+def new_llm_usage():
+    return {"llm_calls": 0, "in_tokens": 0, "out_tokens": 0, "total_tokens": 0}
+
+
+@contextlib.contextmanager
+def track_llm_usage(usage):
+    trackers = getattr(llm_usage_local, "trackers", ())
+    llm_usage_local.trackers = trackers + (usage,)
+    try:
+        yield usage
+    finally:
+        llm_usage_local.trackers = trackers
+
+
+def record_llm_usage(response):
+    usage = getattr(response, "usage", None)
+    in_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    out_tokens = getattr(usage, "completion_tokens", 0) or 0
+    with llm_usage_lock:
+        for tracker in getattr(llm_usage_local, "trackers", ()):
+            tracker["llm_calls"] += 1
+            tracker["in_tokens"] += in_tokens
+            tracker["out_tokens"] += out_tokens
+            tracker["total_tokens"] += in_tokens + out_tokens
+    charge_budget_tokens(in_tokens + out_tokens)
+
+
+def configure_rate_limit(max_concurrent, requests_per_minute=0):
+    global LLM_RATE_LIMITER
+    LLM_RATE_LIMITER = RateLimiter(
+        max_concurrent, requests_per_minute=requests_per_minute
+    )
+
 
 def ask_llm(
     prompt,
@@ -26,10 +76,13 @@ def ask_llm(
     long_model_retry=True,
     retry=2,
 ):
+    check_budget()
+    check_stopped()
     print("Asking LLM...")
 
     try:
-        response = get_llm_response_raw(model, prompt)
+        with LLM_RATE_LIMITER:
+            response = get_llm_response_raw(model, prompt)
     except openai.BadRequestError:
         if long_model_retry:
             print("LLM call failed")
@@ -49,8 +102,9 @@ def ask_llm(
         print("OpenAI API rate limit reached")
         print(e)
         sleep_seconds = 60
-        print(f"Sleeping for {sleep_seconds} seconds...")
-        time.sleep(sleep_seconds)
+        # other threads would hit the same limit
+        print(f"Pausing all LLM requests for {sleep_seconds} seconds...")
+        LLM_RATE_LIMITER.pause(sleep_seconds)
         print("Retrying")
         return ask_llm(
             prompt,
@@ -92,6 +146,8 @@ def ask_llm(
         print(e)
         sys.exit(EXIT_OPENAI_API_KEY_ERROR)
 
+    record_llm_usage(response)
+
     # Extract the generated text from the API response
     generated_text = response.choices[0].message.content
     print("Got LLM response.")
@@ -0,0 +1,216 @@
+import queue
+import threading
+import time
+
+from fuzzomatic.tools import commands
+from fuzzomatic.tools.budget import BudgetExhausted
+from fuzzomatic.tools.cancellation import Stopped, current_stop_events, stop_when_set
+from fuzzomatic.tools.constants import DEFAULT_PIPELINE_QUEUE_SIZE
+
+# marks the end of the items of a queue
+END = object()
+# end the whole pipeline instead of dropping the item being processed
+FATAL_EXCEPTIONS = (BudgetExhausted, Stopped)
+POLL_SECONDS = 0.1
+
+
+def new_stage_stats():
+    return {
+        "workers": 0,
+        "items_in": 0,
+        "items_out": 0,
+        "busy_seconds": 0.0,
+        # waiting for the previous stage, the input queue is empty
+        "input_wait_seconds": 0.0,
+        # waiting for the next stage, the output queue is full
+        "output_wait_seconds": 0.0,
+    }
+
+
+def take(q, stop):
+    # returns the next item and the time spent waiting for it,
+    # None if the pipeline was stopped
+    start = time.monotonic()
+    while not stop.is_set():
+        try:
+            return q.get(timeout=POLL_SECONDS), time.monotonic() - start
+        except queue.Empty:
+            continue
+    return None, time.monotonic() - start
+
+
+def put(q, item, stop):
+    # returns the time spent waiting for a free spot in the queue
+    start = time.monotonic()
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=POLL_SECONDS)
+            break
+        except queue.Full:
+            continue
+    return time.monotonic() - start
+
+
+def fail_pipeline(failures, error, stop):
+    # the consumer raises the error once the pipeline stopped
+    failures.append(error)
+    stop.set()
+
+
+def run_source(items, outputs, stats, stop, stop_events, failures):
+    try:
+        iterator = iter(items)
+        while not stop.is_set():
+            start = time.monotonic()
+            try:
+                with stop_when_set(stop_events):
+                    item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                stats["busy_seconds"] += time.monotonic() - start
+            stats["items_out"] += 1
+            stats["output_wait_seconds"] += put(outputs, item, stop)
+    except FATAL_EXCEPTIONS as e:
+        fail_pipeline(failures, e, stop)
+    except Exception as e:
+        print(f"Pipeline source failed: {e}")
+    except BaseException as e:
+        fail_pipeline(failures, e, stop)
+    finally:
+        put(outputs, END, stop)
+
+
+def run_stage_worker(
+    name, function, inputs, outputs, stats, lock, running, stop, stop_events, failures
+):
+    try:
+        while True:
+            item, waited = take(inputs, stop)
+            with lock:
+                stats["input_wait_seconds"] += waited
+            if item is None:
+                return
+            if item is END:
+                # let the other workers of this stage see the end too
+                put(inputs, END, stop)
+                break
+
+            start = time.monotonic()
+            try:
+                with stop_when_set(stop_events):
+                    results = function(item)
+            except FATAL_EXCEPTIONS:
+                raise
+            except Exception as e:
+                print(f"Pipeline stage {name} failed: {e}")
+                results = []
+            with lock:
+                stats["items_in"] += 1
+                stats["busy_seconds"] += time.monotonic() - start
+
+            for result in results:
+                waited = put(outputs, result, stop)
+                with lock:
+                    stats["items_out"] += 1
+                    stats["output_wait_seconds"] += waited
+    except BaseException as e:
+        # e.g. sys.exit() or the budget ran out, nothing else can run
+        fail_pipeline(failures, e, stop)
+    finally:
+        with lock:
+            running[name] -= 1
+            last_worker = running[name] == 0
+        if last_worker:
+            put(outputs, END, stop)
+
+
+def run_pipeline(
+    items, stages, queue_size=DEFAULT_PIPELINE_QUEUE_SIZE, stats=None, stop=None
+):
+    # stages are (name, function, workers) tuples, the function of a stage
+    # returns the list of items passed to the next stage.
+    # yields the items returned by the last stage, in order of completion
+    if stats is None:
+        stats = {}
+    if stop is None:
+        stop = threading.Event()
+
+    # LLM requests and builds of the stages stop with the pipeline
+    # and with the workers it runs for
+    stop_events = current_stop_events() + [stop]
+    failures = []
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    lock = threading.Lock()
+    running = {}
+    threads = []
+
+    stats["source"] = new_stage_stats()
+    stats["source"]["workers"] = 1
+    threads.append(
+        threading.Thread(
+            target=commands.with_command_stats(run_source),
+            args=(items, queues[0], stats["source"], stop, stop_events, failures),
+        )
+    )
+    for i, (name, function, workers) in enumerate(stages):
+        stats[name] = new_stage_stats()
+        stats[name]["workers"] = workers
+        running[name] = workers
+        for _ in range(workers):
+            thread = threading.Thread(
+                target=commands.with_command_stats(run_stage_worker),
+                args=(
+                    name,
+                    function,
+                    queues[i],
+                    queues[i + 1],
+                    stats[name],
+                    lock,
+                    running,
+                    stop,
+                    stop_events,
+                    failures,
+                ),
+            )
+            threads.append(thread)
+
+    stats["consumer"] = new_stage_stats()
+    stats["consumer"]["workers"] = 1
+    pipeline_start = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item, waited = take(queues[-1], stop)
+            stats["consumer"]["input_wait_seconds"] += waited
+            if item is None or item is END:
+                break
+            stats["consumer"]["items_in"] += 1
+            start = time.monotonic()
+            yield item
+            stats["consumer"]["busy_seconds"] += time.monotonic() - start
+        if len(failures) > 0:
+            raise failures[0]
+    finally:
+        # items still in flight are dropped
+        stop.set()
+        for thread in threads:
+            thread.join()
+        stats["total_seconds"] = time.monotonic() - pipeline_start
+
+
+def print_pipeline_stats(stats):
+    print("Pipeline stages:")
+    for name, stage in stats.items():
+        if name == "total_seconds":
+            continue
+        print(
+            f"{name}: workers={stage['workers']} "
+            f"in={stage['items_in']} out={stage['items_out']} "
+            f"busy={stage['busy_seconds']:.1f}s "
+            f"input_wait={stage['input_wait_seconds']:.1f}s "
+            f"output_wait={stage['output_wait_seconds']:.1f}s"
+        )
+    print(f"total={stats.get('total_seconds', 0):.1f}s")
@@ -1,49 +1,82 @@
 import os
+import threading
 
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
+from fuzzomatic.tools.constants import (
+    FUZZOMATIC_DATA_DIR,
+    JINJA_CACHE_DIRNAME,
+    FIX_PROMPT_ERROR_TOKEN_BUDGET,
+)
+from fuzzomatic.tools.diagnostics import format_build_errors
 
-def load_file_contents(path):
-    here = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
-    parent_dir = os.path.join(here, os.path.pardir)
+here = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
+package_dir = os.path.normpath(os.path.join(here, os.path.pardir))
+
+template_environment = None
+template_environment_lock = threading.Lock()
 
-    with open(os.path.join(parent_dir, path)) as f:
+
+def load_file_contents(path):
+    with open(os.path.join(package_dir, path)) as f:
         return f.read()
 
 
+def get_template_environment():
+    # templates are compiled once per process, and the compiled
+    # bytecode is reused by later processes
+    global template_environment
+    with template_environment_lock:
+        if template_environment is None:
+            cache_dir = os.path.join(FUZZOMATIC_DATA_DIR, JINJA_CACHE_DIRNAME)
+            os.makedirs(cache_dir, exist_ok=True)
+            template_environment = Environment(
+                loader=FileSystemLoader(package_dir),
+                bytecode_cache=FileSystemBytecodeCache(cache_dir),
+                auto_reload=False,
+            )
+    return template_environment
+
+
+def render_template(path, **kwargs):
+    t = get_template_environment().get_template(path)
+    return t.render(**kwargs)
+
+
 def readme_prompt(readme):
-    t = Template(load_file_contents("templates/prompts/readme.j2"))
-    prompt = t.render(readme=readme)
+    prompt = render_template("templates/prompts/readme.j2", readme=readme)
     return prompt
 
 
-def fix_prompt(code_snippet, error):
-    t = Template(load_file_contents("templates/prompts/fix_code_error.j2"))
-    prompt = t.render(code_snippet=code_snippet, error=error)
+def fix_prompt(code_snippet, error, token_budget=FIX_PROMPT_ERROR_TOKEN_BUDGET):
+    error = format_build_errors(error, token_budget=token_budget)
+    prompt = render_template(
+        "templates/prompts/fix_code_error.j2", code_snippet=code_snippet, error=error
+    )
     return prompt
 
 
 def example_prompt(example_code):
-    t = Template(load_file_contents("templates/prompts/example_code.j2"))
-    prompt = t.render(example_code=example_code)
+    prompt = render_template(
+        "templates/prompts/example_code.j2", example_code=example_code
+    )
     return prompt
 
 
 def unit_test_prompt(test_source_code, use_statements):
-    t = Template(load_file_contents("templates/prompts/unit_test_code.j2"))
-    prompt = t.render(code=test_source_code, use_statements=use_statements)
+    prompt = render_template(
+        "templates/prompts/unit_test_code.j2",
+        code=test_source_code,
+        use_statements=use_statements,
+    )
     return prompt
 
 
 def unit_test_prompt_with_additional_function(
     test_function_code, additional_function_code, use_statements
 ):
-    t = Template(
-        load_file_contents(
-            "templates/prompts/unit_test_code_with_additional_function.j2"
-        )
-    )
-    prompt = t.render(
+    prompt = render_template(
+        "templates/prompts/unit_test_code_with_additional_function.j2",
         test_function_code=test_function_code,
         additional_function_code=additional_function_code,
         use_statements=use_statements,
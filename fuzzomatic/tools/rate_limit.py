@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+class RateLimiter:
+    # limits the number of concurrent requests and the request rate,
+    # shared by all the threads that talk to the same API
+    __slots__ = ("semaphore", "interval", "lock", "next_request_at", "paused_until")
+
+    def __init__(self, max_concurrent, requests_per_minute=0):
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+        self.interval = 0.0
+        if requests_per_minute > 0:
+            self.interval = 60.0 / requests_per_minute
+        self.lock = threading.Lock()
+        self.next_request_at = 0.0
+        self.paused_until = 0.0
+
+    def acquire(self):
+        # returns the time spent waiting
+        start = time.monotonic()
+        self.semaphore.acquire()
+        with self.lock:
+            now = time.monotonic()
+            request_at = max(now, self.next_request_at, self.paused_until)
+            self.next_request_at = request_at + self.interval
+        if request_at > now:
+            time.sleep(request_at - now)
+        return time.monotonic() - start
+
+    def release(self):
+        self.semaphore.release()
+
+    def pause(self, seconds):
+        # e.g. after a rate limit error, no thread sends requests until then
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
@@ -4,17 +4,21 @@ import os.path
 import shutil
 import subprocess
 
+from fuzzomatic.tools import commands
 from fuzzomatic.tools.constants import (
     FUZZOMATIC_RESULTS_FILENAME,
     DEFAULT_MAX_TOTAL_TIME_SECONDS,
     DEFAULT_TARGET_NAME,
+    DEFAULT_LIBFUZZER_OPTIONS,
 )
 
 
 def run_fuzz_target(
     codebase_dir,
-    target_name="auto",
+    target_name=DEFAULT_TARGET_NAME,
     max_total_time_seconds=DEFAULT_MAX_TOTAL_TIME_SECONDS,
+    libfuzzer_options=None,
+    corpus_dir=None,
 ):
     cmd = [
         "cargo",
@@ -22,21 +26,147 @@ def run_fuzz_target(
         "fuzz",
         "run",
         target_name,
+    ]
+    if corpus_dir is not None:
+        cmd.append(corpus_dir)
+    cmd += [
         "--",
         f"-max_total_time={max_total_time_seconds}",
+        "-print_final_stats=1",
     ]
+    cmd.extend(build_libfuzzer_args(libfuzzer_options))
 
-    try:
-        env = os.environ.copy()
-        env["RUSTFLAGS"] = "-A warnings"
-        output = subprocess.check_output(
-            cmd, cwd=codebase_dir, stderr=subprocess.STDOUT, env=env
-        )
-        return True, output
-    except subprocess.CalledProcessError as e:
+    env = os.environ.copy()
+    env["RUSTFLAGS"] = "-A warnings"
+
+    # the output is streamed to know when each status line was printed.
+    # libFuzzer stops by itself, the timeout is for hangs outside of it
+    timeout = max_total_time_seconds + commands.get_command_timeout("fuzz")
+    result = commands.run_command(
+        cmd,
+        "fuzz",
+        cwd=codebase_dir,
+        stderr=subprocess.STDOUT,
+        env=env,
+        timeout=timeout,
+    )
+    output = result["output"]
+    line_times = result["line_times"]
+    if result["returncode"] != 0:
         cmd_str = " ".join(cmd)
         print(f"Failed to run command: {cmd_str}")
-        return False, e.output
+        return False, output, line_times
+    return True, output, line_times
+
+
+def build_libfuzzer_args(libfuzzer_options):
+    if libfuzzer_options is None:
+        libfuzzer_options = DEFAULT_LIBFUZZER_OPTIONS
+    return [f"-{name}={value}" for name, value in libfuzzer_options.items()]
+
+
+def parse_size(size):
+    # libFuzzer sizes look like 123b, 4Kb or 2Mb
+    units = {"b": 1, "Kb": 1024, "Mb": 1024 * 1024}
+    for unit in ["Kb", "Mb", "b"]:
+        if size.endswith(unit):
+            return int(size[: -len(unit)]) * units[unit]
+    return int(size)
+
+
+def parse_status_line(line):
+    # parse a libFuzzer status line, for example:
+    # #1234	NEW    cov: 12 ft: 15 corp: 3/10b lim: 4 exec/s: 617 rss: 31Mb L: 4/4
+    if not line.startswith("#") or "cov: " not in line:
+        return None
+
+    tokens = line.split()
+    status = {"execs": int(tokens[0][1:]), "event": tokens[1]}
+    keys = {"cov:": "cov", "ft:": "ft", "exec/s:": "exec_s", "rss:": "rss_mb"}
+    for i, token in enumerate(tokens[:-1]):
+        value = tokens[i + 1]
+        if token in keys:
+            status[keys[token]] = int(value.replace("Mb", ""))
+        elif token == "corp:":
+            units, size = value.split("/")
+            status["corpus_units"] = int(units)
+            status["corpus_size_bytes"] = parse_size(size)
+    return status
+
+
+def parse_fuzz_stats(output, line_times=None):
+    lines = output.decode("utf-8", "replace").split("\n")
+    if line_times is None:
+        line_times = [None] * len(lines)
+
+    stats = {
+        "total_execs": None,
+        "execs_per_second": None,
+        "peak_rss_mb": None,
+        "coverage": None,
+        "features": None,
+        "corpus_units": None,
+        "corpus_size_bytes": None,
+        "new_units_added": None,
+        "slowest_unit_time_seconds": None,
+        "time_to_first_new_coverage_seconds": None,
+        "execs_to_first_new_coverage": None,
+        "ft_growth": [],
+    }
+
+    final_stats_keys = {
+        "stat::number_of_executed_units:": "total_execs",
+        "stat::average_exec_per_sec:": "execs_per_second",
+        "stat::peak_rss_mb:": "peak_rss_mb",
+        "stat::new_units_added:": "new_units_added",
+        "stat::slowest_unit_time_sec:": "slowest_unit_time_seconds",
+    }
+
+    inited_time = None
+    previous_ft = None
+    for line, line_time in zip(lines, line_times):
+        line = line.strip()
+        if line.startswith("stat::"):
+            key, _, value = line.partition(" ")
+            if key in final_stats_keys:
+                stats[final_stats_keys[key]] = int(value.strip())
+            continue
+
+        status = parse_status_line(line)
+        if status is None:
+            continue
+
+        if status["event"] == "INITED":
+            inited_time = line_time
+        elif status["event"] == "NEW" and stats["execs_to_first_new_coverage"] is None:
+            stats["execs_to_first_new_coverage"] = status["execs"]
+            if line_time is not None and inited_time is not None:
+                elapsed = round(line_time - inited_time, 3)
+                stats["time_to_first_new_coverage_seconds"] = elapsed
+
+        stats["coverage"] = status.get("cov", stats["coverage"])
+        stats["corpus_units"] = status.get("corpus_units", stats["corpus_units"])
+        stats["corpus_size_bytes"] = status.get(
+            "corpus_size_bytes", stats["corpus_size_bytes"]
+        )
+        if (
+            stats["peak_rss_mb"] is None
+            or status.get("rss_mb", 0) > stats["peak_rss_mb"]
+        ):
+            stats["peak_rss_mb"] = status.get("rss_mb", stats["peak_rss_mb"])
+        if status.get("exec_s", 0) > 0:
+            stats["execs_per_second"] = status["exec_s"]
+
+        ft = status.get("ft")
+        if ft is not None and ft != previous_ft:
+            stats["features"] = ft
+            elapsed = None
+            if line_time is not None:
+                elapsed = round(line_time, 3)
+            stats["ft_growth"].append([elapsed, status["execs"], ft])
+            previous_ft = ft
+
+    return stats
 
 
 def is_cov_changing(error):
@@ -83,11 +213,21 @@ def save_runtime_results(codebase_dir, useful, bug_found, error):
 def evaluate_target(
     fuzz_project_dir,
     max_total_time_seconds=DEFAULT_MAX_TOTAL_TIME_SECONDS,
+    libfuzzer_options=None,
+    target_name=DEFAULT_TARGET_NAME,
+    corpus_dir=None,
 ):
     print(f"Evaluating target: {fuzz_project_dir}")
-    success, error = run_fuzz_target(
-        fuzz_project_dir, max_total_time_seconds=max_total_time_seconds
+    success, error, line_times = run_fuzz_target(
+        fuzz_project_dir,
+        target_name=target_name,
+        max_total_time_seconds=max_total_time_seconds,
+        libfuzzer_options=libfuzzer_options,
+        corpus_dir=corpus_dir,
     )
+    stats = parse_fuzz_stats(error, line_times)
+    print(f"exec/s={stats['execs_per_second']}")
+    print(f"peak_rss_mb={stats['peak_rss_mb']}")
     cov_changes, first_cov, last_cov = is_cov_changing(error)
     print(f"Cov changing: {cov_changes}")
     print(f"{first_cov=}")
@@ -99,7 +239,7 @@ def evaluate_target(
     lines = error.decode("utf-8").split("\n")
     for line in lines:
         if panic_pattern in line:
-            if f"fuzz_targets/{DEFAULT_TARGET_NAME}.rs" in line:
+            if f"fuzz_targets/{target_name}.rs" in line:
                 panic_outside_fuzz_target = False
                 break
             else:
@@ -117,7 +257,7 @@ def evaluate_target(
         panic_outside_fuzz_target is not None and panic_outside_fuzz_target
     )
 
-    return is_useful, bug_found, error
+    return is_useful, bug_found, error, stats
 
 
 def cleanup_corpus(t):
@@ -0,0 +1,241 @@
+import json
+import math
+import os
+import random
+import threading
+
+from fuzzomatic.tools.codebase_index import build_codebase_index
+from fuzzomatic.tools.constants import (
+    FUZZOMATIC_DATA_DIR,
+    CODEBASE_OUTCOMES_FILENAME,
+    MIN_SCHEDULING_SAMPLES,
+)
+from fuzzomatic.tools.function_model import logit, sigmoid, train_function_model
+from fuzzomatic.tools.utils import check_has_workspace_members
+
+MAX_BUCKET = 12
+
+outcomes_lock = threading.Lock()
+
+
+def get_codebase_outcomes_path():
+    return os.path.join(FUZZOMATIC_DATA_DIR, CODEBASE_OUTCOMES_FILENAME)
+
+
+def codebase_features(codebase_dir, index=None):
+    # cheap static features, computed without building anything
+    if index is None:
+        index = build_codebase_index(codebase_dir)
+    return {
+        "source_kb": index["source_bytes"] // 1024,
+        "readme_code_blocks": sum(blocks for _, blocks in index["readmes"]),
+        "examples": len(index["examples"]) > 0,
+        "benches": len(index["benches"]) > 0,
+        "unit_tests": index["unit_tests"],
+        "bytes_functions": index["bytes_functions"],
+        "workspace": check_has_workspace_members(codebase_dir),
+    }
+
+
+def log_bucket(n):
+    if n <= 0:
+        return 0
+    return min(int(math.log2(n)) + 1, MAX_BUCKET)
+
+
+def feature_tokens(features):
+    return [
+        f"source_kb:{log_bucket(features['source_kb'])}",
+        f"readme_code_blocks:{log_bucket(features['readme_code_blocks'])}",
+        f"examples:{int(features['examples'])}",
+        f"benches:{int(features['benches'])}",
+        f"unit_tests:{log_bucket(features['unit_tests'])}",
+        f"bytes_functions:{log_bucket(features['bytes_functions'])}",
+        f"workspace:{int(features['workspace'])}",
+    ]
+
+
+def heuristic_success_probability(features):
+    # each approach needs something to start from
+    p = 0.05
+    if features["bytes_functions"] > 0:
+        p += 0.3
+    if features["readme_code_blocks"] > 0:
+        p += 0.15
+    if features["examples"]:
+        p += 0.1
+    if features["benches"]:
+        p += 0.05
+    if features["unit_tests"] > 0:
+        p += 0.1
+    return p
+
+
+def heuristic_duration(features):
+    # seconds, builds and rustdoc get slower with the size of the code base
+    duration = 120 + 0.5 * features["source_kb"]
+    if features["workspace"]:
+        duration *= 3
+    return duration
+
+
+def train_linear_model(samples, epochs=30, learning_rate=0.05, l2=0.001, seed=0):
+    # least squares linear regression with stochastic gradient descent
+    model = {"bias": 0.0, "weights": {}}
+    weights = model["weights"]
+    samples = list(samples)
+    if len(samples) > 0:
+        model["bias"] = sum(target for _, target in samples) / len(samples)
+    rng = random.Random(seed)
+    for _ in range(epochs):
+        rng.shuffle(samples)
+        for features, target in samples:
+            error = logit(model, features) - target
+            model["bias"] -= learning_rate * error
+            for f in features:
+                w = weights.get(f, 0.0)
+                weights[f] = w - learning_rate * (error + l2 * w)
+    return model
+
+
+def codebase_outcome(features, results):
+    useful = sum(1 for t in results["generated_fuzz_targets"] if t["is_useful"])
+    return {
+        "features": features,
+        "duration_seconds": results["duration_seconds"],
+        "outcome_reason": results["outcome_reason"],
+        "useful": useful,
+    }
+
+
+def record_codebase_outcome(outcome, path=None):
+    if path is None:
+        path = get_codebase_outcomes_path()
+    with outcomes_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as fout:
+            fout.write(json.dumps(outcome) + "\n")
+
+
+def load_codebase_outcomes(path=None):
+    if path is None:
+        path = get_codebase_outcomes_path()
+    if not os.path.exists(path):
+        return []
+    outcomes = []
+    with open(path) as f:
+        for line in f:
+            try:
+                outcomes.append(json.loads(line))
+            except json.JSONDecodeError:
+                # partially written line
+                continue
+    return outcomes
+
+
+def train_scheduling_model(outcomes):
+    success_samples = []
+    duration_samples = []
+    for outcome in outcomes:
+        tokens = feature_tokens(outcome["features"])
+        success_samples.append((tokens, int(outcome["useful"] > 0)))
+        duration = max(outcome["duration_seconds"], 1)
+        duration_samples.append((tokens, math.log(duration)))
+    return {
+        "success": train_function_model(success_samples),
+        "duration": train_linear_model(duration_samples),
+        "samples": len(outcomes),
+    }
+
+
+def load_scheduling_model(path=None):
+    # past code bases are few, training on the fly is cheap
+    outcomes = load_codebase_outcomes(path=path)
+    if len(outcomes) < MIN_SCHEDULING_SAMPLES:
+        return None
+    return train_scheduling_model(outcomes)
+
+
+def expected_yield_rate(features, model=None):
+    # probability of finding a useful fuzz target per second spent
+    if model is None:
+        p = heuristic_success_probability(features)
+        duration = heuristic_duration(features)
+    else:
+        tokens = feature_tokens(features)
+        p = sigmoid(logit(model["success"], tokens))
+        duration = math.exp(logit(model["duration"], tokens))
+    return p / max(duration, 1)
+
+
+def schedule_codebases(codebase_dirs, features, model=None):
+    # highest expected yield per second first, ties keep their order
+    return sorted(
+        codebase_dirs,
+        key=lambda d: expected_yield_rate(features[d], model=model),
+        reverse=True,
+    )
+
+
+def simulate_schedule(outcomes):
+    # cumulative (seconds, useful fuzz targets) after each code base
+    curve = []
+    elapsed = 0
+    useful = 0
+    for outcome in outcomes:
+        elapsed += outcome["duration_seconds"]
+        useful += outcome["useful"]
+        curve.append((elapsed, useful))
+    return curve
+
+
+def useful_within(curve, seconds):
+    useful = 0
+    for elapsed, total in curve:
+        if elapsed > seconds:
+            break
+        useful = total
+    return useful
+
+
+def time_to_fraction(curve, fraction):
+    # seconds until the given fraction of the useful fuzz targets was found
+    if len(curve) == 0 or curve[-1][1] == 0:
+        return None
+    for elapsed, useful in curve:
+        if useful >= fraction * curve[-1][1]:
+            return elapsed
+    return None
+
+
+def normalized_yield_area(curve):
+    # area under the useful fuzz targets curve, relative to finding all of them
+    # at time 0. Higher means useful fuzz targets are found earlier
+    if len(curve) == 0 or curve[-1][1] == 0:
+        return 0.0
+    total_seconds, total_useful = curve[-1]
+    if total_seconds == 0:
+        return 1.0
+    area = 0.0
+    previous_elapsed = 0
+    previous_useful = 0
+    for elapsed, useful in curve:
+        # useful fuzz targets are found when a code base completes
+        area += previous_useful * (elapsed - previous_elapsed)
+        previous_elapsed, previous_useful = elapsed, useful
+    return area / (total_seconds * total_useful)
+
+
+def cross_validated_rates(outcomes, folds=5):
+    # the expected yield rate of each outcome, predicted by a model
+    # trained on the other folds
+    rates = [0.0] * len(outcomes)
+    for fold in range(folds):
+        training = [o for i, o in enumerate(outcomes) if i % folds != fold]
+        model = None
+        if len(training) > 0:
+            model = train_scheduling_model(training)
+        for i, outcome in enumerate(outcomes):
+            if i % folds == fold:
+                rates[i] = expected_yield_rate(outcome["features"], model=model)
+    return rates
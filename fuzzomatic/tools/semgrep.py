@@ -2,6 +2,8 @@ import json
 import os
 import subprocess
 
+from fuzzomatic.tools import commands
+
 
 def run_semgrep(ephemeral_rule, function_source_code_file_path):
     semgrep_cmd = [
@@ -15,7 +17,9 @@ def run_semgrep(ephemeral_rule, function_source_code_file_path):
     try:
         print("Running semgrep command (ephemeral):")
         print(" ".join(semgrep_cmd))
-        output = subprocess.check_output(semgrep_cmd, stderr=subprocess.DEVNULL)
+        output = commands.check_output(
+            semgrep_cmd, "semgrep", stderr=subprocess.DEVNULL, max_output_bytes=None
+        )
         decoded_output = output.decode("utf-8")
         jso = json.loads(decoded_output)
         return jso
@@ -36,7 +40,9 @@ def run_semgrep_rule_file(rule_file_path, target_path, autofix=False):
     try:
         print("Running semgrep command:")
         print(" ".join(semgrep_cmd))
-        output = subprocess.check_output(semgrep_cmd, stderr=subprocess.DEVNULL)
+        output = commands.check_output(
+            semgrep_cmd, "semgrep", stderr=subprocess.DEVNULL, max_output_bytes=None
+        )
         decoded_output = output.decode("utf-8")
         jso = json.loads(decoded_output)
         return jso
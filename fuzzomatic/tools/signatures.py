@@ -0,0 +1,172 @@
+import re
+from array import array
+
+INTERESTING_FUNCTION_NAMES_REGEX = re.compile("parse|load|read|str|eval")
+STRING_LIKE_TYPES = ["&str", "&[u8]", "String"]
+
+# function name flags
+NAME_INTERESTING = 1
+NAME_FILE = 2
+
+
+def is_array_type(arg_type):
+    return isinstance(arg_type, tuple) and arg_type[0] == "&array"
+
+
+def signature_priority(args, name_flags):
+    is_name_interesting = name_flags & NAME_INTERESTING
+    arg_type = None
+    if len(args) == 1:
+        arg_type = args[0]
+
+        if arg_type in STRING_LIKE_TYPES:
+            priority = 100
+        elif arg_type == "bool":
+            priority = 0
+        elif arg_type == "unknown":
+            priority = 10
+        elif is_array_type(arg_type):
+            priority = 100
+        elif is_name_interesting:
+            priority = 100
+
+            if args[0] == "self":
+                priority = -15
+        elif args[0] == "self":
+            # functions with "self" as first argument
+            priority = -50
+        else:
+            priority = 50
+    elif len(args) > 1:
+        known_types = len([arg for arg in args if arg != "unknown"])
+        if known_types == len(args):
+            priority = 30
+            if any(arg in STRING_LIKE_TYPES for arg in args):
+                priority = 75
+            if any(is_array_type(arg) for arg in args):
+                priority = 75
+        else:
+            # functions with multiple arguments where not all types are known
+            priority = -10
+
+        if args[0] == "self":
+            # functions with "self" as first argument
+            priority = -50
+    else:
+        # skip functions with no arguments
+        priority = -100
+
+    # give low priority to functions that are likely to load something by filename
+    if name_flags & NAME_FILE and arg_type == "&str":
+        priority = 0
+
+    return priority
+
+
+class FunctionTable:
+    # columns of public functions, argument types are interned so that
+    # functions sharing the same signature are scored only once
+    __slots__ = (
+        "paths",
+        "names",
+        "args",
+        "types",
+        "type_ids",
+        "signatures",
+        "signature_ids",
+        "function_signatures",
+        "priorities",
+    )
+
+    def __init__(self, functions=()):
+        self.paths = []
+        self.names = []
+        self.args = []
+        self.types = []
+        self.type_ids = {}
+        self.signatures = []
+        self.signature_ids = {}
+        self.function_signatures = array("I")
+        self.priorities = None
+        self.extend(functions)
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern_type(self, arg_type):
+        type_id = self.type_ids.get(arg_type)
+        if type_id is None:
+            type_id = len(self.types)
+            self.type_ids[arg_type] = type_id
+            self.types.append(arg_type)
+        return type_id
+
+    def extend(self, functions):
+        name_flags_cache = {}
+        signature_ids = self.signature_ids
+        function_signatures = []
+        for f in functions:
+            path, name, args = f[0], f[1], f[2]
+
+            name_flags = name_flags_cache.get(name)
+            if name_flags is None:
+                name_flags = 0
+                if INTERESTING_FUNCTION_NAMES_REGEX.search(name) is not None:
+                    name_flags |= NAME_INTERESTING
+                if "file" in name:
+                    name_flags |= NAME_FILE
+                name_flags_cache[name] = name_flags
+
+            key = (tuple(args), name_flags)
+            signature_id = signature_ids.get(key)
+            if signature_id is None:
+                signature_id = len(self.signatures)
+                signature_ids[key] = signature_id
+                type_ids = tuple(self.intern_type(arg) for arg in args)
+                self.signatures.append((type_ids, name_flags))
+
+            self.paths.append(path)
+            self.names.append(name)
+            self.args.append(args)
+            function_signatures.append(signature_id)
+
+        self.function_signatures.extend(function_signatures)
+        self.priorities = None
+
+    def score(self):
+        signature_priorities = [
+            signature_priority([self.types[t] for t in type_ids], name_flags)
+            for type_ids, name_flags in self.signatures
+        ]
+        self.priorities = array(
+            "i", map(signature_priorities.__getitem__, self.function_signatures)
+        )
+        return self.priorities
+
+    def ranking(self):
+        # function indices, most interesting first
+        if self.priorities is None:
+            self.score()
+        return sorted(range(len(self)), key=self.priorities.__getitem__, reverse=True)
+
+    def qualified_names(self):
+        return ["::".join([*path, name]) for path, name in zip(self.paths, self.names)]
+
+    def denylisted(self, denylist):
+        # function indices whose fully qualified name contains a denied word
+        if len(denylist) == 0:
+            return set()
+        pattern = re.compile("|".join(re.escape(word) for word in denylist))
+        return {
+            i
+            for i, name in enumerate(self.qualified_names())
+            if pattern.search(name) is not None
+        }
+
+    def rows(self, indices):
+        if self.priorities is None:
+            self.score()
+        return [
+            [self.paths[i], self.names[i], self.args[i], self.priorities[i]]
+            for i in indices
+        ]
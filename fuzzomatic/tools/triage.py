@@ -0,0 +1,377 @@
+import base64
+import concurrent.futures
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+from fuzzomatic.tools import commands
+from fuzzomatic.tools.constants import (
+    CRASH_SIGNATURES_FILENAME,
+    DEFAULT_TRIAGE_WORKERS,
+    FUZZOMATIC_DATA_DIR,
+)
+from fuzzomatic.tools.utils import add_named_fuzz_target, write_json_atomically
+
+# number of meaningful stack frames used to compute a crash signature
+MAX_SIGNATURE_FRAMES = 5
+
+# frames that belong to the runtime, the fuzzer or the sanitizers
+# and that are identical for every crash
+IGNORED_FRAME_PREFIXES = [
+    "__sanitizer",
+    "__asan",
+    "__msan",
+    "__rust",
+    "__libc",
+    "__GI_",
+    "fuzzer::",
+    "LLVMFuzzerTestOneInput",
+    "rust_fuzzer_test_input",
+    "rust_begin_unwind",
+    "rust_panic",
+    "libfuzzer_sys::",
+    "std::",
+    "core::",
+    "alloc::",
+    "panic_abort::",
+    "<std::",
+    "<core::",
+    "<alloc::",
+    "<libfuzzer_sys::",
+]
+IGNORED_FRAMES = ["main", "_start"]
+
+SANITIZER_FRAME_PATTERN = re.compile(
+    r"^\s*#\d+\s+0x[0-9a-fA-F]+\s+in\s+(?P<function>.+?)\s+(?P<location>/\S+|\(\S+\))$"
+)
+BACKTRACE_FRAME_PATTERN = re.compile(r"^\s*\d+:\s+(?P<function>.+)$")
+BACKTRACE_LOCATION_PATTERN = re.compile(r"^\s*at\s+(?P<location>\S+)$")
+RUST_HASH_PATTERN = re.compile(r"::h[0-9a-f]{16}$")
+ARTIFACT_PATTERN = re.compile(r"Test unit written to (?P<path>\S+)")
+MINIMIZED_ARTIFACT_PATTERN = re.compile(r"(?P<path>\S*minimized-from-[0-9a-f]+)")
+
+crash_signatures_lock = threading.Lock()
+# (signature, codebase_dir) of the crashes triaged by this process
+triaged_crashes = set()
+
+
+def detect_crash_kind(output):
+    if "panicked at " in output:
+        return "panic"
+    if "ERROR: libFuzzer: out-of-memory" in output:
+        return "out-of-memory"
+    if "ERROR: libFuzzer: timeout" in output:
+        return "timeout"
+    if "stack-overflow" in output or "has overflowed its stack" in output:
+        return "stack-overflow"
+    if "ERROR: libFuzzer: deadly signal" in output:
+        return "deadly-signal"
+    if "ERROR: AddressSanitizer" in output:
+        return "address-sanitizer"
+    return "unknown"
+
+
+def normalize_source_path(path):
+    # strip machine specific prefixes so that the same source location
+    # yields the same signature on every machine and in every codebase
+    path = path.strip().strip("()")
+    if "/rustc/" in path:
+        return "rustc/" + path.split("/library/", 1)[-1]
+    if "/registry/src/" in path:
+        # ~/.cargo/registry/src/index.crates.io-xxx/crate-1.0.0/src/lib.rs
+        after_registry = path.split("/registry/src/", 1)[1]
+        parts = after_registry.split("/", 1)
+        if len(parts) == 2:
+            return parts[1]
+        return after_registry
+    if "/src/" in path:
+        before, after = path.rsplit("/src/", 1)
+        crate_dir = os.path.basename(before)
+        return f"{crate_dir}/src/{after}"
+    return os.path.basename(path)
+
+
+def normalize_function_name(function_name):
+    function_name = function_name.strip()
+    function_name = RUST_HASH_PATTERN.sub("", function_name)
+    return function_name
+
+
+def parse_panic_location(output):
+    for line in output.split("\n"):
+        if "panicked at " not in line:
+            continue
+        location = line.split("panicked at ", 1)[1].strip()
+
+        # old format: panicked at 'message', src/lib.rs:10:5
+        if location.startswith("'"):
+            location = location.rsplit("', ", 1)[-1]
+
+        # new format: panicked at src/lib.rs:10:5:
+        location = location.rstrip(":")
+        return normalize_source_path(location)
+    return None
+
+
+def is_ignored_frame(function_name, location):
+    if function_name in IGNORED_FRAMES:
+        return True
+    if any(function_name.startswith(p) for p in IGNORED_FRAME_PREFIXES):
+        return True
+    if location is not None:
+        if "/rustc/" in location or "libfuzzer-sys" in location:
+            return True
+        if "fuzz/fuzz_targets/" in location:
+            return True
+    # closure generated by the fuzz_target! macro
+    if "::_::__libfuzzer_sys_run" in function_name:
+        return True
+    return False
+
+
+def parse_stack_frames(output, max_frames=MAX_SIGNATURE_FRAMES):
+    raw_frames = []
+
+    lines = output.split("\n")
+    for i, line in enumerate(lines):
+        match = SANITIZER_FRAME_PATTERN.match(line)
+        if match is not None:
+            raw_frames.append((match.group("function"), match.group("location")))
+            continue
+
+        # RUST_BACKTRACE style frames, with the location on the next line
+        match = BACKTRACE_FRAME_PATTERN.match(line)
+        if match is not None:
+            location = None
+            if i + 1 < len(lines):
+                location_match = BACKTRACE_LOCATION_PATTERN.match(lines[i + 1])
+                if location_match is not None:
+                    location = location_match.group("location")
+            raw_frames.append((match.group("function"), location))
+
+    frames = []
+    for function_name, location in raw_frames:
+        function_name = normalize_function_name(function_name)
+        if is_ignored_frame(function_name, location):
+            continue
+        if function_name in frames:
+            # recursion, only keep the first occurrence
+            continue
+        frames.append(function_name)
+        if len(frames) >= max_frames:
+            break
+
+    return frames
+
+
+def compute_crash_signature(output):
+    kind = detect_crash_kind(output)
+    panic_location = parse_panic_location(output)
+    frames = parse_stack_frames(output)
+
+    signature_parts = [kind, str(panic_location), *frames]
+    digest = hashlib.sha256("\n".join(signature_parts).encode("utf-8"))
+    signature = digest.hexdigest()[:16]
+
+    return {
+        "signature": signature,
+        "kind": kind,
+        "panic_location": panic_location,
+        "frames": frames,
+    }
+
+
+def parse_crash_artifact_path(output, fuzz_project_dir):
+    artifact_path = None
+    for match in ARTIFACT_PATTERN.finditer(output):
+        artifact_path = match.group("path")
+
+    if artifact_path is None:
+        return None
+    if not os.path.isabs(artifact_path):
+        artifact_path = os.path.join(fuzz_project_dir, artifact_path)
+    artifact_path = os.path.realpath(artifact_path)
+    if os.path.exists(artifact_path):
+        return artifact_path
+    return None
+
+
+def get_crash_signatures_path():
+    return os.path.join(FUZZOMATIC_DATA_DIR, CRASH_SIGNATURES_FILENAME)
+
+
+def load_crash_signatures(path=None):
+    if path is None:
+        path = get_crash_signatures_path()
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.loads(f.read())
+
+
+def is_same_origin(origin, other_origin):
+    # e.g. the same code base processed again with --force
+    if origin["codebase_dir"] == other_origin["codebase_dir"]:
+        return True
+    git_url = origin.get("git_url")
+    return git_url is not None and git_url == other_origin.get("git_url")
+
+
+def find_crash_duplicate(signature, crash_origin, path=None):
+    # origin of the first crash with the same signature in another code base,
+    # or in the same code base during this run
+    first_origin = load_crash_signatures(path).get(signature)
+    if first_origin is None:
+        return None
+    if (signature, crash_origin["codebase_dir"]) in triaged_crashes:
+        return first_origin
+    if is_same_origin(first_origin, crash_origin):
+        return None
+    return first_origin
+
+
+def register_crash_signature(signature, crash_origin, path=None):
+    # returns the origin of the first crash with the same signature
+    # or None if this signature was never seen before
+    if path is None:
+        path = get_crash_signatures_path()
+
+    with crash_signatures_lock:
+        signatures = load_crash_signatures(path)
+        if signature in signatures:
+            return signatures[signature]
+
+        crash_origin = dict(crash_origin)
+        crash_origin["first_seen"] = datetime.datetime.utcnow().isoformat()
+        signatures[signature] = crash_origin
+        write_json_atomically(path, signatures)
+
+    return None
+
+
+def triage_crash(
+    fuzz_project_dir, fuzz_target_code, output, crash_origin, run_dir=None
+):
+    # the artifact is saved in fuzz_project_dir, run_dir is where the fuzz
+    # target ran when that was in an isolated copy
+    if run_dir is None:
+        run_dir = fuzz_project_dir
+
+    crash = compute_crash_signature(output)
+    signature = crash["signature"]
+    crash["reproducer_target"] = None
+    crash["artifact_path"] = None
+    crash["minimized_input_path"] = None
+    crash["minimized_input"] = None
+    crash["duplicate_of"] = find_crash_duplicate(signature, crash_origin)
+
+    print(f"Crash signature: {signature}")
+    if crash["duplicate_of"] is not None:
+        print("Crash is a duplicate of a previously found crash:")
+        print(crash["duplicate_of"])
+        return crash
+
+    artifact_path = parse_crash_artifact_path(output, run_dir)
+    if artifact_path is None:
+        print("Could not find crash artifact")
+        return crash
+
+    # copy the artifact so that it survives later fuzzing runs
+    triage_dir = os.path.join(fuzz_project_dir, "artifacts", "triage", signature)
+    os.makedirs(triage_dir, exist_ok=True)
+    saved_artifact_path = os.path.join(triage_dir, os.path.basename(artifact_path))
+    shutil.copyfile(artifact_path, saved_artifact_path)
+    crash["artifact_path"] = saved_artifact_path
+
+    crate_dir = os.path.dirname(fuzz_project_dir)
+    reproducer_name = f"triage_{signature}"
+    # keep the crashing fuzz target around under its own name, so that it
+    # can be minimized after the default target has been overwritten
+    reproducer_path = add_named_fuzz_target(
+        crate_dir, reproducer_name, fuzz_target_code
+    )
+    if reproducer_path is None:
+        return crash
+    crash["reproducer_target"] = reproducer_name
+
+    # only triaged crashes make later ones duplicates
+    register_crash_signature(signature, crash_origin)
+    triaged_crashes.add((signature, crash_origin["codebase_dir"]))
+    return crash
+
+
+def minimize_crash(fuzz_project_dir, reproducer_target, artifact_path):
+    cmd = [
+        "cargo",
+        "+nightly",
+        "fuzz",
+        "tmin",
+        reproducer_target,
+        artifact_path,
+    ]
+
+    print(f"Minimizing crash: {artifact_path}")
+    env = os.environ.copy()
+    env["RUSTFLAGS"] = "-A warnings"
+    try:
+        output = commands.check_output(
+            cmd, "minimize", cwd=fuzz_project_dir, stderr=subprocess.STDOUT, env=env
+        )
+    except subprocess.CalledProcessError as e:
+        # tmin exits with an error if the input cannot be minimized further
+        output = e.output
+
+    minimized_path = None
+    for match in MINIMIZED_ARTIFACT_PATTERN.finditer(output.decode("utf-8", "replace")):
+        minimized_path = match.group("path")
+    if minimized_path is None:
+        return None
+
+    if not os.path.isabs(minimized_path):
+        minimized_path = os.path.join(fuzz_project_dir, minimized_path)
+    minimized_path = os.path.realpath(minimized_path)
+    if os.path.exists(minimized_path):
+        return minimized_path
+
+    return None
+
+
+def minimize_crashes(fuzz_project_dir, crashes, workers=DEFAULT_TRIAGE_WORKERS):
+    # only minimize unique crashes that have a reproducer
+    to_minimize = [
+        c
+        for c in crashes
+        if c["duplicate_of"] is None
+        and c["reproducer_target"] is not None
+        and c["artifact_path"] is not None
+    ]
+    if len(to_minimize) == 0:
+        return
+
+    print(f"Minimizing {len(to_minimize)} unique crashes with {workers} workers")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                commands.with_command_stats(minimize_crash),
+                fuzz_project_dir,
+                c["reproducer_target"],
+                c["artifact_path"],
+            ): c
+            for c in to_minimize
+        }
+        for future in concurrent.futures.as_completed(futures):
+            crash = futures[future]
+            minimized_path = future.result()
+            if minimized_path is None:
+                print(f"Failed to minimize crash {crash['signature']}")
+                minimized_path = crash["artifact_path"]
+
+            with open(minimized_path, "rb") as f:
+                minimized_input = f.read()
+            crash["minimized_input_path"] = minimized_path
+            crash["minimized_input"] = base64.b64encode(minimized_input).decode("ascii")
@@ -4,9 +4,14 @@ import glob
 import json
 import os
 import subprocess
+import threading
 
 import toml
 
+from fuzzomatic.tools import commands
+from fuzzomatic.tools.budget import check_budget
+from fuzzomatic.tools.cancellation import check_stopped
+from fuzzomatic.tools.diagnostics import format_build_errors
 from fuzzomatic.tools.semgrep import run_semgrep_rule_file
 
 
@@ -75,12 +80,15 @@ def rustfmt_target(target_path):
 
     print(f"Running rustfmt on target: {target_path}")
     try:
-        subprocess.check_call(cmd)
+        commands.check_call(cmd, "rustfmt")
     except subprocess.CalledProcessError:
         print("Failed to run rustfmt")
 
 
 def build_target(codebase_dir, target_name):
+    check_budget()
+    check_stopped()
+
     # sanitize fuzz target
     target_path = os.path.join(
         codebase_dir, "fuzz", "fuzz_targets", f"{target_name}.rs"
@@ -111,14 +119,15 @@ def build_target(codebase_dir, target_name):
         env = os.environ.copy()
         env["RUSTFLAGS"] = "-A warnings"
 
-        subprocess.check_output(
-            cmd, cwd=codebase_dir, stderr=subprocess.STDOUT, env=env
+        commands.check_output(
+            cmd, "build", cwd=codebase_dir, stderr=subprocess.STDOUT, env=env
         )
         print("Build success.")
         return True, None, built_code
     except subprocess.CalledProcessError as e:
         print("Failed to build fuzz target")
-        error = e.output.decode("utf-8")
+        # only keep the unique errors, not the notes and dependency build output
+        error = format_build_errors(e.output.decode("utf-8"))
         print(error)
         return False, error, built_code
 
@@ -130,7 +139,9 @@ def git_clone(url, path):
     try:
         env_copy = os.environ.copy()
         env_copy["GIT_TERMINAL_PROMPT"] = "0"
-        subprocess.check_output(cmd, cwd=path, stderr=subprocess.STDOUT, env=env_copy)
+        commands.check_output(
+            cmd, "git", cwd=path, stderr=subprocess.STDOUT, env=env_copy
+        )
     except subprocess.CalledProcessError as e:
         cmd_str = " ".join(cmd)
         print(f"Failed to run command: {cmd_str}")
@@ -151,6 +162,18 @@ def git_clone(url, path):
     return codebase_dir
 
 
+def cargo_fetch(codebase_dir):
+    # download the dependencies of the code base
+    cmd = ["cargo", "fetch"]
+    try:
+        commands.check_output(cmd, "fetch", cwd=codebase_dir, stderr=subprocess.STDOUT)
+        return True
+    except subprocess.CalledProcessError:
+        cmd_str = " ".join(cmd)
+        print(f"Failed to run command: {cmd_str}")
+        return False
+
+
 def add_fuzz_dependency(codebase_dir, dependency, features=[]):
     print(f"Adding dependency {dependency}")
     cargo_toml_path = os.path.join(codebase_dir, "fuzz", "Cargo.toml")
@@ -160,7 +183,7 @@ def add_fuzz_dependency(codebase_dir, dependency, features=[]):
         cmd.append("--features")
         cmd.append(",".join(features))
     try:
-        subprocess.check_output(cmd)
+        commands.check_output(cmd, "cargo")
         return True
     except subprocess.CalledProcessError:
         cmd_str = " ".join(cmd)
@@ -174,12 +197,33 @@ def remove_fuzz_dependency(codebase_dir, dependency):
 
     cmd = ["cargo", "remove", "--manifest-path", cargo_toml_path, dependency]
     try:
-        subprocess.check_output(cmd)
+        commands.check_output(cmd, "cargo")
     except subprocess.CalledProcessError:
         cmd_str = " ".join(cmd)
         print(f"Failed to run command: {cmd_str}")
 
 
+def read_fuzz_manifest(codebase_dir):
+    # contents of the fuzz Cargo.toml and Cargo.lock, None if missing
+    manifest = {}
+    for filename in ["Cargo.toml", "Cargo.lock"]:
+        path = os.path.join(codebase_dir, "fuzz", filename)
+        manifest[path] = None
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest[path] = f.read()
+    return manifest
+
+
+def restore_fuzz_manifest(manifest):
+    for path, contents in manifest.items():
+        if contents is not None:
+            with open(path, "w") as f:
+                f.write(contents)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
 def write_fuzz_target(code_snippet, codebase_dir, target_name):
     # write snippet to file
     fuzz_target_path = build_fuzz_target_path(codebase_dir, target_name)
@@ -193,10 +237,30 @@ def build_fuzz_target_path(codebase_dir, target_name):
     return os.path.join(codebase_dir, "fuzz", "fuzz_targets", f"{target_name}.rs")
 
 
+def add_named_fuzz_target(codebase_dir, target_name, fuzz_target_code):
+    cmd = ["cargo", "fuzz", "add", target_name]
+    try:
+        commands.check_output(cmd, "cargo", cwd=codebase_dir, stderr=subprocess.STDOUT)
+    except subprocess.CalledProcessError:
+        # the target may already exist
+        cmd_str = " ".join(cmd)
+        print(f"Warning: failed to run {cmd_str}")
+
+    fuzz_target_path = build_fuzz_target_path(codebase_dir, target_name)
+    if not os.path.exists(fuzz_target_path):
+        return None
+
+    with open(fuzz_target_path, "w") as fout:
+        fout.write(fuzz_target_code)
+    return fuzz_target_path
+
+
 def init_cargo_fuzz(codebase_dir, target_name):
     cmd_init = ["cargo", "fuzz", "init"]
     try:
-        subprocess.check_output(cmd_init, cwd=codebase_dir, stderr=subprocess.STDOUT)
+        commands.check_output(
+            cmd_init, "cargo", cwd=codebase_dir, stderr=subprocess.STDOUT
+        )
     except subprocess.CalledProcessError as e:
         cmd_str = " ".join(cmd_init)
         print(f"Warning: failed to run {cmd_str}")
@@ -214,7 +278,9 @@ def init_cargo_fuzz(codebase_dir, target_name):
     # try to create target with cargo fuzz, in case it's the first time
     cmd_add = ["cargo", "fuzz", "add", target_name]
     try:
-        subprocess.check_output(cmd_add, cwd=codebase_dir, stderr=subprocess.STDOUT)
+        commands.check_output(
+            cmd_add, "cargo", cwd=codebase_dir, stderr=subprocess.STDOUT
+        )
     except subprocess.CalledProcessError:
         pass
 
@@ -302,7 +368,7 @@ def check_virtual_manifest(codebase_dir):
 def detect_git_url(codebase_dir, remote_name="origin"):
     cmd = ["git", "remote", "get-url", remote_name]
     try:
-        output = subprocess.check_output(cmd, cwd=codebase_dir)
+        output = commands.check_output(cmd, "git", cwd=codebase_dir)
         git_url = output.decode("utf-8").strip()
         return git_url
     except subprocess.CalledProcessError:
@@ -323,7 +389,7 @@ def detect_crate_name(codebase_dir):
     ]
 
     try:
-        output = subprocess.check_output(manifest_cmd)
+        output = commands.check_output(manifest_cmd, "cargo", max_output_bytes=None)
         jso = json.loads(output.decode("utf-8"))
         targets = jso["targets"]
         for target in targets:
@@ -344,6 +410,16 @@ def detect_crate_name(codebase_dir):
     return None
 
 
+def write_json_atomically(file_path, contents):
+    # write to a temporary file first so that concurrent readers
+    # never see a partially written file
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w+") as fout:
+        fout.write(json.dumps(contents))
+    os.replace(tmp_path, file_path)
+
+
 def load_toml(file_path):
     with open(file_path) as f:
         return toml.loads(f.read())
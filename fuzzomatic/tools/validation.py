@@ -0,0 +1,133 @@
+import re
+import shutil
+import subprocess
+
+from fuzzomatic.tools import commands
+
+DELIMITERS = {"(": ")", "[": "]", "{": "}"}
+CLOSING_DELIMITERS = {v: k for k, v in DELIMITERS.items()}
+CHAR_LITERAL_REGEX = re.compile(r"'(\\u\{[0-9a-fA-F]+\}|\\.|[^\\'\n])'")
+RAW_STRING_REGEX = re.compile(r'b?r(#*)"')
+FUZZ_TARGET_BODY_REGEX = re.compile(r"fuzz_target!\s*\(\s*\|[^|]*\|")
+RUSTFMT_TIMEOUT_SECONDS = 10
+
+
+def is_identifier_char(c):
+    return c.isalnum() or c == "_"
+
+
+def find_unclosed_delimiters(code):
+    # returns the delimiters left open at the end of the code,
+    # or an error message if the code cannot be balanced by appending to it
+    stack = []
+    i = 0
+    line = 1
+    while i < len(code):
+        c = code[i]
+        if c == "\n":
+            line += 1
+            i += 1
+        elif code.startswith("//", i):
+            end = code.find("\n", i)
+            i = len(code) if end == -1 else end
+        elif code.startswith("/*", i):
+            depth = 0
+            while i < len(code):
+                if code.startswith("/*", i):
+                    depth += 1
+                    i += 2
+                elif code.startswith("*/", i):
+                    depth -= 1
+                    i += 2
+                    if depth == 0:
+                        break
+                else:
+                    line += code[i] == "\n"
+                    i += 1
+            if depth > 0:
+                return None, f"error: unterminated block comment at line {line}"
+        elif c in "rb" and (i == 0 or not is_identifier_char(code[i - 1])):
+            m = RAW_STRING_REGEX.match(code, i)
+            if m is not None:
+                terminator = '"' + m.group(1)
+                end = code.find(terminator, m.end())
+                if end == -1:
+                    return None, f"error: unterminated raw string at line {line}"
+                line += code.count("\n", i, end)
+                i = end + len(terminator)
+            else:
+                # identifier or byte string prefix
+                i += 1
+        elif c == '"':
+            i += 1
+            while i < len(code) and code[i] != '"':
+                if code[i] == "\\":
+                    i += 1
+                elif code[i] == "\n":
+                    line += 1
+                i += 1
+            if i >= len(code):
+                return None, f"error: unterminated double quote string at line {line}"
+            i += 1
+        elif c == "'":
+            m = CHAR_LITERAL_REGEX.match(code, i)
+            # otherwise a lifetime
+            i = m.end() if m is not None else i + 1
+        elif c in DELIMITERS:
+            stack.append(c)
+            i += 1
+        elif c in CLOSING_DELIMITERS:
+            if len(stack) == 0 or stack[-1] != CLOSING_DELIMITERS[c]:
+                return (
+                    None,
+                    f"error: unexpected closing delimiter: `{c}` at line {line}",
+                )
+            stack.pop()
+            i += 1
+        else:
+            i += 1
+    return stack, None
+
+
+def close_delimiters(code, unclosed):
+    # truncated responses usually stop inside the fuzz_target! macro
+    closers = "".join(DELIMITERS[d] for d in reversed(unclosed))
+    if unclosed[0] == "(":
+        closers += ";"
+    return code.rstrip() + "\n" + closers + "\n"
+
+
+def rustfmt_check(code):
+    # parse the code with rustfmt, without writing it to disk
+    if shutil.which("rustfmt") is None:
+        return None
+    cmd = ["rustfmt", "--edition", "2021"]
+    result = commands.run_command(
+        cmd,
+        "rustfmt",
+        input=code.encode("utf-8"),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        timeout=RUSTFMT_TIMEOUT_SECONDS,
+    )
+    if result["timed_out"]:
+        print("rustfmt timed out, skipping syntax validation")
+    elif result["returncode"] != 0:
+        return result["stderr"].decode("utf-8")
+    return None
+
+
+def validate_fuzz_target(code_snippet):
+    # returns the possibly repaired code snippet and a syntax error, if any
+    if FUZZ_TARGET_BODY_REGEX.search(code_snippet) is None:
+        return code_snippet, "error: missing fuzz_target! closure body"
+
+    unclosed, error = find_unclosed_delimiters(code_snippet)
+    if error is not None:
+        return code_snippet, error
+    if len(unclosed) > 0:
+        print(f"Closing unclosed delimiters: {unclosed}")
+        code_snippet = close_delimiters(code_snippet, unclosed)
+
+    error = rustfmt_check(code_snippet)
+    return code_snippet, error
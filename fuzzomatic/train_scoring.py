@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+
+from fuzzomatic.tools.function_model import (
+    get_model_path,
+    get_outcomes_path,
+    load_training_samples,
+    save_function_model,
+    train_function_model,
+)
+
+
+def get_parser():
+    prog_name = "train-scoring"
+    parser = argparse.ArgumentParser(
+        prog=prog_name,
+        description="Learn target function priorities from previous fuzzomatic runs",
+    )
+    parser.add_argument(
+        "--epochs",
+        dest="epochs",
+        type=int,
+        default=30,
+        help="Number of passes over the recorded function attempts",
+    )
+    parser.add_argument(
+        "--top",
+        dest="top",
+        type=int,
+        default=20,
+        help="Number of most positive and most negative weights to print",
+    )
+    return parser
+
+
+def main():
+    parser = get_parser()
+    args = parser.parse_args()
+
+    samples = load_training_samples()
+    if len(samples) == 0:
+        print(f"No function attempts recorded in: {get_outcomes_path()}")
+        sys.exit(-1)
+
+    model = train_function_model(samples, epochs=args.epochs)
+    save_function_model(model)
+    print(f"Trained on {model['samples']} attempts ({model['positives']} useful)")
+    print(f"Saved model to: {get_model_path()}")
+
+    weights = sorted(model["weights"].items(), key=lambda x: x[1], reverse=True)
+    print()
+    print("Most positive weights:")
+    for feature, weight in weights[: args.top]:
+        print(f"{weight:>8.3f} {feature}")
+    print()
+    print("Most negative weights:")
+    for feature, weight in weights[-args.top :]:
+        print(f"{weight:>8.3f} {feature}")
+
+
+if __name__ == "__main__":
+    main()
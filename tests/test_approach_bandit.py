@@ -0,0 +1,128 @@
+import random
+import types
+
+import pytest
+
+from fuzzomatic.tools import approach_bandit
+from fuzzomatic.tools.budget import Budget, BudgetExhausted, use_budget
+from fuzzomatic.tools.llm import record_llm_usage
+
+APPROACHES = [("functions", None), ("readme", None), ("examples", None)]
+
+
+def outcome(approach, useful, seconds, context="lib:small", total_tokens=0):
+    return {
+        "approach": approach,
+        "context": context,
+        "seconds": seconds,
+        "total_tokens": total_tokens,
+        "building": useful,
+        "useful": useful,
+    }
+
+
+def approach_names(approaches):
+    return [name for name, _ in approaches]
+
+
+def test_no_outcomes_keeps_order():
+    ordered, rates = approach_bandit.order_approaches(APPROACHES, "lib:small", [])
+
+    assert ordered == APPROACHES
+    assert rates == {}
+
+
+def test_order_prefers_higher_yield_per_second():
+    outcomes = []
+    for _ in range(20):
+        outcomes.append(outcome("functions", 0, 900))
+        outcomes.append(outcome("readme", 1, 120))
+        outcomes.append(outcome("examples", 1, 600))
+
+    ordered, _ = approach_bandit.order_approaches(
+        APPROACHES, "lib:small", outcomes, rng=random.Random(0)
+    )
+
+    assert approach_names(ordered) == ["readme", "examples", "functions"]
+
+
+def test_token_reward():
+    outcomes = []
+    for _ in range(20):
+        outcomes.append(outcome("functions", 1, 600, total_tokens=0))
+        outcomes.append(outcome("readme", 1, 60, total_tokens=50000))
+
+    by_time, _ = approach_bandit.order_approaches(
+        APPROACHES[:2], "lib:small", outcomes, reward="time", rng=random.Random(0)
+    )
+    by_tokens, _ = approach_bandit.order_approaches(
+        APPROACHES[:2], "lib:small", outcomes, reward="tokens", rng=random.Random(0)
+    )
+
+    assert approach_names(by_time) == ["readme", "functions"]
+    assert approach_names(by_tokens) == ["functions", "readme"]
+
+
+def test_other_contexts_weigh_less():
+    outcomes = [outcome("functions", 1, 100, context="bin:large")] * 10
+    outcomes += [outcome("functions", 0, 100)] * 10
+
+    posteriors = approach_bandit.approach_posteriors(outcomes, "lib:small")
+
+    alpha, beta = posteriors["functions"]
+    assert alpha == 1 + approach_bandit.POOLED_WEIGHT * 10
+    assert beta == approach_bandit.PRIOR_COSTS["time"] + 200 + 1000
+
+
+def test_charge_approach():
+    approach_stats = {"readme": approach_bandit.new_approach_stats("lib:small")}
+    usage = types.SimpleNamespace(prompt_tokens=100, completion_tokens=20)
+
+    with approach_bandit.charge_approach(approach_stats, "readme"):
+        record_llm_usage(types.SimpleNamespace(usage=usage))
+    # not charged to a running approach
+    record_llm_usage(types.SimpleNamespace(usage=usage))
+
+    stats = approach_stats["readme"]
+    assert stats["llm_calls"] == 1
+    assert stats["in_tokens"] == 100
+    assert stats["total_tokens"] == 120
+    assert stats["seconds"] > 0
+    assert stats["started"]
+
+
+def test_approach_outcomes_roundtrip(tmp_path):
+    approach_stats = {
+        "readme": approach_bandit.new_approach_stats("lib:small"),
+        "examples": approach_bandit.new_approach_stats("lib:small"),
+        "benches": approach_bandit.new_approach_stats("lib:small"),
+    }
+    approach_stats["readme"]["seconds"] = 30.0
+    approach_stats["readme"]["started"] = True
+    approach_stats["examples"]["started"] = True
+    targets = [
+        {"successful_approach": "readme", "is_useful": True},
+        {"successful_approach": "readme", "is_useful": False},
+    ]
+    path = str(tmp_path / "approach_outcomes.jsonl")
+
+    outcomes = approach_bandit.approach_outcomes(approach_stats, targets)
+    approach_bandit.record_approach_outcomes(outcomes, path=path)
+
+    # benches never started, it has no outcome
+    loaded = approach_bandit.load_approach_outcomes(path=path)
+    assert loaded == [
+        outcome("readme", 1, 30.0) | {"building": 2},
+        outcome("examples", 0, 0.0),
+    ]
+
+
+def test_charge_approach_after_budget_ran_out():
+    approach_stats = {"readme": approach_bandit.new_approach_stats("lib:small")}
+    budget = Budget("codebase", max_tokens=10)
+    budget.tokens = 10
+    with use_budget(budget):
+        with pytest.raises(BudgetExhausted):
+            with approach_bandit.charge_approach(approach_stats, "readme"):
+                pass
+    assert not approach_stats["readme"]["started"]
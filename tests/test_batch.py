@@ -0,0 +1,63 @@
+import argparse
+import threading
+
+from fuzzomatic import batch_fuzzomatic
+
+
+def test_prefetch_codebases_prepares_ahead(monkeypatch):
+    prepared = []
+    second_prepared = threading.Event()
+
+    def fake_prepare(codebase_dir, args):
+        prepared.append(codebase_dir)
+        if codebase_dir == "b":
+            second_prepared.set()
+        return codebase_dir != "c", None
+
+    monkeypatch.setattr(batch_fuzzomatic, "prepare_codebase", fake_prepare)
+
+    results = []
+    for t, preparation in batch_fuzzomatic.prefetch_codebases(
+        ["a", "b", "c", "d"], None, depth=1
+    ):
+        if t == "a":
+            # the next code base is prepared while the current one runs
+            assert second_prepared.wait(timeout=5)
+        results.append((t, preparation[0]))
+
+    assert results == [("a", True), ("b", True), ("c", False), ("d", True)]
+    assert sorted(prepared) == ["a", "b", "c", "d"]
+
+
+def test_prefetch_codebases_disabled(monkeypatch):
+    monkeypatch.setattr(batch_fuzzomatic, "prepare_codebase", None)
+    results = list(batch_fuzzomatic.prefetch_codebases(["a", "b"], None, depth=0))
+    assert [t for t, _ in results] == ["a", "b"]
+    assert all(preparation[0] for _, preparation in results)
+
+
+def test_prepare_codebase_drops_codebases(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_fuzzomatic, "detect_git_url", lambda d: None)
+    monkeypatch.setattr(batch_fuzzomatic, "cargo_fetch", lambda d: True)
+    monkeypatch.setattr(
+        batch_fuzzomatic.discovery,
+        "is_project_to_be_skipped",
+        lambda d, git_url: d.endswith("fuzzed"),
+    )
+    monkeypatch.setattr(
+        batch_fuzzomatic,
+        "is_project_building_by_default",
+        lambda d, quiet: not d.endswith("broken"),
+    )
+    args = argparse.Namespace(force=False, approaches=["readme"])
+
+    for name in ["fuzzed", "broken", "ok"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "Cargo.toml").write_text("[package]")
+    (tmp_path / "empty").mkdir()
+
+    prepare = batch_fuzzomatic.prepare_codebase
+    assert prepare(str(tmp_path / "fuzzed"), args) == (False, "project_already_fuzzed")
+    assert prepare(str(tmp_path / "empty"), args) == (False, "not_a_cargo_project")
+    assert prepare(str(tmp_path / "broken"), args) == (False, "project_does_not_build")
+    assert prepare(str(tmp_path / "ok"), args) == (True, None)
@@ -0,0 +1,125 @@
+import argparse
+import types
+
+import pytest
+
+from fuzzomatic import main
+from fuzzomatic.tools import budget as budget_module
+from fuzzomatic.tools.budget import (
+    Budget,
+    BudgetExhausted,
+    check_budget,
+    next_approach,
+    run_within_budget,
+    use_budget,
+)
+from fuzzomatic.tools.llm import record_llm_usage
+
+APPROACHES = [("functions", None), ("readme", None), ("examples", None)]
+EXPECTED_COSTS = {
+    "functions": (600, 2000),
+    "readme": (120, 6000),
+    "examples": (240, 12000),
+}
+
+
+def llm_response(tokens):
+    usage = types.SimpleNamespace(prompt_tokens=tokens, completion_tokens=0)
+    return types.SimpleNamespace(usage=usage)
+
+
+def test_unlimited_budget_is_not_active():
+    with use_budget(Budget("codebase")):
+        assert budget_module.active_budgets == []
+        check_budget()
+
+
+def test_token_budget():
+    budget = Budget("codebase", max_tokens=1000)
+    with use_budget(budget):
+        record_llm_usage(llm_response(600))
+        check_budget()
+        assert budget.remaining() == (None, 400)
+
+        record_llm_usage(llm_response(600))
+        assert budget.exhausted() == "tokens"
+        with pytest.raises(BudgetExhausted):
+            check_budget()
+    # tokens spent outside of the budget are not charged
+    record_llm_usage(llm_response(600))
+    assert budget.tokens == 1200
+    assert budget.status()["resource"] == "tokens"
+
+
+def test_time_budget():
+    budget = Budget("batch", max_seconds=10)
+    budget.start -= 11
+    with use_budget(budget):
+        with pytest.raises(BudgetExhausted, match="batch time budget exhausted"):
+            check_budget()
+
+
+def test_run_within_budget_ends_results():
+    budget = Budget("codebase", max_tokens=100)
+
+    def results():
+        for i in range(3):
+            check_budget()
+            record_llm_usage(llm_response(60))
+            yield i
+
+    assert list(run_within_budget(results(), budget)) == [0, 1]
+    assert budget_module.active_budgets == []
+
+
+def test_next_approach_keeps_order_while_budget_remains():
+    with use_budget(Budget("codebase", max_seconds=3600)):
+        assert next_approach(APPROACHES, EXPECTED_COSTS) == ("functions", None)
+    assert next_approach(APPROACHES, EXPECTED_COSTS) == ("functions", None)
+
+
+def test_next_approach_prefers_cheaper_when_budget_is_low():
+    budget = Budget("codebase", max_seconds=3600, max_tokens=100000)
+    budget.start -= 3000
+    with use_budget(budget):
+        assert next_approach(APPROACHES, EXPECTED_COSTS) == ("readme", None)
+
+    budget = Budget("codebase", max_seconds=3600, max_tokens=10000)
+    budget.tokens = 8000
+    with use_budget(budget):
+        assert next_approach(APPROACHES, EXPECTED_COSTS) == ("functions", None)
+
+
+def test_process_codebase_records_exhausted_budget(tmp_path, monkeypatch):
+    def generate(*args, **kwargs):
+        record_llm_usage(llm_response(600))
+        check_budget()
+        yield "message", None
+
+    saved = {}
+
+    def save_results(*args, **kwargs):
+        saved["outcome_reason"] = args[6]
+        saved.update(kwargs)
+
+    monkeypatch.setattr(main, "generate_building_fuzz_targets", generate)
+    monkeypatch.setattr(main, "save_results", save_results)
+    monkeypatch.setattr(main, "record_approach_outcomes", lambda outcomes: None)
+    args = argparse.Namespace(
+        codebase_dir=str(tmp_path),
+        approaches=None,
+        llm_max_concurrency=1,
+        llm_requests_per_minute=0,
+        time_budget=0,
+        token_budget=500,
+        force=False,
+        triage_workers=1,
+        min_line_coverage=0,
+        stop_on="building",
+        max_fuzz_targets=1,
+    )
+
+    main.process_codebase(args, None)
+    assert saved["outcome_reason"] == "budget_exhausted"
+    assert saved["budget_exhausted"]["budget"] == "codebase"
+    assert saved["budget_exhausted"]["resource"] == "tokens"
@@ -0,0 +1,106 @@
+import json
+
+from fuzzomatic.tools import cargo_doc
+
+
+def make_item(name, inner, visibility="public"):
+    return {
+        "name": name,
+        "visibility": visibility,
+        "docs": "Some documentation that is not needed " * 10,
+        "span": {"filename": "src/lib.rs", "begin": [1, 0], "end": [2, 0]},
+        "attrs": [],
+        "inner": inner,
+    }
+
+
+def make_rustdoc_json():
+    str_arg = ["input", {"borrowed_ref": {"type": {"primitive": "str"}}}]
+    index = {
+        "0:0": make_item("mycrate", {"module": {"items": ["0:1", "0:2", "0:5"]}}),
+        "0:1": make_item("parse", {"function": {"decl": {"inputs": [str_arg]}}}),
+        "0:2": make_item("Parser", {"struct": {"impls": ["0:3"]}}),
+        "0:3": make_item(None, {"impl": {"items": ["0:4"]}}),
+        "0:4": make_item("from_bytes", {"function": {"decl": {"inputs": []}}}),
+        "0:5": make_item("Kind", {"enum": {"variants": []}}),
+    }
+    return {
+        "root": "0:0",
+        "crate_version": "1.0.0",
+        "index": index,
+        "paths": {"0:0": {"crate_id": 0, "path": ["mycrate"], "kind": "module"}},
+        "format_version": 26,
+    }
+
+
+def test_streaming_parse_matches_full_parse(tmp_path):
+    json_path = tmp_path / "mycrate.json"
+    json_path.write_text(json.dumps(make_rustdoc_json(), indent=1))
+
+    full = cargo_doc.parse_cargo_doc_json(str(json_path), streaming=False)
+    streamed = cargo_doc.parse_cargo_doc_json(str(json_path))
+    assert streamed == full
+    assert ([], "parse", ["&str"]) in streamed
+    assert (["Parser"], "from_bytes", []) in streamed
+
+
+def test_streaming_small_chunks(tmp_path):
+    json_path = tmp_path / "mycrate.json"
+    json_path.write_text(json.dumps(make_rustdoc_json()))
+
+    # chunk boundaries fall in the middle of keys, strings and numbers
+    root, index = cargo_doc.load_cargo_doc_index(str(json_path), chunk_size=7)
+    assert root == "0:0"
+    assert len(index) == 6
+    assert index["0:5"] is cargo_doc.DROPPED_ITEM
+    assert "docs" not in index["0:1"]
+
+
+def test_reexport_cycles_and_duplicates(tmp_path):
+    str_arg = ["input", {"borrowed_ref": {"type": {"primitive": "str"}}}]
+    index = {
+        "0:0": make_item("mycrate", {"module": {"items": ["0:1", "0:2", "0:6"]}}),
+        "0:1": make_item("a", {"module": {"items": ["0:3", "0:4"]}}),
+        "0:2": make_item("b", {"module": {"items": ["0:5"]}}),
+        "0:3": make_item("parse", {"function": {"decl": {"inputs": [str_arg]}}}),
+        # a re-exports everything from b, and b re-exports everything from a
+        "0:4": make_item(None, {"import": {"id": "0:2", "glob": True}}),
+        "0:5": make_item(None, {"import": {"id": "0:1", "glob": True}}),
+        # the crate root also re-exports parse
+        "0:6": make_item("parse", {"import": {"id": "0:3", "glob": False}}),
+    }
+    jso = {"root": "0:0", "index": index}
+    json_path = tmp_path / "mycrate.json"
+    json_path.write_text(json.dumps(jso))
+
+    functions = cargo_doc.parse_cargo_doc_json(str(json_path))
+    assert functions == [([], "parse", ["&str"])]
+
+
+def test_cargo_doc_cache_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cargo_doc, "FUZZOMATIC_DATA_DIR", str(tmp_path))
+    json_path = tmp_path / "mycrate.json"
+    json_path.write_text("{}")
+    functions = [
+        [["mycrate"], "parse", ["&str"], 100],
+        [[], "from_bytes", [("&array", "u8", 4)], 100],
+    ]
+
+    assert cargo_doc.load_cached_cargo_doc("abc") is None
+    cargo_doc.save_cached_cargo_doc("abc", str(json_path), functions)
+    cached_json_path, cached_functions = cargo_doc.load_cached_cargo_doc("abc")
+    assert cached_functions == functions
+    assert cached_json_path.endswith("mycrate.json")
+
+
+def test_hash_sources_ignores_fuzz_dir(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "lib.rs").write_text("pub fn parse(s: &str) {}")
+    (tmp_path / "fuzz" / "fuzz_targets").mkdir(parents=True)
+    source_hash = cargo_doc.hash_sources(str(tmp_path))
+
+    (tmp_path / "fuzz" / "fuzz_targets" / "auto.rs").write_text("fuzz_target!()")
+    assert cargo_doc.hash_sources(str(tmp_path)) == source_hash
+
+    (tmp_path / "src" / "lib.rs").write_text("pub fn parse(b: &[u8]) {}")
+    assert cargo_doc.hash_sources(str(tmp_path)) != source_hash
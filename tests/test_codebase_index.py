@@ -0,0 +1,101 @@
+from fuzzomatic.tools import codebase_index
+
+LIB_RS = """
+pub fn parse(input: &str) -> Result<(), ()> { Ok(()) }
+pub fn len(&self) -> usize { 0 }
+pub fn add(a: u32, b: u32) -> u32 { a + b }
+
+#[test]
+fn test_add() {}
+
+#[test]
+fn test_parse() {}
+"""
+
+APPROACHES = [
+    ("functions", None),
+    ("readme", None),
+    ("examples", None),
+    ("unit_tests", None),
+    ("unit_tests_with_function", None),
+    ("benches", None),
+]
+
+
+def approach_names(approaches):
+    return [name for name, _ in approaches]
+
+
+def test_build_codebase_index(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "lib.rs").write_text(LIB_RS)
+    (tmp_path / "examples" / "nested").mkdir(parents=True)
+    (tmp_path / "examples" / "simple.rs").write_text("fn main() {}")
+    (tmp_path / "examples" / "nested" / "main.rs").write_text("fn main() {}")
+    (tmp_path / "README.md").write_text('```rust\nparse("")\n```')
+    (tmp_path / "USAGE").write_text("no code")
+    (tmp_path / "fuzz" / "fuzz_targets").mkdir(parents=True)
+    (tmp_path / "fuzz" / "fuzz_targets" / "auto.rs").write_text(LIB_RS)
+
+    index = codebase_index.build_codebase_index(str(tmp_path))
+
+    assert index["has_lib"]
+    assert index["public_functions"] == 2
+    assert index["bytes_functions"] == 1
+    assert index["unit_tests"] == 2
+    assert [(p.split("/")[-1], n) for p, n in index["readmes"]] == [
+        ("README.md", 1),
+        ("USAGE", 0),
+    ]
+    assert [(p.split("/")[-1], n) for p, n in index["examples"]] == [("simple.rs", 12)]
+    assert index["benches"] == []
+
+
+def test_binary_crate_without_inputs(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.rs").write_text("pub fn run(a: u32) {}\nfn main() {}")
+    (tmp_path / "README.md").write_text("no code snippets")
+
+    index = codebase_index.build_codebase_index(str(tmp_path))
+    approaches, skipped = codebase_index.applicable_approaches(APPROACHES, index)
+
+    assert approaches == []
+    assert skipped == approach_names(APPROACHES)
+
+
+def test_applicable_approaches_ordered_by_inputs(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "lib.rs").write_text(LIB_RS)
+    (tmp_path / "benches").mkdir()
+    for i in range(4):
+        (tmp_path / "benches" / f"bench{i}.rs").write_text("fn main() {}")
+
+    index = codebase_index.build_codebase_index(str(tmp_path))
+    approaches, skipped = codebase_index.applicable_approaches(APPROACHES, index)
+
+    assert approach_names(approaches) == [
+        "benches",
+        "functions",
+        "unit_tests",
+        "unit_tests_with_function",
+    ]
+    assert skipped == ["readme", "examples"]
+
+
+def test_unknown_approaches_are_kept():
+    index = {
+        "readmes": [],
+        "examples": [],
+        "benches": [],
+        "unit_tests": 0,
+        "public_functions": 0,
+        "bytes_functions": 0,
+        "source_bytes": 0,
+        "has_lib": False,
+    }
+    approaches, skipped = codebase_index.applicable_approaches(
+        [("custom", None)], index
+    )
+
+    assert approach_names(approaches) == ["custom"]
+    assert skipped == []
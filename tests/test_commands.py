@@ -0,0 +1,112 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from fuzzomatic.tools import commands
+
+
+def is_running(pid):
+    # killed processes may stay zombies until they are reaped
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(") ")[1][0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_check_output():
+    output = commands.check_output(["sh", "-c", "echo out; echo err >&2"], "default")
+    assert output == b"out\n"
+
+    output = commands.check_output(
+        ["sh", "-c", "echo out; echo err >&2"], "default", stderr=subprocess.STDOUT
+    )
+    assert output == b"out\nerr\n"
+
+
+def test_check_output_failure():
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        commands.check_output(["sh", "-c", "echo failed; exit 3"], "default")
+    assert e.value.returncode == 3
+    assert e.value.output == b"failed\n"
+
+
+def test_timeout_kills_process_group(tmp_path):
+    pid_path = tmp_path / "pid"
+    cmd = ["sh", "-c", f"sleep 60 & echo $! > {pid_path}; echo started; wait"]
+
+    with pytest.raises(commands.CommandTimeout) as e:
+        commands.check_output(cmd, "default", timeout=1)
+
+    assert isinstance(e.value, subprocess.CalledProcessError)
+    assert e.value.output == b"started\n"
+    assert not is_running(int(pid_path.read_text()))
+
+
+def test_output_is_bounded():
+    script = "for i in range(10000): print(f'line {i}')"
+    result = commands.run_command(
+        [sys.executable, "-c", script], "default", max_output_bytes=1000
+    )
+
+    output = result["output"]
+    assert result["returncode"] == 0
+    assert result["truncated_bytes"] > 0
+    assert len(output) < 1100
+    assert output.startswith(b"line 0\n")
+    assert output.endswith(b"line 9999\n")
+    assert b"bytes truncated" in output
+    assert len(result["line_times"]) == output.count(b"\n")
+
+
+def test_input_and_stderr():
+    result = commands.run_command(
+        ["sh", "-c", "cat >&2"],
+        "default",
+        input=b"code",
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    assert result["output"] is None
+    assert result["stderr"] == b"code"
+
+
+def test_record_commands():
+    stats = {}
+    with commands.record_commands(stats):
+        commands.run_command(["true"], "git")
+        commands.run_command(["false"], "git")
+        commands.run_command(["sleep", "5"], "build", timeout=0.5)
+    commands.run_command(["true"], "git")
+
+    assert stats["git"]["count"] == 2
+    assert stats["git"]["failures"] == 1
+    assert stats["build"]["timeouts"] == 1
+    assert stats["build"]["timed_out_commands"] == ["sleep 5"]
+
+
+def test_commands_are_recorded_per_thread():
+    stats = {}
+    other_stats = {}
+
+    def other_codebase():
+        with commands.record_commands(other_stats):
+            commands.run_command(["true"], "fetch")
+
+    with commands.record_commands(stats):
+        # e.g. the prefetch of the next code base
+        thread = threading.Thread(target=other_codebase)
+        thread.start()
+        thread.join()
+        # workers record into the stats of the code base they work for
+        worker = threading.Thread(
+            target=commands.with_command_stats(commands.run_command),
+            args=(["true"], "build"),
+        )
+        worker.start()
+        worker.join()
+
+    assert list(stats) == ["build"]
+    assert list(other_stats) == ["fetch"]
@@ -0,0 +1,64 @@
+from fuzzomatic.main import current_stats
+from fuzzomatic.tools import coverage
+
+
+def test_parse_coverage_summary():
+    jso = {
+        "data": [
+            {
+                "totals": {
+                    "lines": {"count": 200, "covered": 50, "percent": 25.0},
+                    "functions": {"count": 10, "covered": 3, "percent": 30.0},
+                }
+            }
+        ]
+    }
+    summary = coverage.parse_coverage_summary(jso)
+    assert summary["lines"] == {"count": 200, "covered": 50, "percent": 25.0}
+    assert summary["functions"]["covered"] == 3
+    assert "regions" not in summary
+
+
+def test_min_line_coverage_stop_condition():
+    def target(percent):
+        target_coverage = None
+        if percent is not None:
+            target_coverage = {
+                "lines": {"count": 100, "covered": 0, "percent": percent}
+            }
+        return {"is_useful": True, "bug_found": False, "coverage": target_coverage}
+
+    targets = [target(5.0), target(40.0), target(None)]
+    assert current_stats(targets) == (3, 3, 0)
+    assert current_stats(targets, min_line_coverage=20) == (3, 1, 0)
+
+
+def test_coverage_cache_key(tmp_path):
+    def package(name):
+        crate_dir = tmp_path / name
+        (crate_dir / "src").mkdir(parents=True)
+        (crate_dir / "src" / "lib.rs").write_text("pub fn parse() {}")
+        fuzz_dir = crate_dir / "fuzz"
+        (fuzz_dir / "corpus" / "auto").mkdir(parents=True)
+        (fuzz_dir / "corpus" / "auto" / "a").write_text("input")
+        (fuzz_dir / "Cargo.toml").write_text(
+            '[dependencies]\nmycrate = {path = ".."}\n'
+        )
+        return crate_dir, fuzz_dir
+
+    def key(fuzz_dir):
+        corpus_dir = str(fuzz_dir / "corpus" / "auto")
+        return coverage.coverage_cache_key(str(fuzz_dir), "code", corpus_dir)
+
+    crate_dir, fuzz_dir = package("mycrate")
+    _, copy_fuzz_dir = package("copy")
+    # isolated copies of the same code base share the cache
+    assert key(fuzz_dir) == key(copy_fuzz_dir)
+
+    first = key(fuzz_dir)
+    (fuzz_dir / "corpus" / "auto" / "b").write_text("more")
+    assert key(fuzz_dir) != first
+
+    second = key(fuzz_dir)
+    (crate_dir / "src" / "lib.rs").write_text("pub fn parse() { todo!() }")
+    assert key(fuzz_dir) != second
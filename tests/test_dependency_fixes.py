@@ -0,0 +1,59 @@
+from fuzzomatic.approaches import common
+
+ERROR = """error[E0463]: can't find crate for `serde_json`
+ --> fuzz_targets/auto.rs:4:1
+  |
+4 | extern crate serde_json;
+  | ^^^^^^^^^^^^^^^^^^^^^^^^ can't find crate
+
+error[E0432]: unresolved import `serde`
+ --> fuzz_targets/auto.rs:6:5
+  |
+6 | use serde::Deserialize;
+  |     ^^^^^ use of undeclared crate or module `serde`
+
+error[E0432]: unresolved import `serde`
+ --> fuzz_targets/auto.rs:7:5
+  |
+7 | use serde::de::Error;
+  |     ^^^^^ use of undeclared crate or module `serde`
+"""
+
+
+def test_plan_dependency_fixes():
+    edits = common.plan_dependency_fixes(ERROR, "mycrate")
+    assert edits == [
+        {"kind": "remove_line", "line": "extern crate serde_json;"},
+        {"kind": "add_dependency", "dependency": "serde@*"},
+    ]
+
+
+def test_no_rebuild_without_fixes(monkeypatch):
+    def build_target(*_args):
+        raise AssertionError("unexpected build")
+
+    monkeypatch.setattr(common, "build_target", build_target)
+    monkeypatch.setattr(
+        common.fuzzomatic.tools.utils, "detect_crate_name", lambda _: "mycrate"
+    )
+    error = "error[E0425]: cannot find function `parse` in crate `mycrate`"
+    result = common.add_missing_cargo_dependencies("codebase", error, "code", "auto")
+    assert result == (False, error, "code")
+
+
+def test_no_rebuild_when_no_fix_applies(tmp_path, monkeypatch):
+    def build_target(*_args):
+        raise AssertionError("unexpected build")
+
+    (tmp_path / "fuzz" / "fuzz_targets").mkdir(parents=True)
+    (tmp_path / "fuzz" / "Cargo.toml").write_text("[dependencies]\n")
+    monkeypatch.setattr(common, "build_target", build_target)
+    monkeypatch.setattr(common, "add_fuzz_dependency", lambda *_: False)
+    monkeypatch.setattr(
+        common.fuzzomatic.tools.utils, "detect_crate_name", lambda _: "mycrate"
+    )
+
+    # the serde dependency cannot be added and the extern crate line is not there
+    code = "use serde::Deserialize;"
+    result = common.add_missing_cargo_dependencies(str(tmp_path), ERROR, code, "auto")
+    assert result == (False, ERROR, code)
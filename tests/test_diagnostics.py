@@ -0,0 +1,74 @@
+import json
+
+from fuzzomatic.tools import diagnostics
+
+BUILD_OUTPUT = """   Compiling libc v0.2.150
+   Compiling mycrate v0.1.0 (/home/alice/mycrate)
+error[E0432]: unresolved import `serde`
+ --> fuzz_targets/auto.rs:5:5
+  |
+5 | use serde::Deserialize;
+  |     ^^^^^ use of undeclared crate or module `serde`
+
+error[E0425]: cannot find function `parse` in crate `mycrate`
+ --> fuzz_targets/auto.rs:9:26
+  |
+9 |         let _ = mycrate::parse(input);
+  |                          ^^^^^ not found in `mycrate`
+  |
+help: consider importing this function
+  |
+3 + use mycrate::parser::parse;
+  |
+
+error[E0432]: unresolved import `serde`
+ --> fuzz_targets/auto.rs:5:5
+  |
+5 | use serde::Deserialize;
+  |     ^^^^^ use of undeclared crate or module `serde`
+
+error: aborting due to 3 previous errors
+
+Some errors have detailed explanations: E0425, E0432.
+error: could not compile `mycrate-fuzz` (bin "auto") due to 3 previous errors
+Error: failed to build fuzz script
+"""
+
+
+def test_format_build_errors_deduplicates():
+    error = diagnostics.format_build_errors(BUILD_OUTPUT)
+    assert error.count("unresolved import `serde`") == 1
+    assert "help: consider importing this function" in error
+    assert "Compiling" not in error
+    assert "aborting due to" not in error
+
+
+def test_format_build_errors_token_budget():
+    error = diagnostics.format_build_errors(BUILD_OUTPUT, token_budget=30)
+    assert "unresolved import `serde`" in error
+    assert "cannot find function" not in error
+    assert error.endswith("... 1 more errors omitted")
+
+
+def test_parse_json_diagnostics():
+    message = {
+        "reason": "compiler-message",
+        "message": {
+            "level": "error",
+            "code": {"code": "E0432"},
+            "message": "unresolved import `serde`",
+            "spans": [
+                {
+                    "is_primary": True,
+                    "file_name": "fuzz_targets/auto.rs",
+                    "line_start": 5,
+                    "column_start": 5,
+                }
+            ],
+            "rendered": "error[E0432]: unresolved import `serde`",
+        },
+    }
+    output = "\n".join([json.dumps(message)] * 2)
+    parsed = diagnostics.parse_diagnostics(output)
+    assert parsed[0]["location"] == "fuzz_targets/auto.rs:5:5"
+    assert diagnostics.format_build_errors(output) == message["message"]["rendered"]
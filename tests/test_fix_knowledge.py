@@ -0,0 +1,104 @@
+from fuzzomatic.approaches import common
+from fuzzomatic.tools import fix_knowledge
+
+ERROR = """error[E0425]: cannot find function `parse` in crate `mycrate`
+ --> fuzz_targets/auto.rs:9:26
+  |
+9 |         let _ = mycrate::parse(input);
+  |                          ^^^^^ not found in `mycrate`
+"""
+
+CODE_BEFORE = """#![no_main]
+
+extern crate libfuzzer_sys;
+extern crate mycrate;
+
+use libfuzzer_sys::fuzz_target;
+
+fuzz_target!(|data: &[u8]| {
+    let _ = parse(data);
+});"""
+
+
+def test_error_signatures_match_across_crates():
+    signatures = fix_knowledge.error_signatures(ERROR, "mycrate")
+    other_error = ERROR.replace("mycrate", "othercrate").replace("9:26", "12:3")
+    other_signatures = fix_knowledge.error_signatures(other_error, "othercrate")
+    assert signatures == ["E0425: cannot find function `parse` in crate `<crate>`"]
+    assert signatures == other_signatures
+
+
+def test_learned_import_fix_is_applied(tmp_path):
+    path = str(tmp_path / "fix_knowledge.json")
+    code_after = CODE_BEFORE.replace(
+        "use libfuzzer_sys::fuzz_target;",
+        "use libfuzzer_sys::fuzz_target;\nuse mycrate::parser::parse;",
+    )
+    edits = fix_knowledge.code_edits_from_fix(CODE_BEFORE, code_after, "mycrate")
+    assert edits == [{"kind": "add_line", "line": "use <crate>::parser::parse;"}]
+
+    signatures = fix_knowledge.error_signatures(ERROR, "mycrate")
+    fix_knowledge.learn_fix(signatures, edits, path=path)
+    known_edits = fix_knowledge.find_known_edits(signatures, path=path)
+    assert known_edits == edits
+
+    other_code = CODE_BEFORE.replace("mycrate", "othercrate")
+    fixed = fix_knowledge.apply_code_edits(other_code, known_edits, "othercrate")
+    assert "use libfuzzer_sys::fuzz_target;\nuse othercrate::parser::parse;" in fixed
+
+    # edits that fail more often than they work are not applied anymore
+    fix_knowledge.record_fix_failure(signatures, edits, path=path)
+    assert fix_knowledge.find_known_edits(signatures, path=path) == []
+
+
+def test_fixes_beyond_imports_are_not_learned():
+    code_after = CODE_BEFORE.replace("parse(data)", "mycrate::parse(data)")
+    assert fix_knowledge.code_edits_from_fix(CODE_BEFORE, code_after, "mycrate") == []
+
+
+def test_edits_are_learned_for_the_errors_they_fix(tmp_path):
+    path = str(tmp_path / "fix_knowledge.json")
+    signatures = [
+        "E0432: unresolved import `serde`",
+        "E0425: cannot find function `parse` in crate `<crate>`",
+    ]
+    serde = {"kind": "add_dependency", "dependency": "serde@*"}
+    parse = {"kind": "add_line", "line": "use <crate>::parser::parse;"}
+    fix_knowledge.learn_fix(signatures, [serde, parse], path=path)
+
+    assert fix_knowledge.find_known_edits(signatures[:1], path=path) == [serde]
+    assert fix_knowledge.find_known_edits(signatures[1:], path=path) == [parse]
+
+    # failures only demote the edits that were tried
+    other = ["E0999: unknown `thing`"]
+    fix_knowledge.record_fix_failure(signatures + other, [serde], path=path)
+    assert fix_knowledge.find_known_edits(signatures, path=path) == [parse]
+    assert other[0] not in fix_knowledge.load_fix_knowledge(path)
+
+
+def test_failed_known_fix_restores_the_manifest(tmp_path, monkeypatch):
+    fuzz_dir = tmp_path / "fuzz"
+    (fuzz_dir / "fuzz_targets").mkdir(parents=True)
+    cargo_toml = fuzz_dir / "Cargo.toml"
+    cargo_toml.write_text("[dependencies]\n")
+    path = str(tmp_path / "fix_knowledge.json")
+    signatures = fix_knowledge.error_signatures(ERROR, "mycrate")
+    edit = {"kind": "add_dependency", "dependency": "parse@*"}
+    fix_knowledge.learn_fix(signatures, [edit], path=path)
+
+    def add_fuzz_dependency(codebase_dir, dependency):
+        cargo_toml.write_text(f"[dependencies]\n{dependency}\n")
+        return True
+
+    monkeypatch.setattr(fix_knowledge, "get_fix_knowledge_path", lambda: path)
+    monkeypatch.setattr(common, "add_fuzz_dependency", add_fuzz_dependency)
+    monkeypatch.setattr(common, "build_target", lambda *_: (False, ERROR, ""))
+    monkeypatch.setattr(
+        common.fuzzomatic.tools.utils, "detect_crate_name", lambda _: "mycrate"
+    )
+
+    result = common.apply_known_fixes(str(tmp_path), "auto", CODE_BEFORE, ERROR)
+    assert result == (False, CODE_BEFORE)
+    assert cargo_toml.read_text() == "[dependencies]\n"
+    assert not (fuzz_dir / "Cargo.lock").exists()
+    assert fix_knowledge.find_known_edits(signatures, path=path) == []
@@ -0,0 +1,23 @@
+from fuzzomatic.tools import function_model
+
+
+def test_training_samples_join_evaluations(tmp_path):
+    path = str(tmp_path / "outcomes.jsonl")
+    function_model.record_function_attempt(["arg0:&str"], True, "code a", path=path)
+    function_model.record_function_attempt(["arg0:self"], True, "code b", path=path)
+    function_model.record_function_attempt(["arg0:other"], False, path=path)
+    function_model.record_target_usefulness("code a", True, path=path)
+    function_model.record_target_usefulness("code b", False, path=path)
+
+    samples = function_model.load_training_samples(path=path)
+    assert samples == [(["arg0:&str"], 1), (["arg0:self"], 0), (["arg0:other"], 0)]
+
+
+def test_learned_model_prefers_useful_functions():
+    useful = function_model.function_features(["a"], "decode", ["&[u8]"], 100)
+    useless = function_model.function_features(["a"], "from_str", ["&str"], 100)
+    samples = [(useful, 1), (useless, 0)] * 20
+
+    model = function_model.train_function_model(samples)
+    assert function_model.logit(model, useful) > function_model.logit(model, useless)
+    assert model["positives"] == 20
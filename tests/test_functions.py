@@ -0,0 +1,99 @@
+from fuzzomatic.approaches import functions
+from fuzzomatic.tools import cargo_doc, signatures
+
+
+def test_libfuzzer_options_fixed_size_array():
+    options = functions.derive_libfuzzer_options(
+        "templates/fuzz_target/fuzz_target_byte_array_length.j2",
+        [("&array", "u8", "32")],
+    )
+    assert options["max_len"] == 32
+    assert options["len_control"] == 0
+    assert "timeout" in options
+
+
+def test_libfuzzer_options_multiple_fixed_size_args():
+    options = functions.derive_libfuzzer_options(
+        "templates/fuzz_target/multiple_args/base.j2",
+        ["u32", "bool", ("&array", "u16", "4")],
+    )
+    assert options["max_len"] == 4 + 1 + 8
+
+
+def test_libfuzzer_options_const_generic_array():
+    options = functions.derive_libfuzzer_options(
+        "templates/fuzz_target/multiple_args/base.j2", ["u32", ("&array", "u8", "N")]
+    )
+    assert "max_len" not in options
+
+    options = functions.derive_libfuzzer_options(
+        "templates/fuzz_target/fuzz_target_byte_array_length.j2",
+        [("&array", "u8", "N")],
+    )
+    assert "max_len" not in options
+
+
+def test_libfuzzer_options_variable_size_args():
+    options = functions.derive_libfuzzer_options(
+        "templates/fuzz_target/multiple_args/base.j2", ["&str", "u8"]
+    )
+    assert "max_len" not in options
+
+    options = functions.derive_libfuzzer_options(
+        "templates/fuzz_target/fuzz_target_str.j2", ["&str"]
+    )
+    assert "max_len" not in options
+
+
+def test_prefetch_workspace_functions(tmp_path, monkeypatch):
+    monkeypatch.setattr(cargo_doc, "FUZZOMATIC_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        functions, "cargo_doc_cache_key", lambda m, root_codebase_dir: m
+    )
+    monkeypatch.setattr(
+        functions, "parse_cargo_doc_json", lambda _: [([], "parse", ["&str"])]
+    )
+    json_path = tmp_path / "member.json"
+    json_path.write_text("{}")
+    documented = []
+
+    def generate(root_codebase_dir, member_dirs):
+        documented.append(member_dirs)
+        return {m: str(json_path) for m in member_dirs}
+
+    monkeypatch.setattr(functions, "generate_workspace_cargo_doc_json", generate)
+
+    functions.prefetch_workspace_functions("ws", ["a", "b"])
+    _, cached_functions = cargo_doc.load_cached_cargo_doc("b")
+    assert cached_functions == [[[], "parse", ["&str"], 100]]
+
+    # members are documented in a single pass, and only once
+    functions.prefetch_workspace_functions("ws", ["a", "b"])
+    assert documented == [["a", "b"]]
+
+
+def test_score_functions():
+    ordered = functions.score_functions(
+        [
+            (["a"], "new", []),
+            (["a"], "from_file", ["&str"]),
+            (["a", "Parser"], "parse", ["&str"]),
+            ([], "check", ["u32", ("&array", "u8", "4")]),
+            (["a", "Parser"], "read", ["self"]),
+        ]
+    )
+    assert [(f[1], f[3]) for f in ordered] == [
+        ("parse", 100),
+        ("check", 75),
+        ("from_file", 0),
+        ("read", -15),
+        ("new", -100),
+    ]
+
+
+def test_denylist_uses_fully_qualified_names():
+    table = signatures.FunctionTable(
+        [(["a", "unsafe_io"], "parse", ["&str"]), (["a"], "parse", ["&str"])]
+    )
+    assert table.denylisted(["unsafe_io::"]) == {0}
+    assert table.denylisted([]) == set()
@@ -0,0 +1,92 @@
+import os
+
+from fuzzomatic.tools import isolation
+
+
+def write(path, contents):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(contents)
+
+
+def test_create_isolated_copy(tmp_path, monkeypatch):
+    monkeypatch.setattr(isolation, "FUZZOMATIC_DATA_DIR", str(tmp_path / "data"))
+    codebase_dir = tmp_path / "mycrate"
+    write(str(codebase_dir / "src" / "lib.rs"), "pub fn f() {}")
+    write(str(codebase_dir / "Cargo.lock"), "lock")
+    write(str(codebase_dir / "fuzz" / "Cargo.toml"), "[package]")
+    write(str(codebase_dir / "fuzz" / "fuzz_targets" / "auto.rs"), "fuzz")
+    write(str(codebase_dir / "fuzz" / "target" / "release" / "dep.rlib"), "rlib")
+    write(str(codebase_dir / "fuzz" / "corpus" / "auto" / "input"), "input")
+    write(str(codebase_dir / "target" / "debug" / "lib.rlib"), "rlib")
+
+    worker_dir, worker_root = isolation.create_isolated_copy(str(codebase_dir), "a")
+
+    assert worker_root is None
+    lib = os.path.join(worker_dir, "src", "lib.rs")
+    assert os.path.samefile(lib, codebase_dir / "src" / "lib.rs")
+    lock = os.path.join(worker_dir, "Cargo.lock")
+    assert not os.path.samefile(lock, codebase_dir / "Cargo.lock")
+    target = os.path.join(worker_dir, "fuzz", "fuzz_targets", "auto.rs")
+    assert not os.path.samefile(target, codebase_dir / "fuzz/fuzz_targets/auto.rs")
+    assert os.path.exists(os.path.join(worker_dir, "fuzz/target/release/dep.rlib"))
+    assert not os.path.exists(os.path.join(worker_dir, "fuzz", "corpus"))
+    assert not os.path.exists(os.path.join(worker_dir, "target"))
+
+
+def test_create_isolated_copy_workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(isolation, "FUZZOMATIC_DATA_DIR", str(tmp_path / "data"))
+    root = tmp_path / "ws"
+    write(str(root / "Cargo.toml"), "[workspace]")
+    write(str(root / "a" / "src" / "lib.rs"), "a")
+    write(str(root / "a" / "fuzz" / "Cargo.toml"), "[package]")
+    write(str(root / "b" / "src" / "lib.rs"), "b")
+    write(str(root / "b" / "fuzz" / "Cargo.toml"), "[package]")
+
+    worker_dir, worker_root = isolation.create_isolated_copy(
+        str(root / "a"), "x", root_codebase_dir=str(root)
+    )
+
+    assert worker_dir == os.path.join(worker_root, "a")
+    assert os.path.exists(os.path.join(worker_root, "b", "src", "lib.rs"))
+    assert os.path.exists(os.path.join(worker_dir, "fuzz", "Cargo.toml"))
+    # fuzz crates of the other members are not needed
+    assert not os.path.exists(os.path.join(worker_root, "b", "fuzz"))
+
+
+def test_share_build_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(isolation, "FUZZOMATIC_DATA_DIR", str(tmp_path / "data"))
+    built = []
+
+    def fake_warm_up(codebase_dir, target_name):
+        built.append(codebase_dir)
+        write(os.path.join(codebase_dir, "fuzz", "target", "dep.rlib"), "rlib")
+
+    monkeypatch.setattr(isolation, "warm_up_fuzz_build", fake_warm_up)
+    root = tmp_path / "ws"
+    build_cache = isolation.new_build_cache(str(root))
+    for member in ["a", "b", "c"]:
+        os.makedirs(root / member / "fuzz")
+        isolation.share_build_cache(build_cache, str(root / member), "auto")
+
+    # dependencies are only built by the first member
+    assert built == [str(root / "a")]
+    for member in ["b", "c"]:
+        assert (root / member / "fuzz" / "target" / "dep.rlib").read_text() == "rlib"
+
+
+def test_original_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(isolation, "FUZZOMATIC_DATA_DIR", str(tmp_path / "data"))
+    codebase_dir = tmp_path / "mycrate"
+    write(str(codebase_dir / "fuzz" / "fuzz_targets" / "auto.rs"), "fuzz")
+
+    worker_dir, _ = isolation.create_isolated_copy(str(codebase_dir), "b")
+    target = os.path.join(worker_dir, "fuzz", "fuzz_targets", "auto.rs")
+    assert isolation.original_path(target) == str(
+        codebase_dir / "fuzz" / "fuzz_targets" / "auto.rs"
+    )
+    assert isolation.original_path(os.path.join(worker_dir, "fuzz")) == str(
+        codebase_dir / "fuzz"
+    )
+    other = str(tmp_path / "other" / "fuzz")
+    assert isolation.original_path(other) == other
@@ -0,0 +1,201 @@
+import argparse
+import sys
+import threading
+import time
+
+import pytest
+
+from fuzzomatic import main
+from fuzzomatic.tools import pipeline
+from fuzzomatic.tools.budget import BudgetExhausted
+from fuzzomatic.tools.cancellation import check_stopped
+
+
+def test_run_pipeline_stages():
+    def double(x):
+        return [x * 2]
+
+    def drop_odd_tens(x):
+        if (x // 10) % 2 == 1:
+            return []
+        return [x]
+
+    stages = [("double", double, 3), ("filter", drop_odd_tens, 2)]
+    stats = {}
+    results = list(pipeline.run_pipeline(range(20), stages, stats=stats))
+
+    expected = [x * 2 for x in range(20) if ((x * 2) // 10) % 2 == 0]
+    assert sorted(results) == expected
+    assert stats["source"]["items_out"] == 20
+    assert stats["double"]["items_in"] == 20
+    assert stats["filter"]["items_out"] == len(expected)
+    assert stats["consumer"]["items_in"] == len(expected)
+
+
+def test_run_pipeline_overlaps_stages():
+    def slow(x):
+        time.sleep(0.1)
+        return [x]
+
+    stages = [("first", slow, 1), ("second", slow, 1)]
+    start = time.monotonic()
+    results = list(pipeline.run_pipeline(range(5), stages))
+    elapsed = time.monotonic() - start
+
+    assert results == list(range(5))
+    # sequential execution would take 1 second
+    assert elapsed < 0.9
+
+
+def test_run_pipeline_stops_early():
+    threads_before = threading.active_count()
+    stages = [("identity", lambda x: [x], 2)]
+    generator = pipeline.run_pipeline(iter(range(1000)), stages, queue_size=1)
+    assert next(generator) == 0
+    generator.close()
+
+    time.sleep(3 * pipeline.POLL_SECONDS)
+    assert threading.active_count() == threads_before
+
+
+def test_run_approaches_pipelined(tmp_path, monkeypatch):
+    def jobs(codebase_dir, **_kwargs):
+        for i in range(3):
+            yield {"prompt": f"p{i}", "remaining_attempts": 0, "additional_code": None}
+
+    def fake_generate(codebase_dir, prompt, **_kwargs):
+        return "bad" if prompt == "p1" else prompt
+
+    def fake_attempt(codebase_dir, prompt, target_name, code_snippet, **_kwargs):
+        if code_snippet == "bad":
+            return False, None
+        fuzz_target_path = tmp_path / codebase_dir / f"{prompt}.rs"
+        fuzz_target_path.parent.mkdir(exist_ok=True)
+        fuzz_target_path.write_text(code_snippet)
+        return True, str(fuzz_target_path)
+
+    def fake_evaluate(args, code, path, approach, options):
+        return {"is_useful": code != "p0"}
+
+    monkeypatch.setattr(main, "PROMPT_APPROACHES", {"readme": jobs})
+    monkeypatch.setattr(main, "generate_fuzz_target", fake_generate)
+    monkeypatch.setattr(main, "validate_fuzz_target", lambda code: (code, None))
+    monkeypatch.setattr(main, "attempt_generated_fuzz_target", fake_attempt)
+    monkeypatch.setattr(main, "evaluate_fuzz_target", fake_evaluate)
+    monkeypatch.setattr(main, "warm_up_fuzz_build", lambda *args: None)
+    monkeypatch.setattr(
+        main, "create_isolated_copy", lambda d, name, root_codebase_dir: (name, None)
+    )
+
+    args = argparse.Namespace(
+        stage_workers={"llm": 2, "validate": 1, "build": 1, "evaluate": 1}
+    )
+    results = list(main.run_approaches_pipelined(args, "codebase", [("readme", None)]))
+
+    assert all(result_type == "evaluated_fuzz_target" for result_type, _ in results)
+    codes = sorted(contents[0][0] for _, contents in results)
+    assert codes == ["p0", "p2"]
+    assert all(contents[0][2] == "readme" for _, contents in results)
+
+
+def test_autofuzz_members_concurrently(monkeypatch):
+    def fake_autofuzz_codebase(args, member_dir, **kwargs):
+        for i in range(3):
+            time.sleep(0.01)
+            yield "fuzz_target", (member_dir, i)
+
+    monkeypatch.setattr(main, "autofuzz_codebase", fake_autofuzz_codebase)
+    monkeypatch.setattr(main, "new_build_cache", lambda codebase_dir: None)
+    args = argparse.Namespace(workspace_workers=2)
+    threads_before = threading.active_count()
+
+    members = ["a", "b", "c"]
+    results = list(main.autofuzz_members_concurrently(args, "ws", members))
+    assert sorted(contents for _, contents in results) == [
+        (m, i) for m in members for i in range(3)
+    ]
+
+    # the stop condition applies to the whole workspace
+    generator = main.autofuzz_members_concurrently(args, "ws", members)
+    first = [next(generator) for _ in range(4)]
+    generator.close()
+    assert len(first) == 4
+    # closing waits for the running members
+    assert threading.active_count() == threads_before
+
+
+def test_members_stop_before_next_llm_request(monkeypatch):
+    llm_requests = []
+
+    def fake_autofuzz_codebase(args, member_dir, **kwargs):
+        yield "fuzz_target", (member_dir, 0)
+        # a member that does not yield again, e.g. its builds keep failing
+        while True:
+            check_stopped()
+            llm_requests.append(member_dir)
+            time.sleep(0.01)
+
+    monkeypatch.setattr(main, "autofuzz_codebase", fake_autofuzz_codebase)
+    monkeypatch.setattr(main, "new_build_cache", lambda codebase_dir: None)
+    args = argparse.Namespace(workspace_workers=2)
+
+    generator = main.autofuzz_members_concurrently(args, "ws", ["a", "b"])
+    next(generator)
+    generator.close()
+    requests_after_stop = len(llm_requests)
+    time.sleep(0.1)
+    assert len(llm_requests) == requests_after_stop
+
+
+def test_run_approaches_concurrently_copies_before_running(tmp_path, monkeypatch):
+    events = []
+
+    def fake_copy(codebase_dir, name, root_codebase_dir):
+        events.append(("copy", name))
+        return name, None
+
+    def approach(name):
+        def run(codebase_dir, **_kwargs):
+            events.append(("run", name, codebase_dir))
+            fuzz_target_path = tmp_path / f"{name}.rs"
+            fuzz_target_path.write_text(name)
+            yield str(fuzz_target_path), None
+
+        return name, run
+
+    monkeypatch.setattr(main, "warm_up_fuzz_build", lambda *args: None)
+    monkeypatch.setattr(main, "create_isolated_copy", fake_copy)
+    args = argparse.Namespace(approach_workers=1)
+    approaches = [approach("readme"), approach("examples"), approach("benches")]
+
+    results = list(main.run_approaches_concurrently(args, "codebase", approaches))
+    assert len(results) == 3
+    assert events[:2] == [("copy", "examples"), ("copy", "benches")]
+    assert sorted(events[2:]) == [
+        ("run", "benches", "benches"),
+        ("run", "examples", "examples"),
+        ("run", "readme", "codebase"),
+    ]
+
+
+def test_run_pipeline_raises_stage_exit():
+    def exit_stage(x):
+        sys.exit(3)
+
+    stages = [("llm", exit_stage, 2), ("identity", lambda x: [x], 1)]
+    with pytest.raises(SystemExit):
+        list(pipeline.run_pipeline(range(10), stages))
+
+
+def test_run_pipeline_ends_when_budget_runs_out():
+    processed = []
+
+    def llm_stage(x):
+        processed.append(x)
+        raise BudgetExhausted("codebase tokens budget exhausted")
+
+    stages = [("llm", llm_stage, 1), ("identity", lambda x: [x], 1)]
+    with pytest.raises(BudgetExhausted):
+        list(pipeline.run_pipeline(range(100), stages, queue_size=1))
+    # the remaining items are not processed one by one
+    assert processed == [0]
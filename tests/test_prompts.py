@@ -0,0 +1,19 @@
+from jinja2 import Template
+
+from fuzzomatic.tools import prompts
+
+
+def test_fix_prompt_rendered_from_shared_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompts, "FUZZOMATIC_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(prompts, "template_environment", None)
+
+    template_path = "templates/prompts/fix_code_error.j2"
+    t = Template(prompts.load_file_contents(template_path))
+    expected = t.render(code_snippet="fn main() {}", error="error[E0425]")
+    assert prompts.fix_prompt("fn main() {}", "error[E0425]") == expected
+
+    # compiled once per process
+    environment = prompts.get_template_environment()
+    assert environment.get_template(template_path) is environment.get_template(
+        template_path
+    )
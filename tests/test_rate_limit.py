@@ -0,0 +1,46 @@
+import threading
+import time
+
+from fuzzomatic.tools.rate_limit import RateLimiter
+
+
+def test_rate_limiter_max_concurrent():
+    limiter = RateLimiter(2)
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def request():
+        with limiter:
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max_running[0] == 2
+
+
+def test_rate_limiter_requests_per_minute():
+    # one request every 50ms
+    limiter = RateLimiter(4, requests_per_minute=1200)
+    start = time.monotonic()
+    for _ in range(4):
+        with limiter:
+            pass
+    assert time.monotonic() - start >= 0.15
+
+
+def test_rate_limiter_pause():
+    limiter = RateLimiter(4)
+    limiter.pause(0.1)
+    waited = limiter.acquire()
+    limiter.release()
+    assert waited >= 0.09
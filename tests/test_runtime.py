@@ -0,0 +1,38 @@
+from fuzzomatic.tools import runtime
+
+FUZZ_OUTPUT = b"""INFO: Running with entropic power schedule (0xFF, 100).
+INFO: Seed: 1234
+#2	INITED cov: 10 ft: 11 corp: 1/1b exec/s: 0 rss: 30Mb
+#3	NEW    cov: 12 ft: 14 corp: 2/3b lim: 4 exec/s: 0 rss: 31Mb L: 2/2 MS: 1 InsertByte-
+#512	pulse  cov: 12 ft: 14 corp: 2/3b lim: 8 exec/s: 256 rss: 31Mb
+#1024	NEW    cov: 15 ft: 20 corp: 3/2Kb lim: 8 exec/s: 341 rss: 35Mb L: 7/7 MS: 2 CopyPart-
+Done 4000 runs in 11 second(s)
+stat::number_of_executed_units: 4000
+stat::average_exec_per_sec:     363
+stat::new_units_added:          2
+stat::slowest_unit_time_sec:    0
+stat::peak_rss_mb:              36
+"""
+
+
+def test_parse_fuzz_stats():
+    line_times = [0.0, 0.0, 1.0, 1.5, 2.0, 4.0, 11.0, 11.0, 11.0, 11.0, 11.0, 11.0]
+    stats = runtime.parse_fuzz_stats(FUZZ_OUTPUT, line_times)
+
+    assert stats["total_execs"] == 4000
+    assert stats["execs_per_second"] == 363
+    assert stats["peak_rss_mb"] == 36
+    assert stats["coverage"] == 15
+    assert stats["features"] == 20
+    assert stats["corpus_units"] == 3
+    assert stats["corpus_size_bytes"] == 2048
+    assert stats["execs_to_first_new_coverage"] == 3
+    assert stats["time_to_first_new_coverage_seconds"] == 0.5
+    assert [ft for _, _, ft in stats["ft_growth"]] == [11, 14, 20]
+
+
+def test_parse_fuzz_stats_without_timings():
+    stats = runtime.parse_fuzz_stats(FUZZ_OUTPUT)
+
+    assert stats["time_to_first_new_coverage_seconds"] is None
+    assert stats["ft_growth"][0] == [None, 2, 11]
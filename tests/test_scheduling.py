@@ -0,0 +1,97 @@
+from fuzzomatic.tools import scheduling
+
+LIB_RS = """
+pub fn parse(input: &str) -> Result<(), ()> { Ok(()) }
+pub fn decode<'a>(data: &'a [u8]) -> Vec<u8> { data.to_vec() }
+pub(crate) fn internal(input: &str) {}
+pub fn add(a: u32, b: u32) -> u32 { a + b }
+
+#[test]
+fn test_add() {}
+"""
+
+
+def make_features(**kwargs):
+    features = {
+        "source_kb": 10,
+        "readme_code_blocks": 0,
+        "examples": False,
+        "benches": False,
+        "unit_tests": 0,
+        "bytes_functions": 0,
+        "workspace": False,
+    }
+    features.update(kwargs)
+    return features
+
+
+def test_codebase_features(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "lib.rs").write_text(LIB_RS)
+    (tmp_path / "examples").mkdir()
+    (tmp_path / "examples" / "parse.rs").write_text("fn main() {}")
+    (tmp_path / "README.md").write_text('```rust\nparse("")\n```\n```\n```')
+    (tmp_path / "fuzz" / "fuzz_targets").mkdir(parents=True)
+    (tmp_path / "fuzz" / "fuzz_targets" / "auto.rs").write_text(LIB_RS)
+
+    features = scheduling.codebase_features(str(tmp_path))
+
+    assert features["bytes_functions"] == 2
+    assert features["unit_tests"] == 1
+    assert features["readme_code_blocks"] == 2
+    assert features["examples"]
+    assert not features["benches"]
+    assert not features["workspace"]
+
+
+def test_heuristic_prefers_small_fuzzable_code_bases():
+    small = make_features(bytes_functions=3, readme_code_blocks=2)
+    giant = make_features(source_kb=50000, workspace=True)
+    features = {"giant": giant, "small": small}
+
+    assert scheduling.schedule_codebases(["giant", "small"], features) == [
+        "small",
+        "giant",
+    ]
+
+
+def test_learned_model_uses_past_outcomes():
+    outcomes = []
+    for i in range(40):
+        # code bases with benches were quick wins in the past
+        has_benches = i % 2 == 0
+        outcomes.append(
+            {
+                "features": make_features(benches=has_benches),
+                "duration_seconds": 100 if has_benches else 2000,
+                "outcome_reason": "success",
+                "useful": int(has_benches),
+            }
+        )
+    model = scheduling.train_scheduling_model(outcomes)
+
+    with_benches = scheduling.expected_yield_rate(make_features(benches=True), model)
+    without = scheduling.expected_yield_rate(make_features(benches=False), model)
+    assert with_benches > 10 * without
+
+    rates = scheduling.cross_validated_rates(outcomes, folds=4)
+    assert len(rates) == len(outcomes)
+    assert rates[0] > rates[1]
+
+
+def test_simulate_schedule_metrics():
+    outcomes = [
+        {"duration_seconds": 100, "useful": 1},
+        {"duration_seconds": 300, "useful": 0},
+        {"duration_seconds": 100, "useful": 1},
+    ]
+    curve = scheduling.simulate_schedule(outcomes)
+
+    assert curve == [(100, 1), (400, 1), (500, 2)]
+    assert scheduling.useful_within(curve, 450) == 1
+    assert scheduling.time_to_fraction(curve, 0.5) == 100
+    # 1 useful from 100s to 500s, out of 2 useful over 500s
+    assert scheduling.normalized_yield_area(curve) == 400 / 1000
+
+    better = scheduling.simulate_schedule([outcomes[0], outcomes[2], outcomes[1]])
+    assert scheduling.normalized_yield_area(better) > 0.4
@@ -0,0 +1,32 @@
+from fuzzomatic import soak
+
+
+def make_target(name, slices, growth_rate):
+    return {
+        "name": name,
+        "slices": slices,
+        "growth_rate": growth_rate,
+        "waiting_slices": 0,
+    }
+
+
+def test_pick_next_target_prefers_new_then_fastest_growing():
+    slow = make_target("slow", 3, 0.1)
+    fast = make_target("fast", 3, 5.0)
+    new = make_target("new", 0, None)
+    targets = [slow, fast, new]
+
+    assert soak.pick_next_target(targets, []) is new
+    assert soak.pick_next_target(targets, [new]) is fast
+    assert soak.pick_next_target(targets, [new, fast]) is slow
+    assert soak.pick_next_target(targets, targets) is None
+
+
+def test_pick_next_target_stalled_targets_are_not_starved():
+    stalled = make_target("stalled", 3, 0.0)
+    growing = make_target("growing", 3, 0.05)
+    targets = [stalled, growing]
+
+    picks = [soak.pick_next_target(targets, [])["name"] for _ in range(20)]
+    assert "stalled" in picks
+    assert picks.count("growing") > picks.count("stalled")
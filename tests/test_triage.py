@@ -0,0 +1,115 @@
+from fuzzomatic.tools import triage
+
+PANIC_OUTPUT = """
+#1024	pulse  cov: 120 ft: 180 corp: 20/300b lim: 14 exec/s: 0 rss: 40Mb
+thread '<unnamed>' panicked at /home/alice/.cargo/registry/src/index.crates.io-6f17d22bba15001f/shared-dep-1.2.3/src/parser.rs:42:13:
+index out of bounds: the len is 3 but the index is 3
+note: run with `RUST_BACKTRACE=1` environment variable to display a backtrace
+==12345== ERROR: libFuzzer: deadly signal
+    #0 0x55d1c2b3e4f1 in __sanitizer_print_stack_trace /rustc/llvm/src/compiler-rt/lib/asan/asan_stack.cpp:87:3
+    #1 0x55d1c2a1b2c3 in fuzzer::PrintStackTrace() /home/alice/.cargo/registry/src/index.crates.io-6f17d22bba15001f/libfuzzer-sys-0.4.7/libfuzzer/FuzzerUtil.cpp:210:38
+    #2 0x55d1c2b00000 in core::panicking::panic_bounds_check::h0123456789abcdef /rustc/abc/library/core/src/panicking.rs:146:5
+    #3 0x55d1c2b00001 in shared_dep::parser::Parser::next_token::hfedcba9876543210 /home/alice/.cargo/registry/src/index.crates.io-6f17d22bba15001f/shared-dep-1.2.3/src/parser.rs:42:13
+    #4 0x55d1c2b00002 in shared_dep::parse::h0011223344556677 /home/alice/.cargo/registry/src/index.crates.io-6f17d22bba15001f/shared-dep-1.2.3/src/lib.rs:10:5
+    #5 0x55d1c2b00003 in auto::_::__libfuzzer_sys_run::h8899aabbccddeeff /home/alice/git/mycrate/fuzz/fuzz_targets/auto.rs:9:5
+    #6 0x55d1c2b00004 in rust_fuzzer_test_input /home/alice/.cargo/registry/src/index.crates.io-6f17d22bba15001f/libfuzzer-sys-0.4.7/src/lib.rs:224:17
+    #7 0x55d1c2b00005 in main /home/alice/.cargo/registry/src/index.crates.io-6f17d22bba15001f/libfuzzer-sys-0.4.7/libfuzzer/FuzzerMain.cpp:20:30
+
+artifact_prefix='/home/alice/git/mycrate/fuzz/artifacts/auto/'; Test unit written to /home/alice/git/mycrate/fuzz/artifacts/auto/crash-da39a3ee5e6b4b0d3255bfef95601890afd80709
+"""
+
+
+def test_crash_signature_frames():
+    crash = triage.compute_crash_signature(PANIC_OUTPUT)
+    assert crash["kind"] == "panic"
+    assert crash["panic_location"] == "shared-dep-1.2.3/src/parser.rs:42:13"
+    assert crash["frames"] == [
+        "shared_dep::parser::Parser::next_token",
+        "shared_dep::parse",
+    ]
+
+
+def test_crash_signature_stable_across_codebases():
+    other_output = PANIC_OUTPUT.replace("/home/alice/git/mycrate", "/tmp/other")
+    other_output = other_output.replace("hfedcba9876543210", "h0000000000000000")
+    other_output = other_output.replace("0x55d1c2b", "0x7fff000")
+
+    crash = triage.compute_crash_signature(PANIC_OUTPUT)
+    other_crash = triage.compute_crash_signature(other_output)
+    assert crash["signature"] == other_crash["signature"]
+
+
+def test_crash_signature_old_panic_format():
+    output = "thread '<unnamed>' panicked at 'attempt to subtract with overflow', /home/bob/mycrate/src/lib.rs:5:9"
+    location = triage.parse_panic_location(output)
+    assert location == "mycrate/src/lib.rs:5:9"
+
+
+def test_register_crash_signature_dedup(tmp_path):
+    path = str(tmp_path / "signatures.json")
+    first = {"codebase_dir": "a", "git_url": None, "fuzz_target_path": "a/auto.rs"}
+    second = {"codebase_dir": "b", "git_url": None, "fuzz_target_path": "b/auto.rs"}
+
+    assert triage.register_crash_signature("abc", first, path=path) is None
+    duplicate_of = triage.register_crash_signature("abc", second, path=path)
+    assert duplicate_of["codebase_dir"] == "a"
+
+
+def test_triage_crash_of_isolated_copy(tmp_path, monkeypatch):
+    monkeypatch.setattr(triage, "FUZZOMATIC_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(triage, "add_named_fuzz_target", lambda *args: None)
+    run_dir = tmp_path / "workers" / "b" / "fuzz"
+    (run_dir / "artifacts" / "auto").mkdir(parents=True)
+    (run_dir / "artifacts" / "auto" / "crash-1").write_bytes(b"input")
+    fuzz_project_dir = tmp_path / "mycrate" / "fuzz"
+    output = PANIC_OUTPUT.replace(
+        "/home/alice/git/mycrate/fuzz/artifacts/auto/crash-da39a3ee5e6b4b0d3255bfef95601890afd80709",
+        "artifacts/auto/crash-1",
+    )
+    origin = {"codebase_dir": "mycrate", "git_url": None, "fuzz_target_path": "x"}
+
+    crash = triage.triage_crash(
+        str(fuzz_project_dir), "code", output, origin, run_dir=str(run_dir)
+    )
+    # the artifact is saved in the original package, not in the copy
+    assert crash["artifact_path"].startswith(str(fuzz_project_dir / "artifacts"))
+    with open(crash["artifact_path"], "rb") as f:
+        assert f.read() == b"input"
+
+
+def test_triage_crash_registers_triaged_crashes(tmp_path, monkeypatch):
+    monkeypatch.setattr(triage, "FUZZOMATIC_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(triage, "triaged_crashes", set())
+    monkeypatch.setattr(triage, "add_named_fuzz_target", lambda *args: "reproducer")
+    fuzz_project_dir = tmp_path / "mycrate" / "fuzz"
+    (fuzz_project_dir / "artifacts" / "auto").mkdir(parents=True)
+    (fuzz_project_dir / "artifacts" / "auto" / "crash-1").write_bytes(b"input")
+    output = PANIC_OUTPUT.replace(
+        "/home/alice/git/mycrate/fuzz/artifacts/auto/crash-da39a3ee5e6b4b0d3255bfef95601890afd80709",
+        "artifacts/auto/crash-1",
+    )
+    origin = {"codebase_dir": "mycrate", "git_url": None, "fuzz_target_path": "x"}
+
+    def triage_crash(output, origin):
+        return triage.triage_crash(str(fuzz_project_dir), "code", output, origin)
+
+    # a crash without artifact is not marked as seen
+    crash = triage_crash(PANIC_OUTPUT, origin)
+    assert crash["artifact_path"] is None
+    assert triage.load_crash_signatures() == {}
+
+    crash = triage_crash(output, origin)
+    assert crash["duplicate_of"] is None
+    assert crash["reproducer_target"] is not None
+    assert crash["signature"] in triage.load_crash_signatures()
+    # the same crash again in this run is a duplicate
+    assert triage_crash(output, origin)["duplicate_of"] is not None
+
+    # processing the code base again finds the same crash, not a duplicate
+    monkeypatch.setattr(triage, "triaged_crashes", set())
+    crash = triage_crash(output, origin)
+    assert crash["duplicate_of"] is None
+    assert crash["artifact_path"] is not None
+
+    other = {"codebase_dir": "other", "git_url": None, "fuzz_target_path": "y"}
+    assert triage_crash(output, other)["duplicate_of"]["codebase_dir"] == "mycrate"
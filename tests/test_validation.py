@@ -0,0 +1,42 @@
+from fuzzomatic.tools import validation
+
+FUZZ_TARGET = """#![no_main]
+
+extern crate libfuzzer_sys;
+
+use libfuzzer_sys::fuzz_target;
+
+fuzz_target!(|data: &[u8]| {
+    // not a delimiter: {
+    let braces = "{ ( [";
+    let brace = '{';
+    let raw = r#"})"#;
+    fn first<'a>(s: &'a str) -> &'a str {
+        s
+    }
+    if let Ok(s) = std::str::from_utf8(data) {
+        let _ = mycrate::parse(first(s));
+    }
+});
+"""
+
+
+def test_valid_fuzz_target():
+    code, error = validation.validate_fuzz_target(FUZZ_TARGET)
+    assert error is None
+    assert code == FUZZ_TARGET
+
+
+def test_truncated_fuzz_target_is_repaired():
+    truncated = FUZZ_TARGET[: FUZZ_TARGET.index("    }\n});")]
+    code, error = validation.validate_fuzz_target(truncated)
+    assert error is None
+    assert code.endswith("\n}});\n")
+
+
+def test_malformed_fuzz_targets_are_rejected():
+    _, error = validation.validate_fuzz_target(FUZZ_TARGET.replace("});", "}));"))
+    assert "unexpected closing delimiter" in error
+
+    _, error = validation.validate_fuzz_target("use mycrate;\nfn main() {}\n")
+    assert "missing fuzz_target!" in error